@@ -0,0 +1,121 @@
+"""긴 글을 문장 단위로 나눠 여러 스레드에서 동시에 맞춤법 검사합니다.
+
+원격 맞춤법 검사 서비스는 요청 하나에 넣을 수 있는 글자 수가 정해져 있고, 한 번에 한 요청씩 보내면
+글이 길수록 오래 기다려야 합니다. 여기서는 글을 문장(너무 긴 문장은 글자 수 제한 안쪽으로 다시 나눔)으로
+나누고, 크기가 정해진 스레드 풀에서 동시에 검사해 끝나는 순서대로 결과를 돌려줍니다.
+문장마다 원문에서의 위치(start, end)를 함께 돌려주므로 merge()로 글 전체의 결과를 다시 만들 수 있습니다.
+    SPELL_CHECK_MAX_CHARS   요청 하나에 넣을 최대 글자 수 (기본 500)
+    SPELL_CHECK_WORKERS     동시에 검사할 문장 수 (기본 4)
+"""
+import os
+import re
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from grammar_checker import Checked
+
+# 문장 하나의 검사 결과. checked는 Checked, error는 검사에 실패했을 때의 오류 메시지
+ChunkResult = namedtuple("ChunkResult", ["index", "start", "end", "checked", "error", "findings"])
+# 틀린 어절 하나. start와 end는 글 전체에서의 위치
+Finding = namedtuple("Finding", ["start", "end", "word", "error_type", "corrected"])
+
+# 문장: 공백이 아닌 글자로 시작해 마침표·물음표·느낌표(와 닫는 따옴표·괄호)나 줄바꿈 앞에서 끝남
+_SENTENCE = re.compile(r"\S[^.!?…\n]*[.!?…]*['\")\]]*")
+
+
+def get_max_chars():
+    return int(os.getenv("SPELL_CHECK_MAX_CHARS", "500"))
+
+
+def get_max_workers():
+    return int(os.getenv("SPELL_CHECK_WORKERS", "4"))
+
+
+def split_sentences(text, max_chars=None):
+    """글을 검사할 조각의 (start, end) 위치 리스트로 나눕니다. 조각은 모두 max_chars 글자 이하입니다."""
+    max_chars = max_chars or get_max_chars()
+    spans = []
+    for match in _SENTENCE.finditer(text):
+        start, end = match.start(), match.start() + len(match.group().rstrip())
+        while end - start > max_chars:
+            # 글자 수 제한 안에서 마지막 공백에서 자르고, 공백이 없으면 제한 위치에서 자름
+            cut = text.rfind(" ", start + 1, start + max_chars + 1)
+            if cut == -1:
+                cut = start + max_chars
+            spans.append((start, cut))
+            start = cut
+            while start < end and text[start].isspace():
+                start += 1
+        if start < end:
+            spans.append((start, end))
+    return spans
+
+
+def _findings(text, start, end, checked):
+    """조각의 틀린 어절을 원문에서 찾아 글 전체 기준 위치가 붙은 Finding 리스트로 만듭니다."""
+    findings = []
+    position = start
+    for word, info in checked.words.items():
+        # 어절은 문장 안 순서대로 기록되므로 앞 어절 뒤부터 찾고, 못 찾으면 조각 처음부터 다시 찾음
+        found = text.find(word, position, end)
+        if found == -1:
+            found = text.find(word, start, end)
+        if found == -1:
+            continue
+        findings.append(Finding(found, found + len(word), word, info[0], info[1]))
+        position = found + len(word)
+    return findings
+
+
+def iter_check(text, check, max_chars=None, max_workers=None):
+    """글을 문장으로 나눠 동시에 검사하고, 검사가 끝나는 순서대로 ChunkResult를 yield합니다.
+
+    한 문장의 검사가 실패해도 나머지 문장은 계속 검사하고, 실패한 문장은 error에 이유를 담습니다.
+    호출한 쪽이 중간에 멈추면 아직 시작하지 않은 검사는 취소합니다.
+    """
+    spans = split_sentences(text, max_chars)
+    if not spans:
+        return
+    executor = ThreadPoolExecutor(max_workers=min(max_workers or get_max_workers(), len(spans)),
+                                  thread_name_prefix="spell-check")
+    futures = {executor.submit(check, text[start:end]): (i, start, end) for i, (start, end) in enumerate(spans)}
+    try:
+        for future in as_completed(futures):
+            index, start, end = futures[future]
+            try:
+                checked = future.result()
+            except Exception as exc:
+                yield ChunkResult(index, start, end, None, str(exc), [])
+                continue
+            yield ChunkResult(index, start, end, checked, None, _findings(text, start, end, checked))
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def merge(text, results):
+    """ChunkResult들을 원문 순서대로 이어 글 전체의 Checked를 만듭니다.
+
+    조각 사이의 공백과 줄바꿈은 원문 그대로 두고, 검사에 실패한 조각은 원문을 그대로 씁니다.
+    """
+    parts = []
+    words = {}
+    elapsed = 0.0
+    position = 0
+    for result in sorted(results, key=lambda r: r.index):
+        parts.append(text[position:result.start])
+        if result.checked is None:
+            parts.append(text[result.start:result.end])
+        else:
+            parts.append(result.checked.checked)
+            words.update(result.checked.words)
+            elapsed = max(elapsed, result.checked.time)
+        position = result.end
+    parts.append(text[position:])
+    return Checked(
+        result=all(r.checked is not None for r in results),
+        original=text,
+        checked="".join(parts),
+        errors=len(words),
+        words=words,
+        time=elapsed,
+    )
@@ -0,0 +1,294 @@
+"""두 Streamlit 앱의 상호작용별 실행 시간을 재는 헤드리스 벤치마크입니다.
+
+Streamlit의 AppTest(streamlit.testing.v1)로 브라우저 없이 앱을 실행하고, 실제 사용 흐름을
+순서대로 눌러 보며 흐름마다 걸린 시간, 스크립트 실행 횟수, 최대 메모리(tracemalloc)를 기록합니다.
+Gemini API는 fake_gemini_server.py의 대역 서버로 바꾸므로 네트워크 없이 실행됩니다. 교정 펜의 맞춤법 검사기는
+--spell-checker로 고르고 SPELL_CHECKER 환경 변수로 앱에 넘깁니다. 기본값 hanspell은 앱의 기본 검사기로,
+이 파일 안의 py-hanspell 대역을 씁니다. local은 SPELL_CHECKER=local로 켜는 로컬 규칙 검사기(grammar_checker)입니다.
+결과는 JSON으로 저장해 두었다가 다른 리비전의 결과와 비교할 수 있습니다.
+
+사용법:
+    python benchmarks/app_rerun_benchmark.py --output before.json
+    python benchmarks/app_rerun_benchmark.py --output after.json --compare before.json
+    python benchmarks/app_rerun_benchmark.py --flow quiz_wrong_retry --repeat 5
+    python benchmarks/app_rerun_benchmark.py --flow correction_pen --spell-checker local
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+from collections import namedtuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+os.environ.setdefault("STREAMLIT_LOGGER_LEVEL", "error")
+
+import streamlit as st  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+import gemini_client  # noqa: E402
+from fake_gemini_server import FakeGeminiServer  # noqa: E402
+
+MAIN_APP = os.path.join(ROOT, "streamlit_app.py")
+EXPERT_APP = os.path.join(ROOT, "streamlit_grammar_expert.py")
+FAKE_API_KEY = "AIzaBenchmarkStubKey000000000000000000"
+
+# --- hanspell 대역 ---
+
+Checked = namedtuple("Checked", ["result", "original", "checked", "errors", "words", "time"])
+
+# (틀린 어절, 고친 어절, 오류 유형)
+HANSPELL_STUB_CORRECTIONS = (
+    ("학생예요.", "학생이에요.", "맞춤법"),
+    ("안되.", "안 돼.", "맞춤법"),
+    ("됬어요.", "됐어요.", "맞춤법"),
+    ("어떻해", "어떡해", "맞춤법"),
+    ("맛있데.", "맛있대.", "맞춤법"),
+    ("안먹었어요.", "안 먹었어요.", "띄어쓰기"),
+)
+
+
+def hanspell_stub_check(text):
+    """py_hanspell.spell_checker.check와 같은 모양의 결과를 돌려주는 대역."""
+    started = time.perf_counter()
+    corrections = {wrong: (error_type, right) for wrong, right, error_type in HANSPELL_STUB_CORRECTIONS}
+    words = {}
+    checked_words = []
+    for word in text.split():
+        if word in corrections:
+            words[word] = corrections[word]
+            checked_words.append(corrections[word][1])
+        else:
+            checked_words.append(word)
+    return Checked(True, text, " ".join(checked_words), len(words), words, time.perf_counter() - started)
+
+
+def install_hanspell_stub():
+    """py_hanspell 모듈을 대역으로 바꿔 끼웁니다."""
+    package = types.ModuleType("py_hanspell")
+    spell_checker = types.ModuleType("py_hanspell.spell_checker")
+    spell_checker.check = hanspell_stub_check
+    package.spell_checker = spell_checker
+    sys.modules["py_hanspell"] = package
+    sys.modules["py_hanspell.spell_checker"] = spell_checker
+
+
+# --- Gemini 대역 서버 ---
+
+def start_gemini_stub():
+    """Gemini 대역 서버를 띄우고 gemini_client가 그 서버를 보도록 바꿉니다."""
+    server = FakeGeminiServer({"gemini-1.5-flash": {"chunks": ["정답입니다! 🎉"]}}).start()
+    gemini_client.GEMINI_API_BASE = server.base_url
+    return server
+
+
+# --- 스크립트 실행 횟수 ---
+
+class RunCounter:
+    """st.title 호출 수로 스크립트 실행 횟수를 셉니다. 두 앱 모두 실행마다 st.title을 한 번 부릅니다."""
+
+    def __init__(self):
+        self.runs = 0
+        self._title = st.title
+
+        def counted_title(*args, **kwargs):
+            self.runs += 1
+            return self._title(*args, **kwargs)
+        st.title = counted_title
+
+
+# --- 사용 흐름 ---
+
+def _button(at, label=None, key_prefix=None):
+    for button in at.button:
+        if label is not None and button.label == label:
+            return button
+        if key_prefix is not None and button.key and button.key.startswith(key_prefix):
+            return button
+    raise LookupError(f"버튼을 찾지 못했어요: {label or key_prefix}")
+
+
+def _check(at):
+    if at.exception:
+        raise RuntimeError(f"앱에서 예외가 발생했어요: {[e.value for e in at.exception]}")
+    return at
+
+
+def flow_quiz_wrong_retry(at):
+    """새 퀴즈 → 오답 제출 → 이어서 풀기 → 오답노트에서 틀린 문제 다시 풀기."""
+    yield "new_quiz", lambda: _button(at, "🎲 새로운 퀴즈 풀기!").click().run()
+    question = at.session_state["current_question"]
+    radio = at.radio[0]
+    wrong = next(option for option in radio.options if option != question["정답"])
+    radio.set_value(wrong)
+    yield "submit_wrong", lambda: _button(at, "정답 제출").click().run()
+    yield "continue", lambda: _button(at, "이어서 문제 풀기").click().run()
+    yield "retry_incorrect", lambda: _button(at, "🔄 틀린 문제 다시 풀기").click().run()
+
+
+def flow_levelup_submit(at):
+    """레벨업 퀴즈 다섯 문제에 모두 답하고 제출."""
+    for i, question in enumerate(at.session_state["levelup_quiz"]):
+        at.radio(key=f"levelup_radio_{i}").set_value(question["정답"])
+    yield "submit", lambda: _button(at, "모두 풀었어요! 정답 제출하기").click().run()
+
+
+def flow_chatbot_turn(at):
+    """문법 유형 선택(타자 효과로 문제 표시) → 오답 → 정답(다음 문제 타자 효과)."""
+    yield "choose_type", lambda: _button(at, "데/대").click().run()
+    question = at.session_state["current_quiz_question"]
+    buttons = [b for b in at.button if b.key and b.key.startswith("answer_btn")]
+    wrong = next(b for b in buttons if b.label not in (question["정답"], "모르겠어요"))
+    yield "answer_wrong", lambda: wrong.click().run()
+    yield "answer_correct", lambda: next(
+        b for b in at.button if b.key and b.key.startswith("answer_btn") and b.label == question["정답"]
+    ).click().run()
+
+
+def flow_correction_pen(at):
+    """마법의 교정 펜에 문장을 넣고 검사."""
+    at.text_area[0].set_value("저는 학생예요. 그러면 안되. 밥을 안먹었어요.")
+    yield "check", lambda: _button(at, "맞춤법 검사하기").click().run()
+
+
+FLOWS = {
+    "quiz_wrong_retry": (MAIN_APP, flow_quiz_wrong_retry),
+    "levelup_submit": (MAIN_APP, flow_levelup_submit),
+    "chatbot_turn": (MAIN_APP, flow_chatbot_turn),
+    "correction_pen": (EXPERT_APP, flow_correction_pen),
+}
+
+
+def run_flow(name, counter, trace_memory=False):
+    """흐름을 한 번 실행하고 단계별 시간과 실행 횟수를 반환합니다.
+
+    trace_memory가 True이면 tracemalloc으로 최대 메모리도 잽니다. 추적 중에는 실행이 몇 배 느려지므로
+    시간은 추적하지 않는 실행에서만 씁니다.
+    """
+    app_path, flow = FLOWS[name]
+    at = AppTest.from_file(app_path, default_timeout=120)
+    if trace_memory:
+        tracemalloc.start()
+    counter.runs = 0
+    started = time.perf_counter()
+    _check(at.run())
+    steps = [{"step": "load", "seconds": time.perf_counter() - started, "script_runs": counter.runs}]
+
+    for step_name, action in flow(at):
+        runs_before = counter.runs
+        step_started = time.perf_counter()
+        _check(action())
+        steps.append({
+            "step": step_name,
+            "seconds": time.perf_counter() - step_started,
+            "script_runs": counter.runs - runs_before,
+        })
+    result = {"wall_seconds": time.perf_counter() - started, "script_runs": counter.runs, "steps": steps}
+    if trace_memory:
+        result["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result
+
+
+def measure_flow(name, counter, repeat):
+    """흐름을 repeat번 실행한 시간의 중앙값과, 따로 한 번 실행해 잰 최대 메모리를 반환합니다."""
+    samples = [run_flow(name, counter) for _ in range(repeat)]
+    steps = []
+    for i, step in enumerate(samples[0]["steps"]):
+        steps.append({
+            "step": step["step"],
+            "seconds": statistics.median(s["steps"][i]["seconds"] for s in samples),
+            "script_runs": step["script_runs"],
+        })
+    return {
+        "repeat": repeat,
+        "wall_seconds": statistics.median(s["wall_seconds"] for s in samples),
+        "script_runs": samples[0]["script_runs"],
+        "peak_bytes": run_flow(name, counter, trace_memory=True)["peak_bytes"],
+        "steps": steps,
+    }
+
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(report, baseline=None):
+    """결과 표를 출력합니다. baseline이 있으면 변화율도 함께 출력합니다."""
+    for name, flow in report["flows"].items():
+        line = (f"{name:<18} {flow['wall_seconds'] * 1000:8.1f} ms  실행 {flow['script_runs']:3d}회  "
+                f"최대 메모리 {flow['peak_bytes'] / 1024 / 1024:6.1f} MiB")
+        old = (baseline or {}).get("flows", {}).get(name)
+        if old:
+            change = (flow["wall_seconds"] - old["wall_seconds"]) / old["wall_seconds"] * 100
+            line += f"  (기준 대비 {change:+.1f}%, 실행 {old['script_runs']}→{flow['script_runs']}회)"
+        print(line)
+        for step in flow["steps"]:
+            print(f"    {step['step']:<16} {step['seconds'] * 1000:8.1f} ms  실행 {step['script_runs']}회")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streamlit 앱 상호작용 벤치마크")
+    parser.add_argument("--flow", action="append", choices=sorted(FLOWS), help="실행할 흐름 (기본: 전부)")
+    parser.add_argument("--repeat", type=int, default=3, help="흐름마다 반복 횟수 (중앙값 사용)")
+    parser.add_argument("--output", help="결과를 저장할 JSON 파일")
+    parser.add_argument("--compare", help="비교할 이전 결과 JSON 파일")
+    parser.add_argument("--spell-checker", choices=("hanspell", "local"), default="hanspell",
+                        help="교정 펜의 맞춤법 검사기 (hanspell은 이 파일 안의 대역, 기본: hanspell)")
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    # 앱의 기본값에 기대지 않고 어떤 검사기를 재는지 명시
+    os.environ["SPELL_CHECKER"] = args.spell_checker
+    if args.spell_checker == "hanspell":
+        install_hanspell_stub()
+    server = start_gemini_stub()
+    # 모델 목록과 응답 캐시가 실제 캐시 파일을 건드리지 않도록 임시 폴더를 사용
+    cache_dir = tempfile.mkdtemp(prefix="app_rerun_benchmark_")
+    os.environ["GEMINI_RESPONSE_CACHE"] = "0"
+    os.environ["GEMINI_MODEL_CACHE_PATH"] = os.path.join(cache_dir, "gemini_models.json")
+    os.environ.setdefault("GOOGLE_API_KEY", FAKE_API_KEY)
+    counter = RunCounter()
+    try:
+        names = args.flow or list(FLOWS)
+        # 첫 실행의 모듈 import와 캐시 준비 시간이 결과에 섞이지 않도록 앱마다 한 번씩 먼저 실행
+        for app_path in dict.fromkeys(FLOWS[name][0] for name in names):
+            _check(AppTest.from_file(app_path, default_timeout=120).run())
+        flows = {name: measure_flow(name, counter, args.repeat) for name in names}
+    finally:
+        server.stop()
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    report = {
+        "revision": _git_revision(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "streamlit": st.__version__,
+        "spell_checker": args.spell_checker,
+        "flows": flows,
+    }
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""오류 유형 매처(error_matcher.rank_categories)의 정확도와 처리량을 재는 벤치마크입니다.
+
+퀴즈 코퍼스의 오답 문장과 정답 문장을 어절 단위로 맞대어 달라진 (틀린 어절, 고친 어절, 오류 유형)과,
+한 어절에 여러 유형의 표지가 함께 있는 어절(TRICKY_WORDS)을 라벨 붙은 어절 목록으로 씁니다.
+TRICKY_WORDS는 매처를 만든 사람이 고른 어절이라 정확도는 두 목록을 따로 출력합니다.
+기존 analyze_error_precisely()처럼 정해진 순서로 `in` 검사를 이어 가다 처음 맞는 유형을 고르는 방식과,
+모든 유형을 찾고 순위를 매기는 매처를 비교해 1순위 유형이 라벨과 맞는 비율과 초당 어절 수를 출력합니다.
+
+사용법:
+    python benchmarks/error_matcher_benchmark.py
+    python benchmarks/error_matcher_benchmark.py --repeat 5000 --verbose
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from error_matcher import rank_categories  # noqa: E402
+from grammar_checker import AN_ANH, DE_DAE, DOE_DWAE, EOTTEOKAE, EYO_YEYO  # noqa: E402
+from quiz_bank import DEFAULT_BANK_PATH, QuizBank  # noqa: E402
+
+# 여러 유형의 표지가 함께 있어 검사 순서에 따라 유형이 달라지는 어절
+TRICKY_WORDS = [
+    ("안되요", "안돼요", DOE_DWAE),
+    ("안되", "안돼", DOE_DWAE),
+    ("않돼", "안돼", AN_ANH),
+    ("그렇데", "그렇대", DE_DAE),
+    ("대학생예요", "대학생이에요", EYO_YEYO),
+    ("대표예요", "대표예요", EYO_YEYO),
+    ("어떡해요", "어떻게요", EOTTEOKAE),
+    ("됄까", "될까", DOE_DWAE),
+    ("돼지예요", "돼지예요", EYO_YEYO),
+    ("되대요", "된대요", DOE_DWAE),
+    ("안됬대", "안됐대", DOE_DWAE),
+    ("재미있데요", "재미있대요", DE_DAE),
+    ("아니예요", "아니에요", EYO_YEYO),
+    ("안니", "않니", AN_ANH),
+    ("하지도안고", "하지도않고", AN_ANH),
+    ("어떻해", "어떡해", EOTTEOKAE),
+]
+
+
+def load_words():
+    """퀴즈 코퍼스에서 뽑은 (틀린 어절, 고친 어절, 오류 유형) 리스트를 반환합니다."""
+    bank = QuizBank(DEFAULT_BANK_PATH)
+    words = []
+    for question_id in bank.ids():
+        item = bank.get(question_id)
+        correct = item["정답"].split()
+        for wrong in item.get("오답들") or ():
+            wrong = wrong.split()
+            if len(wrong) != len(correct):
+                continue
+            for wrong_word, correct_word in zip(wrong, correct):
+                if wrong_word != correct_word:
+                    words.append((wrong_word.strip(".,!?"), correct_word.strip(".,!?"), item["오류 유형"]))
+    return words
+
+
+def legacy_category(original_word, corrected_word):
+    """기존 analyze_error_precisely()의 분기 순서대로 처음 맞는 유형."""
+    if '대' in original_word or '데' in original_word:
+        return DE_DAE
+    if '예요' in original_word or '이에요' in original_word:
+        return EYO_YEYO
+    if '어떡해' in original_word or '어떻게' in original_word:
+        return EOTTEOKAE
+    if '돼' in original_word or '되' in original_word:
+        return DOE_DWAE
+    if '안' in original_word or '않' in original_word:
+        return AN_ANH
+    return None
+
+
+def matcher_category(original_word, corrected_word):
+    ranked = rank_categories(original_word, corrected_word)
+    return ranked[0] if ranked else None
+
+
+def accuracy(classify, words, verbose=False):
+    correct = 0
+    for original_word, corrected_word, label in words:
+        category = classify(original_word, corrected_word)
+        if category == label:
+            correct += 1
+        elif verbose:
+            print(f"  틀림 [{label}] {original_word} → {corrected_word}: {category}")
+    return correct
+
+
+def throughput(classify, words, repeat):
+    """초당 분류한 어절 수."""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for original_word, corrected_word, _ in words:
+            classify(original_word, corrected_word)
+    return len(words) * repeat / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="오류 유형 매처 벤치마크")
+    parser.add_argument("--repeat", type=int, default=2000, help="처리량을 잴 때 어절 목록을 반복하는 횟수")
+    parser.add_argument("--verbose", action="store_true", help="라벨과 다르게 분류한 어절을 출력")
+    args = parser.parse_args()
+
+    corpus_words = load_words()
+    print(f"라벨 붙은 어절: 코퍼스 {len(corpus_words)}개, 직접 고른 어절 {len(TRICKY_WORDS)}개 (처리량은 각 목록에서 잰 값)")
+    print(f"{'방식':<16} {'코퍼스':>10} {'처리량':>14} {'직접 고른 어절':>10} {'처리량':>14}")
+    for name, classify in (("순서대로 in 검사", legacy_category), ("다중 패턴 매처", matcher_category)):
+        if args.verbose:
+            print(f"{name}:")
+        line = f"{name:<16}"
+        for words in (corpus_words, TRICKY_WORDS):
+            correct = accuracy(classify, words, args.verbose)
+            rate = throughput(classify, words, args.repeat)
+            line += f" {correct:>5}/{len(words):<4} {rate:>10,.0f} 어절/초"
+        print(line)
+
+if __name__ == "__main__":
+    main()
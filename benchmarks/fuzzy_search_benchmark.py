@@ -0,0 +1,100 @@
+"""자모 편집 거리 퍼지 검색(rule_index.FuzzyIndex)의 검색 시간과 재현율을 재는 벤치마크입니다.
+
+앱 규칙에 나온 한글 낱말에 무작위 음절로 만든 낱말을 더해 --words 개의 낱말을 색인합니다.
+검색어는 색인한 낱말의 자모를 1~2개 바꾸거나 빼거나 넣어 만든 '철자를 틀린 말'이고,
+원래 낱말이 결과에 들어 있으면 찾은 것으로 셉니다. 모든 낱말과 편집 거리를 계산하는 선형 탐색과
+결과가 같은지 확인하고 검색 1회 평균 시간을 비교합니다.
+
+사용법:
+    python benchmarks/fuzzy_search_benchmark.py
+    python benchmarks/fuzzy_search_benchmark.py --words 1000,10000 --queries 500
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from rule_index import MAX_DISTANCE, FuzzyIndex, RuleIndex, edit_distance, to_jamo  # noqa: E402
+from rule_index_benchmark import load_rules_db  # noqa: E402
+
+JAMO = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ"
+
+
+def build_words(size, seed=0):
+    """앱 규칙의 낱말에 2~5음절짜리 무작위 낱말을 더해 size개를 만듭니다."""
+    rng = random.Random(seed)
+    words = dict.fromkeys(RuleIndex(load_rules_db()).word_rules)
+    while len(words) < size:
+        words[''.join(chr(0xAC00 + rng.randrange(11172)) for _ in range(rng.randint(2, 5)))] = None
+    return list(words)[:size]
+
+
+def misspell(word, rng):
+    """자모를 1~2개 바꾸거나 빼거나 넣은 (틀린 말, 원래 낱말)."""
+    jamo = list(to_jamo(word))
+    for _ in range(rng.randint(1, MAX_DISTANCE)):
+        position = rng.randrange(len(jamo))
+        edit = rng.choice(("replace", "delete", "insert"))
+        if edit == "replace":
+            jamo[position] = rng.choice(JAMO)
+        elif edit == "delete" and len(jamo) > 1:
+            del jamo[position]
+        else:
+            jamo.insert(position, rng.choice(JAMO))
+    return "".join(jamo), word
+
+
+def linear_search(words, query, max_distance):
+    """모든 낱말과 편집 거리를 계산하는 기준 구현."""
+    query = to_jamo(query)
+    return sorted((distance, word) for word in words
+                  if (distance := edit_distance(query, to_jamo(word), max_distance)) <= max_distance)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="자모 퍼지 검색 벤치마크")
+    parser.add_argument("--words", default="1000,5000,20000", help="색인할 낱말 수 목록 (쉼표로 구분)")
+    parser.add_argument("--queries", type=int, default=300, help="철자를 틀린 검색어 수")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'낱말 수':>8} {'색인 생성':>10} {'재현율':>7} {'선형 탐색':>11} {'색인 검색':>11} {'p99':>9}")
+    for size in (int(value) for value in args.words.split(",")):
+        rng = random.Random(args.seed)
+        words = build_words(size, args.seed)
+        queries = [misspell(rng.choice(words), rng) for _ in range(args.queries)]
+
+        started = time.perf_counter()
+        index = FuzzyIndex(words)
+        build_time = time.perf_counter() - started
+
+        timings = []
+        found = 0
+        for query, word in queries:
+            started = time.perf_counter()
+            results = index.search(query)
+            timings.append(time.perf_counter() - started)
+            found += any(result == word for _, result in results)
+        # 선형 탐색은 느리므로 앞쪽 검색어 일부로만 결과 비교와 시간 측정을 함
+        sample = queries[:50]
+        started = time.perf_counter()
+        expected = [linear_search(words, query, MAX_DISTANCE) for query, _ in sample]
+        linear = (time.perf_counter() - started) / len(sample)
+        for (query, _), results in zip(sample, expected):
+            if results != index.search(query):
+                raise SystemExit(f"결과가 다릅니다: {query!r}")
+
+        timings.sort()
+        average = sum(timings) / len(timings)
+        p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+        print(f"{len(index):>8} {build_time * 1000:>8.0f}ms {found / len(queries):>7.1%} "
+              f"{linear * 1000:>9.2f}ms {average * 1000:>9.3f}ms {p99 * 1000:>7.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""로컬 규칙 검사기(grammar_checker)의 처리량과 정확도를 재는 벤치마크입니다.
+
+퀴즈 코퍼스의 정답 문장과 오답 문장을 검사 대상으로 씁니다.
+정확도는 오답 문장을 정답 문장으로 고친 비율(재현율)과 정답 문장을 건드리지 않은 비율(오탐 없음)로 보고,
+처리량은 같은 문장들을 여러 번 검사해 초당 문장 수로 출력합니다.
+코퍼스에 없는 예문(EXTRA_CASES, EXTRA_CORRECT)으로 잰 정확도와 오탐도 따로 출력합니다. 이 예문은 규칙을
+만든 사람이 규칙과 함께 쓴 것이라 실제 학생 글에서의 정확도를 보여 주지는 않고, 규칙을 고칠 때 이미 고쳐진
+오탐('집에요', '바지 안은', '쌀 한 되')이 되살아나지 않는지 확인하는 회귀 검사 용도입니다.
+
+사용법:
+    python benchmarks/grammar_checker_benchmark.py
+    python benchmarks/grammar_checker_benchmark.py --repeat 500 --verbose
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from grammar_checker import check  # noqa: E402
+from quiz_bank import DEFAULT_BANK_PATH, QuizBank  # noqa: E402
+
+# 퀴즈 코퍼스에 없는 (오류 유형, 틀린 문장, 정답 문장). 규칙을 만든 사람이 쓴 예문입니다.
+EXTRA_CASES = [
+    ("에요/예요", "제 동생은 초등학생예요.", "제 동생은 초등학생이에요."),
+    ("에요/예요", "이건 제 연필이예요.", "이건 제 연필이에요."),
+    ("에요/예요", "그건 제 잘못이 아니예요.", "그건 제 잘못이 아니에요."),
+    ("에요/예요", "저 사람은 우리 이모에요.", "저 사람은 우리 이모예요."),
+    ("되/돼", "이제 집에 가도 되요?", "이제 집에 가도 돼요?"),
+    ("되/돼", "이제 놀아도 되.", "이제 놀아도 돼."),
+    ("되/돼", "어제 반장이 됬어요.", "어제 반장이 됐어요."),
+    ("되/돼", "나중에 의사가 돼고 싶어요.", "나중에 의사가 되고 싶어요."),
+    ("안/않", "밥을 먹지 안았어요.", "밥을 먹지 않았어요."),
+    ("안/않", "오늘은 숙제가 많지 안다.", "오늘은 숙제가 많지 않다."),
+    ("안/않", "나는 그 영화를 않 봤어.", "나는 그 영화를 안 봤어."),
+    ("어떡해/어떻게", "숙제를 잃어버렸어. 어떻게!", "숙제를 잃어버렸어. 어떡해!"),
+    ("어떡해/어떻게", "이 문제는 어떡해 풀어요?", "이 문제는 어떻게 풀어요?"),
+    ("어떡해/어떻게", "우산이 없어. 어떻해!", "우산이 없어. 어떡해!"),
+    ("데/대", "친구가 그러는데 내일 비가 온데.", "친구가 그러는데 내일 비가 온대."),
+    ("데/대", "뉴스에서 봤는데 내일 춥데.", "뉴스에서 봤는데 내일 춥대."),
+    ("데/대", "동생 말로는 선생님이 화나셨데.", "동생 말로는 선생님이 화나셨대."),
+]
+
+# 퀴즈 코퍼스에 없는, 고칠 것이 없는 문장 (오탐 확인용). 뒤쪽은 실제로 잘못 고쳤던 문장
+EXTRA_CORRECT = [
+    "고양이가 참 귀엽데.",
+    "아이가 노래를 잘하데.",
+    "어제 가 보니 그 식당 음식이 맛있데.",
+    "친구가 내일 온대.",
+    "저는 선생님이에요.",
+    "이것은 우리 집 강아지예요.",
+    "그건 아니에요.",
+    "이제 가도 돼요.",
+    "커서 과학자가 되고 싶어요.",
+    "벌써 여름이 됐어요.",
+    "나는 오늘 안 갈래.",
+    "아직 숙제를 안 했어요.",
+    "어떻게 하면 좋을까?",
+    "이 일을 어떡해!",
+    "어떻게 지냈어?",
+    "되도록 빨리 와.",
+    "학교에 가는데 비가 왔어요.",
+    "안경을 쓰니까 잘 보여요.",
+    "집에요.",
+    "학교에요.",
+    "바지 안은 따뜻해.",
+    "쌀 한 되.",
+]
+
+
+def load_cases():
+    """(오류 유형, 틀린 문장, 정답 문장) 리스트를 반환합니다."""
+    bank = QuizBank(DEFAULT_BANK_PATH)
+    cases = []
+    for question_id in bank.ids():
+        item = bank.get(question_id)
+        for wrong in item.get("오답들") or ():
+            cases.append((item["오류 유형"], wrong, item["정답"]))
+    return cases
+
+
+def accuracy(cases, verbose=False, correct_only=()):
+    """오류 유형별 (고친 수, 오답 수, 오탐 수)를 dict로 반환합니다.
+
+    correct_only의 문장은 오탐만 세어 '고칠 것 없음' 유형으로 더합니다.
+    """
+    by_type = {}
+    for error_type, wrong, correct in cases:
+        fixed, total, false_positives = by_type.get(error_type, (0, 0, 0))
+        result = check(wrong)
+        if result.checked == correct:
+            fixed += 1
+        elif verbose:
+            print(f"  놓침 [{error_type}] {wrong} → {result.checked}")
+        if check(correct).errors:
+            false_positives += 1
+            if verbose:
+                print(f"  오탐 [{error_type}] {correct} → {check(correct).checked}")
+        by_type[error_type] = (fixed, total + 1, false_positives)
+    for sentence in correct_only:
+        fixed, total, false_positives = by_type.get("고칠 것 없음", (0, 0, 0))
+        if check(sentence).errors:
+            false_positives += 1
+            if verbose:
+                print(f"  오탐 {sentence} → {check(sentence).checked}")
+        by_type["고칠 것 없음"] = (fixed, total, false_positives)
+    return by_type
+
+
+def print_accuracy(title, by_type):
+    print(title)
+    print(f"{'오류 유형':<12} {'고침':>8} {'오탐':>6}")
+    for error_type, (fixed, total, false_positives) in sorted(by_type.items()):
+        print(f"{error_type:<12} {fixed:>3}/{total:<4} {false_positives:>6}")
+    fixed = sum(v[0] for v in by_type.values())
+    total = sum(v[1] for v in by_type.values())
+    false_positives = sum(v[2] for v in by_type.values())
+    print(f"{'전체':<12} {fixed:>3}/{total:<4} {false_positives:>6}")
+
+
+def throughput(sentences, repeat):
+    """sentences를 repeat번 검사한 초당 문장 수."""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for sentence in sentences:
+            check(sentence)
+    elapsed = time.perf_counter() - started
+    return len(sentences) * repeat / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="로컬 규칙 검사기 벤치마크")
+    parser.add_argument("--repeat", type=int, default=200, help="처리량을 잴 때 문장 묶음을 반복하는 횟수")
+    parser.add_argument("--verbose", action="store_true", help="놓친 문장과 오탐을 출력")
+    args = parser.parse_args()
+
+    cases = load_cases()
+    known = {sentence for _, wrong, correct in cases for sentence in (wrong, correct)}
+    overlap = known.intersection(sentence for case in EXTRA_CASES for sentence in case[1:])
+    overlap |= known.intersection(EXTRA_CORRECT)
+    if overlap:
+        raise SystemExit(f"코퍼스 밖 예문에 퀴즈 코퍼스 문장이 섞여 있습니다: {sorted(overlap)}")
+
+    print_accuracy("퀴즈 코퍼스 (규칙을 만들 때 본 문장)", accuracy(cases, args.verbose))
+    print()
+    print_accuracy(f"코퍼스 밖 예문, 규칙 작성자가 씀 (오답 {len(EXTRA_CASES)}개 + 고칠 것 없는 문장 {len(EXTRA_CORRECT)}개)",
+                   accuracy(EXTRA_CASES, args.verbose, EXTRA_CORRECT))
+    print()
+
+    sentences = [sentence for _, wrong, correct in cases for sentence in (wrong, correct)]
+    print(f"처리량: {throughput(sentences, args.repeat):,.0f} 문장/초 ({len(sentences)}문장 × {args.repeat}회)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""공용 HTTP 세션(연결 풀)과 매번 새로 연결하는 requests 호출을 비교하는 벤치마크입니다.
+
+로컬에 keep-alive를 지원하는 대역 서버를 띄우고, 같은 요청을 두 방식으로 보내
+서버가 받아들인 연결 수(= TCP/TLS 핸드셰이크 수)와 걸린 시간을 출력합니다.
+
+사용법:
+    python benchmarks/http_pool_benchmark.py --requests 200 --threads 8
+    python benchmarks/http_pool_benchmark.py --tls      # openssl로 임시 인증서를 만들어 HTTPS로 측정
+"""
+import argparse
+import json
+import os
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+import urllib3
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from gemini_client import create_http_session  # noqa: E402
+
+RESPONSE_BODY = json.dumps({"candidates": [{"content": {"parts": [{"text": "정답입니다! 🎉"}]}}]}).encode("utf-8")
+
+
+class CountingHandler(BaseHTTPRequestHandler):
+    """generateContent 응답을 흉내 내고 새 연결 수를 세는 핸들러."""
+
+    protocol_version = "HTTP/1.1"
+    # 헤더와 본문을 나눠 보낼 때 지연 ACK로 40ms씩 멈추지 않도록 Nagle 알고리즘을 끔
+    disable_nagle_algorithm = True
+    connections = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        with CountingHandler.lock:
+            CountingHandler.connections += 1
+        super().setup()
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(RESPONSE_BODY)))
+        self.end_headers()
+        self.wfile.write(RESPONSE_BODY)
+
+
+def make_self_signed_cert(directory):
+    """openssl로 localhost용 임시 자체 서명 인증서를 만듭니다."""
+    cert_path = os.path.join(directory, "cert.pem")
+    key_path = os.path.join(directory, "key.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-subj", "/CN=localhost", "-keyout", key_path, "-out", cert_path],
+        check=True, capture_output=True,
+    )
+    return cert_path, key_path
+
+
+def start_server(tls_dir=None):
+    """대역 서버를 백그라운드 스레드에서 시작하고 (서버, 기본 URL)을 반환합니다."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), CountingHandler)
+    scheme = "http"
+    if tls_dir:
+        cert_path, key_path = make_self_signed_cert(tls_dir)
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(cert_path, key_path)
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+        scheme = "https"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"{scheme}://127.0.0.1:{server.server_port}/v1beta/models/gemini-pro:generateContent"
+
+
+def run(label, post, url, total, threads):
+    """요청을 total번 보내고 결과 한 줄을 출력합니다."""
+    CountingHandler.connections = 0
+    payload = {"contents": [{"parts": [{"text": "안녕"}]}]}
+
+    def one(_):
+        response = post(url, json=payload, timeout=10, verify=False)
+        response.raise_for_status()
+        return response.json()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(one, range(total)))
+    elapsed = time.perf_counter() - started
+    print(f"{label:<8} 요청 {total}개: {elapsed * 1000:8.1f} ms "
+          f"(요청당 {elapsed / total * 1000:6.2f} ms), 새 연결 {CountingHandler.connections}개")
+    return {"label": label, "seconds": elapsed, "connections": CountingHandler.connections}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP 연결 풀 벤치마크")
+    parser.add_argument("--requests", type=int, default=200, help="방식별 요청 수")
+    parser.add_argument("--threads", type=int, default=1, help="동시에 요청을 보내는 스레드 수")
+    parser.add_argument("--tls", action="store_true", help="HTTPS 대역 서버로 측정 (openssl 필요)")
+    args = parser.parse_args()
+
+    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+    with tempfile.TemporaryDirectory() as tls_dir:
+        server, url = start_server(tls_dir if args.tls else None)
+        try:
+            run("bare", requests.post, url, args.requests, args.threads)
+            session = create_http_session(pool_maxsize=max(args.threads, 1))
+            run("pooled", session.post, url, args.requests, args.threads)
+        finally:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,420 @@
+"""여러 학생이 동시에 접속한 상황을 흉내 내는 streamlit_app.py 부하 테스트 도구입니다.
+
+로컬에 Gemini 대역 서버(fake_gemini_server.py)와 Streamlit 서버를 띄우고, 브라우저 대신
+웹소켓 세션 N개를 동시에 열어 퀴즈와 챗봇 흐름을 정해진 순서대로 누릅니다.
+버튼을 누른 뒤 서버가 스크립트 실행을 끝낼 때까지를 상호작용 하나의 지연 시간으로 보고,
+동시 세션 수를 늘려 가며 지연 시간의 p50/p95/p99와 서버 프로세스의 CPU 사용률, 최대 RSS를 출력합니다.
+CPU와 RSS는 /proc에서 읽으므로 리눅스에서만 측정됩니다.
+
+사용법:
+    python benchmarks/load_test.py --sessions 1,10,30,100
+    python benchmarks/load_test.py --sessions 30 --flow chatbot --rounds 5 --think-time 0.5
+    python benchmarks/load_test.py --sessions 50 --gemini-latency 1.5 --output load.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from collections import Counter
+
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fake_gemini_server import FakeGeminiServer  # noqa: E402
+
+MAIN_APP = os.path.join(ROOT, "streamlit_app.py")
+FAKE_API_KEY = "AIzaLoadTestKey"
+FINISHED = (ForwardMsg.FINISHED_SUCCESSFULLY, ForwardMsg.FINISHED_FRAGMENT_RUN_SUCCESSFULLY)
+
+
+class InteractionError(Exception):
+    """세션이 누를 위젯을 찾지 못했거나 스크립트가 예외를 냈을 때 발생합니다."""
+
+
+# --- 웹소켓 세션 ---
+
+class StreamlitSession:
+    """브라우저 탭 하나를 흉내 내는 Streamlit 웹소켓 클라이언트.
+
+    서버가 보낸 델타로 화면의 위젯을 추적하고, 위젯 값과 버튼 클릭을 BackMsg로 보냅니다.
+    프런트엔드처럼 프래그먼트 안의 버튼을 누르면 그 프래그먼트만 다시 실행하도록 요청합니다.
+    """
+
+    def __init__(self, url, timeout=60):
+        self.url = url
+        self.timeout = timeout
+        self.elements = {}        # delta 경로 -> (Element, fragment_id, 표시된 실행 번호)
+        self.widget_values = {}   # 위젯 id -> WidgetState (버튼 클릭 제외)
+        self.exceptions = []
+        self._run = 0
+        self._ws = None
+
+    async def __aenter__(self):
+        self._ws = await websockets.connect(self.url, subprotocols=["streamlit"], max_size=None,
+                                            open_timeout=self.timeout)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self._ws.close()
+
+    async def rerun(self, trigger=None, fragment_id=""):
+        """스크립트 실행을 요청하고 실행이 끝날 때까지 기다립니다. 걸린 시간(초)을 반환합니다."""
+        msg = BackMsg()
+        client_state = msg.rerun_script
+        client_state.fragment_id = fragment_id
+        client_state.widget_states.widgets.extend(self.widget_values.values())
+        if trigger is not None:
+            client_state.widget_states.widgets.append(WidgetState(id=trigger, trigger_value=True))
+        started = time.perf_counter()
+        await self._ws.send(msg.SerializeToString())
+        await asyncio.wait_for(self._receive_until_finished(fragment_id), self.timeout)
+        return time.perf_counter() - started
+
+    async def _receive_until_finished(self, fragment_id):
+        self._run += 1
+        exceptions_before = len(self.exceptions)
+        while True:
+            msg = ForwardMsg()
+            msg.ParseFromString(await self._ws.recv())
+            kind = msg.WhichOneof("type")
+            if kind == "delta":
+                self._apply_delta(msg)
+            elif kind == "script_finished":
+                if msg.script_finished in FINISHED:
+                    self._drop_stale(fragment_id)
+                    break
+                if msg.script_finished == ForwardMsg.FINISHED_WITH_COMPILE_ERROR:
+                    raise InteractionError("스크립트 컴파일 오류")
+                # FINISHED_EARLY_FOR_RERUN: st.rerun()으로 이어지는 다음 실행까지 기다림
+                self._run += 1
+        if len(self.exceptions) > exceptions_before:
+            raise InteractionError(self.exceptions[-1])
+
+    def _apply_delta(self, msg):
+        delta = msg.delta
+        if delta.WhichOneof("type") != "new_element":
+            return
+        element = delta.new_element
+        if element.WhichOneof("type") == "exception":
+            self.exceptions.append(f"{element.exception.type}: {element.exception.message}")
+        path = tuple(msg.metadata.delta_path)
+        self.elements[path] = (element, delta.fragment_id, self._run)
+
+    def _drop_stale(self, fragment_id):
+        """이번 실행에서 다시 그려지지 않은 위젯을 지웁니다. 프래그먼트 실행이면 그 프래그먼트 안에서만."""
+        for path, (element, element_fragment, run) in list(self.elements.items()):
+            if run != self._run and (not fragment_id or element_fragment == fragment_id):
+                del self.elements[path]
+                widget = getattr(element, element.WhichOneof("type") or "", None)
+                self.widget_values.pop(getattr(widget, "id", None), None)
+
+    def widgets(self, kind):
+        """화면에 있는 kind 위젯(button, radio ...)을 (위젯, fragment_id) 리스트로 반환합니다."""
+        found = []
+        for element, fragment_id, _ in self.elements.values():
+            if element.WhichOneof("type") == kind:
+                found.append((getattr(element, kind), fragment_id))
+        return found
+
+    def find_button(self, label=None, key_prefix=None):
+        """라벨이나 key 앞부분이 맞는 버튼을 찾습니다. 없으면 None."""
+        for button, fragment_id in self.widgets("button"):
+            if label is not None and button.label == label:
+                return button, fragment_id
+            if key_prefix is not None and f"-{key_prefix}" in button.id:
+                return button, fragment_id
+        return None
+
+    async def click(self, label=None, key_prefix=None):
+        found = self.find_button(label, key_prefix)
+        if found is None:
+            raise InteractionError(f"버튼을 찾지 못함: {label or key_prefix}")
+        button, fragment_id = found
+        return await self.rerun(trigger=button.id, fragment_id=fragment_id)
+
+    def set_radio(self, radio, option):
+        """라디오 선택지를 고릅니다. 프런트엔드처럼 선택지 문자열을 보냅니다."""
+        self.widget_values[radio.id] = WidgetState(id=radio.id, string_value=option)
+
+
+# --- 사용 흐름 ---
+# 흐름은 (단계 이름, 실행 함수) 쌍을 내놓는 비동기 제너레이터입니다. 실행 함수는 걸린 시간(초)을 반환합니다.
+
+async def flow_quiz(session, rng, rounds):
+    """새 퀴즈 → 선택지 하나 고르고 제출 → 다음/이어서 문제 풀기를 rounds번 반복."""
+    yield "quiz_new", lambda: session.click("🎲 새로운 퀴즈 풀기!")
+    for _ in range(rounds):
+        radios = [radio for radio, _ in session.widgets("radio") if radio.label == "선택지:"]
+        if not radios:
+            raise InteractionError("퀴즈 선택지를 찾지 못함")
+        session.set_radio(radios[0], rng.choice(radios[0].options))
+        yield "quiz_submit", lambda: session.click("정답 제출")
+        label = "다음 문제 풀기" if session.find_button("다음 문제 풀기") else "이어서 문제 풀기"
+        yield "quiz_next", lambda: session.click(label)
+
+
+async def flow_chatbot(session, rng, rounds):
+    """문법 유형을 고른 뒤 답 버튼 셋 중 하나를 rounds번 누름 (정답이면 다음 문제가 타자 효과로 나옴)."""
+    yield "chat_choose_type", lambda: session.click(rng.choice(["데/대", "되/돼", "안/않"]))
+    for _ in range(rounds):
+        answers = [button for button, _ in session.widgets("button") if "-answer_btn_" in button.id]
+        if not answers:
+            raise InteractionError("챗봇 답 버튼을 찾지 못함")
+        answer_key = answers[rng.randrange(len(answers))].id.split("-", 2)[2]
+        yield "chat_answer", lambda: session.click(key_prefix=answer_key)
+
+
+FLOWS = {
+    "quiz": flow_quiz,
+    "chatbot": flow_chatbot,
+}
+
+
+async def run_session(url, flows, rounds, think_time, seed, samples, errors):
+    """세션 하나를 열어 flows를 차례로 실행하고 (단계 이름, 지연 시간)을 samples에 모읍니다.
+
+    상호작용이 실패하면 그 세션은 멈추고 실패 이유를 errors에 남깁니다.
+    """
+    rng = random.Random(seed)
+    try:
+        async with StreamlitSession(url) as session:
+            samples.append(("load", await session.rerun()))
+            for name in flows:
+                async for step, action in FLOWS[name](session, rng, rounds):
+                    if think_time:
+                        await asyncio.sleep(rng.uniform(0.5, 1.5) * think_time)
+                    try:
+                        samples.append((step, await action()))
+                    except (InteractionError, asyncio.TimeoutError) as e:
+                        errors.append(f"{step}: {e or '시간 초과'}")
+                        return
+    except (OSError, websockets.WebSocketException, asyncio.TimeoutError, InteractionError) as e:
+        errors.append(f"load: {e or '시간 초과'}")
+
+
+# --- 서버 프로세스 자원 측정 ---
+
+class ProcessSampler:
+    """서버 프로세스의 CPU 사용률과 RSS를 /proc에서 주기적으로 읽습니다."""
+
+    def __init__(self, pid, interval=0.2):
+        self.pid = pid
+        self.interval = interval
+        self.cpu_percent = []
+        self.rss_bytes = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._ticks = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+    def _cpu_seconds(self):
+        with open(f"/proc/{self.pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / self._ticks   # utime + stime
+
+    def _rss(self):
+        with open(f"/proc/{self.pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+        return 0
+
+    def _loop(self):
+        try:
+            last_cpu, last_time = self._cpu_seconds(), time.monotonic()
+            while not self._stop.wait(self.interval):
+                cpu, now = self._cpu_seconds(), time.monotonic()
+                self.cpu_percent.append((cpu - last_cpu) / (now - last_time) * 100)
+                self.rss_bytes.append(self._rss())
+                last_cpu, last_time = cpu, now
+        except OSError:
+            pass   # /proc가 없는 환경이거나 서버가 끝남
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def summary(self):
+        if not self.cpu_percent:
+            return {"cpu_avg_percent": None, "cpu_max_percent": None, "rss_max_bytes": None}
+        return {
+            "cpu_avg_percent": statistics.fmean(self.cpu_percent),
+            "cpu_max_percent": max(self.cpu_percent),
+            "rss_max_bytes": max(self.rss_bytes),
+        }
+
+
+# --- 실행 ---
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_streamlit(port, env):
+    """streamlit_app.py를 헤드리스로 띄우고 health 엔드포인트가 응답할 때까지 기다립니다."""
+    process = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", MAIN_APP, "--server.headless", "true",
+         "--server.port", str(port), "--server.address", "127.0.0.1",
+         "--browser.gatherUsageStats", "false", "--server.fileWatcherType", "none",
+         "--logger.level", "error"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Streamlit 서버가 시작하지 못했습니다:\n{process.stderr.read().decode()}")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1):
+                return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("Streamlit 서버가 60초 안에 응답하지 않았습니다")
+
+
+def percentile(sorted_values, p):
+    """정렬된 값의 p 백분위수 (선형 보간)."""
+    if not sorted_values:
+        return None
+    rank = (len(sorted_values) - 1) * p / 100
+    low = int(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+def latency_stats(values):
+    ordered = sorted(values)
+    return {
+        "count": len(ordered),
+        "p50": percentile(ordered, 50),
+        "p95": percentile(ordered, 95),
+        "p99": percentile(ordered, 99),
+        "max": ordered[-1] if ordered else None,
+    }
+
+
+async def run_step(url, sessions, flows, rounds, think_time, ramp, seed):
+    samples = []
+    errors = []
+
+    async def start(i):
+        # 모든 세션이 같은 순간에 접속하지 않도록 ramp초에 걸쳐 나눠서 접속
+        await asyncio.sleep(ramp * i / max(sessions, 1))
+        await run_session(url, flows, rounds, think_time, seed + i, samples, errors)
+
+    await asyncio.gather(*(start(i) for i in range(sessions)))
+    return samples, errors
+
+
+def measure(url, pid, sessions, flows, rounds, think_time, ramp, seed):
+    """동시 세션 sessions개로 한 단계를 실행하고 지연 시간과 자원 사용량을 반환합니다."""
+    started = time.perf_counter()
+    with ProcessSampler(pid) as sampler:
+        samples, errors = asyncio.run(run_step(url, sessions, flows, rounds, think_time, ramp, seed))
+    steps = {}
+    for step, seconds in samples:
+        steps.setdefault(step, []).append(seconds)
+    return {
+        "sessions": sessions,
+        "wall_seconds": time.perf_counter() - started,
+        "interactions": len(samples),
+        "errors": len(errors),
+        "error_reasons": dict(Counter(errors).most_common()),
+        "latency": latency_stats(seconds for _, seconds in samples),
+        "steps": {step: latency_stats(values) for step, values in steps.items()},
+        **sampler.summary(),
+    }
+
+
+def _ms(seconds):
+    return "     -" if seconds is None else f"{seconds * 1000:6.0f}"
+
+
+def print_report(results):
+    print(f"{'세션':>5} {'상호작용':>8} {'오류':>5} {'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7} {'최대 ms':>7} "
+          f"{'CPU 평균':>8} {'CPU 최대':>8} {'RSS MiB':>8}")
+    for result in results:
+        latency = result["latency"]
+        cpu_avg = "-" if result["cpu_avg_percent"] is None else f"{result['cpu_avg_percent']:.0f}%"
+        cpu_max = "-" if result["cpu_max_percent"] is None else f"{result['cpu_max_percent']:.0f}%"
+        rss = "-" if result["rss_max_bytes"] is None else f"{result['rss_max_bytes'] / 1024 / 1024:.0f}"
+        print(f"{result['sessions']:>5} {result['interactions']:>8} {result['errors']:>5} "
+              f"{_ms(latency['p50']):>7} {_ms(latency['p95']):>7} {_ms(latency['p99']):>7} {_ms(latency['max']):>7} "
+              f"{cpu_avg:>8} {cpu_max:>8} {rss:>8}")
+        for step, stats in result["steps"].items():
+            print(f"      {step:<18} {stats['count']:>5}회  p50 {_ms(stats['p50'])}  p95 {_ms(stats['p95'])}  "
+                  f"p99 {_ms(stats['p99'])} ms")
+        for reason, count in result["error_reasons"].items():
+            print(f"      오류 {count}회: {reason}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="streamlit_app.py 동시 접속 부하 테스트")
+    parser.add_argument("--sessions", default="1,10,30", help="단계별 동시 세션 수 (쉼표로 구분)")
+    parser.add_argument("--flow", action="append", choices=sorted(FLOWS), help="세션이 실행할 흐름 (기본: 전부)")
+    parser.add_argument("--rounds", type=int, default=3, help="흐름마다 문제를 푸는 횟수")
+    parser.add_argument("--think-time", type=float, default=1.0, help="상호작용 사이 평균 대기 시간(초)")
+    parser.add_argument("--ramp", type=float, default=2.0, help="세션 접속을 나눠 시작하는 시간(초)")
+    parser.add_argument("--gemini-latency", type=float, default=0.3, help="Gemini 대역 서버의 응답 지연(초)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="결과를 저장할 JSON 파일")
+    args = parser.parse_args()
+
+    flows = args.flow or list(FLOWS)
+    steps = [int(n) for n in args.sessions.split(",")]
+    gemini = FakeGeminiServer({
+        name: {"latency": args.gemini_latency} for name in ("gemini-pro", "gemini-1.5-flash", "gemini-1.5-pro")
+    }).start()
+    cache_dir = tempfile.mkdtemp(prefix="load_test_")
+    env = dict(os.environ, GEMINI_API_BASE=gemini.base_url, GOOGLE_API_KEY=FAKE_API_KEY,
+               GEMINI_MODEL_CACHE_PATH=os.path.join(cache_dir, "gemini_models.json"),
+               GEMINI_RESPONSE_CACHE="0")
+    port = _free_port()
+    server = start_streamlit(port, env)
+    url = f"ws://127.0.0.1:{port}/_stcore/stream"
+    results = []
+    try:
+        # 첫 세션의 import와 코퍼스 로딩 시간이 첫 단계에 섞이지 않도록 한 번 미리 접속
+        asyncio.run(run_step(url, 1, [], 0, 0, 0, args.seed))
+        for sessions in steps:
+            result = measure(url, server.pid, sessions, flows, args.rounds, args.think_time, args.ramp, args.seed)
+            results.append(result)
+            print_report([result])
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+        gemini.stop()
+
+    print()
+    print_report(results)
+    if args.output:
+        report = {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "flows": flows, "rounds": args.rounds, "think_time": args.think_time,
+            "gemini_latency": args.gemini_latency, "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
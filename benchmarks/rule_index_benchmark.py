@@ -0,0 +1,139 @@
+"""규칙 검색(get_detailed_grammar_explanation)의 n-gram 역색인과 기존 선형 탐색을 비교하는 벤치마크입니다.
+
+앱의 GRAMMAR_RULES_DB(streamlit_grammar_expert.py에서 앱을 실행하지 않고 읽어 옴)에 퀴즈 코퍼스 문장으로 만든
+규칙을 더해 --rules 개까지 늘린 규칙 DB를 씁니다. 검색어는 규칙 검색 상자에 한 글자씩 입력하는 것처럼
+코퍼스 어절의 모든 앞부분과, 어디에도 없는 단어를 섞어 만듭니다.
+두 방식의 결과 집합이 같은지 먼저 확인하고, 검색 1회 평균 시간과 색인을 만드는 시간을 출력합니다.
+
+사용법:
+    python benchmarks/rule_index_benchmark.py
+    python benchmarks/rule_index_benchmark.py --rules 100,1000,5000 --repeat 5
+"""
+import argparse
+import ast
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from quiz_bank import DEFAULT_BANK_PATH, QuizBank  # noqa: E402
+from rule_index import RuleIndex  # noqa: E402
+
+APP_PATH = os.path.join(ROOT, "streamlit_grammar_expert.py")
+
+
+def load_rules_db():
+    """앱 파일에서 GRAMMAR_RULES_DB 리터럴만 읽어 옵니다."""
+    with open(APP_PATH, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(getattr(t, "id", None) == "GRAMMAR_RULES_DB" for t in node.targets):
+            return ast.literal_eval(node.value)
+    raise RuntimeError("GRAMMAR_RULES_DB를 찾지 못했습니다")
+
+
+def linear_search(rules_db, word_or_phrase):
+    """색인을 쓰기 전의 get_detailed_grammar_explanation (모든 규칙을 훑는 방식)."""
+    search_term = word_or_phrase.lower().strip()
+    explanations = []
+    for category, rules in rules_db.items():
+        for rule in rules.get("규칙", []):
+            if (search_term in rule.get("틀린예", "").lower() or
+                    search_term in rule.get("맞는예", "").lower() or
+                    search_term in rule.get("원칙", "").lower()):
+                explanations.append({
+                    "카테고리": category,
+                    "원칙": rule.get("원칙", ""),
+                    "설명": rule.get("설명", ""),
+                    "틀린예": rule.get("틀린예", ""),
+                    "맞는예": rule.get("맞는예", "")
+                })
+    return explanations
+
+
+def corpus_sentences():
+    """(오류 유형, 틀린 문장, 정답 문장) 리스트."""
+    bank = QuizBank(DEFAULT_BANK_PATH)
+    sentences = []
+    for question_id in bank.ids():
+        item = bank.get(question_id)
+        for wrong in item.get("오답들") or ():
+            sentences.append((item["오류 유형"], wrong, item["정답"]))
+    return sentences
+
+
+def build_rules_db(size, seed=0):
+    """앱의 규칙에 코퍼스 문장을 섞어 만든 규칙을 더해 규칙이 size개인 DB를 만듭니다."""
+    rng = random.Random(seed)
+    rules_db = {category: {"규칙": list(rules["규칙"])} for category, rules in load_rules_db().items()}
+    sentences = corpus_sentences()
+    words = sorted({word for _, wrong, correct in sentences for word in (wrong + " " + correct).split()})
+    count = sum(len(rules["규칙"]) for rules in rules_db.values())
+    while count < size:
+        error_type, wrong, correct = rng.choice(sentences)
+        filler = " ".join(rng.sample(words, 3))
+        rules_db.setdefault(f"{error_type.replace('/', '_')}_구분", {"규칙": []})["규칙"].append({
+            "원칙": f"{error_type} 구분 {count}: {rng.choice(words)}",
+            "설명": f"{error_type} 예문 {count}",
+            "틀린예": f"{wrong} / {filler}",
+            "맞는예": f"{correct} / {filler}",
+        })
+        count += 1
+    return rules_db
+
+
+def build_queries(rules_db):
+    """규칙 검색 상자에 한 글자씩 입력하는 검색어들 (앞부분 전체)과 없는 단어."""
+    words = ["이에요", "예요", "돼", "되", "어떡해", "어떻게", "안", "않", "데", "대"]
+    words += sorted({word.strip(".,?!()'/") for rules in rules_db.values() for rule in rules["규칙"]
+                     for word in rule["틀린예"].split()})[:200]
+    words += ["없는단어", "xyz", "받침없음규칙"]
+    return [word[:i] for word in words if word for i in range(1, len(word) + 1)]
+
+
+def per_query(search, queries, repeat):
+    """검색 1회 평균 시간(초)."""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for query in queries:
+            search(query)
+    return (time.perf_counter() - started) / (len(queries) * repeat)
+
+
+def key(result):
+    return (result["카테고리"], result["원칙"], result["틀린예"], result["맞는예"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="규칙 검색 색인 벤치마크")
+    parser.add_argument("--rules", default="15,500,5000", help="규칙 수 목록 (쉼표로 구분, 15는 지금 앱의 규칙 수)")
+    parser.add_argument("--repeat", type=int, default=3, help="검색어 묶음을 반복하는 횟수")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'규칙 수':>8} {'검색어':>6} {'색인 생성':>10} {'선형 탐색':>12} {'색인 검색':>12} {'배율':>7}")
+    for size in (int(value) for value in args.rules.split(",")):
+        rules_db = build_rules_db(size, args.seed)
+        queries = build_queries(rules_db)
+
+        started = time.perf_counter()
+        index = RuleIndex(rules_db)
+        build_time = time.perf_counter() - started
+
+        for query in queries:
+            expected = sorted(map(key, linear_search(rules_db, query)))
+            actual = sorted(map(key, index.search(query)))
+            if expected != actual:
+                raise SystemExit(f"결과가 다릅니다: {query!r} (선형 {len(expected)}개, 색인 {len(actual)}개)")
+
+        linear = per_query(lambda q: linear_search(rules_db, q), queries, args.repeat)
+        indexed = per_query(index.search, queries, args.repeat)
+        print(f"{len(index):>8} {len(queries):>6} {build_time * 1000:>8.1f}ms "
+              f"{linear * 1e6:>10.1f}µs {indexed * 1e6:>10.1f}µs {linear / indexed:>6.1f}×")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""바이트 단위 SSE 파서와 기존 iter_lines 루프를 비교하는 마이크로벤치마크입니다.
+
+녹화해 둔 Gemini 스트리밍 응답 본문(alt=sse)을 메모리에 올린 requests.Response로 감싸고,
+두 방식이 같은 텍스트 청크를 내는지 확인한 뒤 응답 하나를 처리하는 데 걸린 시간을 출력합니다.
+녹화 파일이 없으면 실제 응답 모양을 본뜬 스트림을 만들어 씁니다.
+
+사용법:
+    python benchmarks/sse_parser_benchmark.py
+    python benchmarks/sse_parser_benchmark.py --stream recorded.sse --repeat 2000
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from gemini_client import _extract_text, _iter_sse_text  # noqa: E402
+
+SAMPLE_TEXT = (
+    "좋은 질문이에요! '돼'는 '되어'의 준말이라서 '되어'로 바꿔 말이 되면 '돼'를 써요. "
+    "예를 들어 '안 돼요'는 '안 되어요'로 바꿀 수 있으니 맞는 표현이에요. 😊\n"
+)
+
+
+def record_stream(chunks=40, keep_alive_every=0):
+    """Gemini 스트리밍 응답과 같은 모양의 SSE 본문을 만듭니다."""
+    body = bytearray()
+    for i in range(chunks):
+        if keep_alive_every and i % keep_alive_every == 0:
+            body += b": keep-alive\r\n\r\n"
+        event = {
+            "candidates": [{
+                "content": {"parts": [{"text": SAMPLE_TEXT}], "role": "model"},
+                "finishReason": "STOP" if i == chunks - 1 else None,
+                "index": 0,
+                "safetyRatings": [
+                    {"category": "HARM_CATEGORY_HARASSMENT", "probability": "NEGLIGIBLE"},
+                    {"category": "HARM_CATEGORY_HATE_SPEECH", "probability": "NEGLIGIBLE"},
+                ],
+            }],
+            "usageMetadata": {"promptTokenCount": 512, "candidatesTokenCount": 24 * (i + 1), "totalTokenCount": 512 + 24 * (i + 1)},
+            "modelVersion": "gemini-1.5-flash",
+        }
+        body += b"data: " + json.dumps(event, ensure_ascii=False).encode("utf-8") + b"\r\n\r\n"
+    return bytes(body)
+
+
+def make_response(body):
+    """녹화된 본문을 네트워크에서 읽는 것처럼 흘려보내는 requests.Response를 만듭니다."""
+    response = requests.models.Response()
+    response.status_code = 200
+    response.raw = io.BytesIO(body)
+    return response
+
+
+def legacy_iter_sse_text(response):
+    """바꾸기 전 gemini_client의 iter_lines 루프."""
+    for chunk in response.iter_lines():
+        if chunk:
+            decoded_chunk = chunk.decode('utf-8')
+            if decoded_chunk.startswith('data: '):
+                try:
+                    text = _extract_text(json.loads(decoded_chunk[6:]))
+                except json.JSONDecodeError:
+                    continue
+                if text is not None:
+                    yield text
+
+
+def measure(label, iterate, body, repeat):
+    """본문을 repeat번 처리하고 결과 한 줄을 출력합니다."""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for _ in iterate(make_response(body)):
+            pass
+    elapsed = time.perf_counter() - started
+    per_stream = elapsed / repeat
+    print(f"  {label:<10} 응답당 {per_stream * 1e6:8.1f} µs  ({len(body) / per_stream / 1e6:7.1f} MB/s)")
+    return per_stream
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SSE 파서 마이크로벤치마크")
+    parser.add_argument("--stream", action="append", default=[], help="녹화된 SSE 응답 본문 파일 (여러 번 지정 가능)")
+    parser.add_argument("--chunks", type=int, default=40, help="녹화 파일이 없을 때 만들 이벤트 수")
+    parser.add_argument("--repeat", type=int, default=500, help="스트림마다 반복 횟수")
+    args = parser.parse_args()
+
+    streams = []
+    for path in args.stream:
+        with open(path, "rb") as f:
+            streams.append((os.path.basename(path), f.read()))
+    if not streams:
+        streams = [
+            ("생성한 스트림", record_stream(args.chunks)),
+            ("keep-alive 포함", record_stream(args.chunks, keep_alive_every=4)),
+        ]
+
+    for name, body in streams:
+        legacy = list(legacy_iter_sse_text(make_response(body)))
+        current = list(_iter_sse_text(make_response(body)))
+        status = "일치" if legacy == current else f"다름 (기존 {len(legacy)}개, 새 파서 {len(current)}개)"
+        print(f"{name}: {len(body):,} bytes, 텍스트 청크 {len(current)}개, 결과 {status}")
+        before = measure("iter_lines", legacy_iter_sse_text, body, args.repeat)
+        after = measure("bytes", _iter_sse_text, body, args.repeat)
+        print(f"  -> {before / after:.2f}배")
+
+
+if __name__ == "__main__":
+    main()
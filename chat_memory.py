@@ -0,0 +1,63 @@
+"""챗봇 대화 기록의 크기를 제한하고 오래된 대화를 요약 기록으로 압축합니다.
+
+세션마다 대화 기록이 끝없이 늘어나지 않도록 최근 메시지만 남기고,
+그보다 오래된 메시지는 문제 ID와 답변 결과만 담은 요약 기록으로 합칩니다.
+"""
+import os
+
+from session_scope import estimate_size
+
+DEFAULT_MAX_MESSAGES = 60
+
+# 답변 결과 값
+OUTCOME_CORRECT = "correct"
+OUTCOME_WRONG = "wrong"
+OUTCOME_DONT_KNOW = "dont_know"
+
+
+def get_max_messages():
+    """환경 변수 CHAT_MAX_MESSAGES가 있으면 그 값을, 없으면 기본 최대 메시지 수를 반환합니다."""
+    return int(os.getenv("CHAT_MAX_MESSAGES", str(DEFAULT_MAX_MESSAGES)))
+
+
+def new_summary():
+    """빈 요약 기록을 만듭니다. questions는 문제 ID -> 답변 결과 리스트입니다."""
+    return {"compacted_messages": 0, "questions": {}}
+
+
+def compact_messages(messages, summary, max_messages):
+    """메시지가 max_messages개를 넘으면 오래된 것부터 summary에 합치고 남길 메시지 리스트를 반환합니다.
+
+    현재 풀고 있는 문제를 알아야 선택지를 보여 줄 수 있으므로 마지막 문제 메시지부터는 압축하지 않습니다.
+    """
+    excess = len(messages) - max_messages
+    if excess <= 0:
+        return messages
+    for last_question_index in range(len(messages) - 1, -1, -1):
+        if messages[last_question_index].get("question_data"):
+            excess = min(excess, last_question_index)
+            break
+    if excess <= 0:
+        return messages
+
+    questions = summary["questions"]
+    for message in messages[:excess]:
+        question_data = message.get("question_data")
+        if question_data:
+            questions.setdefault(question_data["ID"], [])
+        outcome = message.get("outcome")
+        if outcome:
+            questions.setdefault(message["question_id"], []).append(outcome)
+    summary["compacted_messages"] += excess
+    return messages[excess:]
+
+
+def chat_footprint(messages, summary):
+    """세션의 대화 기록이 차지하는 메모리를 dict로 반환합니다."""
+    seen = set()
+    return {
+        "messages": len(messages),
+        "compacted_messages": summary["compacted_messages"],
+        "summary_questions": len(summary["questions"]),
+        "bytes": estimate_size(messages, seen) + estimate_size(summary, seen),
+    }
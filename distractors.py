@@ -0,0 +1,89 @@
+"""챗봇 선택지에 쓰는 '틀린 문장'(오답 선택지)을 문제마다 한 번만 만듭니다.
+
+문제의 [데/대] 같은 빈칸 표시에 맞는 치환 규칙으로 정답의 빈칸 자리만 바꿔 만들고, 규칙으로 만들 수 없으면
+문제 데이터의 오답 중 정답과 다른 것을, 그것도 없으면 빈칸과 상관없는 일반 치환을 씁니다.
+규칙은 모듈을 불러올 때 한 번만 컴파일합니다.
+"""
+import re
+
+
+def _swap(old, new, unless=None):
+    """정답의 old를 모두 new로 바꾸는 규칙. unless가 정답에 있으면 적용하지 않습니다."""
+    pattern = re.compile(re.escape(old))
+
+    def rule(answer, problem):
+        if unless is not None and unless in answer:
+            return None
+        if pattern.search(answer) is None:
+            return None
+        return pattern.sub(new, answer)
+    return rule
+
+
+_PAIR = {'데': '대', '대': '데'}
+_BLANK_DE_DAE = re.compile(r'\[(?:데/대|대/데)\]')
+_DE_DAE = re.compile('[데대]')
+_LAST_DE_DAE = re.compile('[데대](?=[^데대]*$)')
+
+
+def _swap_de_dae_at_blank(answer, problem):
+    """문제의 빈칸 바로 앞 글자들을 정답에서 찾아, 그 뒤에 처음 나오는 '데'나 '대'만 바꿉니다."""
+    blank = _BLANK_DE_DAE.search(problem)
+    if blank is None:
+        return None
+    before_blank = problem[:blank.start()].strip()
+    start = answer.find(before_blank)
+    if start == -1:
+        return None
+    match = _DE_DAE.search(answer, start + len(before_blank))
+    if match is None:
+        return None
+    return answer[:match.start()] + _PAIR[match.group()] + answer[match.end():]
+
+
+def _swap_last_de_dae(answer, problem):
+    """정답에서 마지막으로 나오는 '데'나 '대'만 바꿉니다."""
+    match = _LAST_DE_DAE.search(answer)
+    if match is None:
+        return None
+    return answer[:match.start()] + _PAIR[match.group()] + answer[match.end():]
+
+
+# (문제의 빈칸 표시, 순서대로 시도할 치환 규칙)
+DISTRACTOR_RULES = (
+    (re.compile(r'\[(?:이에요/예요|예요/이에요)\]'), (_swap('이에요', '예요'), _swap('예요', '이에요'))),
+    (_BLANK_DE_DAE, (_swap_de_dae_at_blank, _swap_last_de_dae)),
+    (re.compile(r'\[(?:어떡해/어떻게|어떻게/어떡해)\]'), (_swap('어떻게', '어떡해'), _swap('어떡해', '어떻게'))),
+    (re.compile(r'\[(?:되/돼|돼/되|될/됄|됄/될)\]'),
+     (_swap('되', '돼', unless='돼'), _swap('돼', '되'), _swap('될', '됄'), _swap('됄', '될'))),
+    (re.compile(r'\[(?:안/않|않/안)\]'), (_swap('안', '않', unless='않'), _swap('않', '안'))),
+)
+
+# 빈칸 표시로 규칙을 고르지 못했을 때 차례로 시도하는 치환
+FALLBACK_RULES = (
+    _swap('예요', '에요'), _swap('에요', '예요'), _swap('이에요', '예요'), _swap('예요', '이에요'),
+    _swap('되', '돼'), _swap('돼', '되'), _swap('어떻게', '어떡해'), _swap('어떡해', '어떻게'),
+    _swap('데', '대'), _swap('대', '데'), _swap('안', '않'), _swap('않', '안'),
+)
+
+
+def make_distractor(item):
+    """문제에 쓸 틀린 문장을 반환합니다. 정답과 다른 문장을 만들 수 없으면 None을 반환합니다."""
+    answer = item['정답']
+    problem = item['문제']
+    for blank, rules in DISTRACTOR_RULES:
+        if blank.search(problem):
+            for rule in rules:
+                candidate = rule(answer, problem)
+                if candidate and candidate != answer:
+                    return candidate
+            break
+
+    for wrong in item.get('오답들') or ():
+        if wrong and wrong != answer:
+            return wrong
+    for rule in FALLBACK_RULES:
+        candidate = rule(answer, problem)
+        if candidate and candidate != answer:
+            return candidate
+    return None
@@ -0,0 +1,96 @@
+"""틀린 어절이 5가지 핵심 규칙 중 어디에 해당하는지 모두 찾아 순위를 매기는 매처입니다.
+
+각 규칙의 표지('데', '예요', '어떡해', '돼', '안' ...)가 어절에 있는지 `in` 검사로 확인해 나오는 유형을
+모두 찾습니다. 한 어절에 여러 규칙의 표지가 있으면('안되' → 안/않, 되/돼) 틀린 어절과 고친 어절이 달라진
+부분에 걸친 표지를 가장 높게 쳐서 순위를 매기므로, 검사 순서가 아니라 실제로 고쳐진 글자가 규칙을 정합니다.
+유형이 하나뿐인 어절(대부분)은 `in` 검사만 하고 끝나며, 점수 계산은 여러 유형이 나올 때만 합니다.
+"""
+from grammar_checker import AN_ANH, DE_DAE, DOE_DWAE, EOTTEOKAE, EYO_YEYO
+
+# 오류 유형(퀴즈 코퍼스의 '오류 유형'과 같은 값) -> 표지. 점수가 같으면 이 순서를 따름
+CATEGORY_MARKERS = {
+    DE_DAE: ("데", "대"),
+    EYO_YEYO: ("이에요", "이예요", "예요", "에요"),
+    EOTTEOKAE: ("어떡해", "어떻게", "어떻해", "어떡게"),
+    DOE_DWAE: ("되", "돼", "됬", "됐", "됄", "됀"),
+    AN_ANH: ("안", "않"),
+}
+# 달라진 부분에 걸친 표지의 가중치 (그 밖의 표지는 1)
+CHANGED_WEIGHT = 10
+
+
+# 유형이 나왔는지만 볼 때 확인할 표지 (같은 유형의 더 짧은 표지를 품은 '이에요' 같은 표지는 뺌)
+_PRESENCE_MARKERS = tuple(
+    (category, tuple(m for m in markers if not any(o != m and o in m for o in markers)))
+    for category, markers in CATEGORY_MARKERS.items()
+)
+
+
+def _common_affixes(word, other):
+    """word와 other에 공통인 앞부분과 뒷부분의 길이 (prefix, suffix)."""
+    prefix = 0
+    limit = min(len(word), len(other))
+    while prefix < limit and word[prefix] == other[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and word[-1 - suffix] == other[-1 - suffix]:
+        suffix += 1
+    return prefix, suffix
+
+
+def _present_categories(text):
+    """text에 표지가 나오는 오류 유형 리스트 (CATEGORY_MARKERS 순서)."""
+    found = []
+    for category, markers in _PRESENCE_MARKERS:
+        for marker in markers:
+            if marker in text:
+                found.append(category)
+                break
+    return found
+
+
+def _marker_score(word, start, end, markers):
+    """word에 나온 markers의 길이 합. [start, end)에 걸친 표지는 CHANGED_WEIGHT배로 셉니다.
+
+    글자를 넣기만 한 경우(start == end)에는 넣은 자리에 닿은 표지를 달라진 것으로 봅니다.
+    start가 None이면 달라진 부분을 따지지 않습니다.
+    """
+    score = 0
+    for marker in markers:
+        count = word.count(marker)
+        if not count:
+            continue
+        size = len(marker)
+        if start is None:
+            changed = 0
+        elif start < end:
+            # 표지가 [start, end)에 걸치려면 양쪽으로 표지 길이 - 1만큼 넓힌 구간 안에 나와야 함
+            changed = word.count(marker, max(start - size + 1, 0), end + size - 1)
+        else:
+            changed = word.count(marker, max(start - size, 0), start + size)
+        score += size * (count + (CHANGED_WEIGHT - 1) * changed)
+    return score
+
+
+def rank_categories(original_word, corrected_word=""):
+    """표지가 나오는 오류 유형을 가능성이 높은 순으로 반환합니다. 표지가 하나도 없으면 빈 리스트.
+
+    대부분의 어절은 유형이 하나뿐이므로 C로 도는 `in` 검사로 유형만 찾고 바로 돌려줍니다.
+    여러 유형이 나올 때만 표지 길이의 합으로 점수를 매기고, 틀린 어절과 고친 어절이 달라진 부분에 걸친
+    표지는 CHANGED_WEIGHT배로 셉니다. 점수가 같으면 CATEGORY_MARKERS 순서를 따릅니다.
+    """
+    categories = _present_categories(original_word + " " + corrected_word)
+    if len(categories) <= 1:
+        return categories
+
+    if corrected_word:
+        prefix, suffix = _common_affixes(original_word, corrected_word)
+        spans = ((original_word, prefix, len(original_word) - suffix),
+                 (corrected_word, prefix, len(corrected_word) - suffix))
+    else:
+        spans = ((original_word, None, None),)
+    scores = {category: sum(_marker_score(word, start, end, CATEGORY_MARKERS[category]) for word, start, end in spans)
+              for category in categories}
+    # 정렬은 안정적이므로 점수가 같으면 CATEGORY_MARKERS 순서가 유지됨
+    categories.sort(key=scores.__getitem__, reverse=True)
+    return categories
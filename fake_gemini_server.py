@@ -0,0 +1,284 @@
+"""오프라인 테스트와 벤치마크용 Gemini API 대역 서버입니다.
+
+실제 API와 같은 경로를 흉내 냅니다.
+    GET  /{버전}/models
+    POST /{버전}/models/{모델}:streamGenerateContent?alt=sse
+    POST /{버전}/models/{모델}:generateContent
+
+모델마다 첫 응답까지의 지연, 스트리밍 조각 사이의 간격, 오류 응답(403/404/429/5xx),
+중간에 끊기는 스트림을 설정할 수 있어서 모델 대체(fallback)와 스트리밍 성능을 똑같이 재현할 수 있습니다.
+오류를 확률로 넣을 때도 시드를 고정한 난수를 쓰므로 실행할 때마다 같은 순서로 실패합니다.
+
+사용법:
+    python fake_gemini_server.py --port 8765 --config scenario.json
+    GEMINI_API_BASE=http://127.0.0.1:8765 streamlit run streamlit_app.py
+
+설정 파일 예:
+    {"models": {
+        "gemini-pro": {"status": 404},
+        "gemini-1.5-flash": {"latency": 0.3, "chunk_interval": 0.05, "chunks": ["안녕", "하세요"]},
+        "gemini-1.5-pro": {"status": 429, "retry_after": 2, "fail_first": 3}
+    }}
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass, field, fields
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+ERROR_STATUS = {
+    400: "INVALID_ARGUMENT",
+    403: "PERMISSION_DENIED",
+    404: "NOT_FOUND",
+    429: "RESOURCE_EXHAUSTED",
+    500: "INTERNAL",
+    503: "UNAVAILABLE",
+}
+
+
+@dataclass
+class ModelBehavior:
+    """대역 서버에서 모델 하나가 응답하는 방식."""
+
+    versions: tuple = ("v1beta", "v1")   # 모델 목록과 생성 요청을 받는 API 버전
+    methods: tuple = ("generateContent", "streamGenerateContent")
+    latency: float = 0.0                 # 응답 헤더를 보내기 전까지 기다리는 시간(초)
+    chunk_interval: float = 0.0          # 스트리밍 조각 사이의 간격(초)
+    chunks: tuple = ("안녕하세요! ", "대역 서버의 응답이에요.")
+    status: int = None                   # 이 상태 코드로 실패 (None이면 정상 응답)
+    fail_first: int = None               # status가 있을 때 처음 n번만 실패 (None이면 항상)
+    error_rate: float = 0.0              # status가 없을 때 500으로 실패할 확률
+    retry_after: float = None            # 429/503 응답에 붙일 Retry-After(초)
+    truncate_after: int = None           # 스트림을 이 조각 수만큼 보낸 뒤 반쯤 보낸 이벤트와 함께 끊음
+
+    @classmethod
+    def from_dict(cls, data):
+        """설정 dict(JSON)에서 만듭니다. 리스트 값은 튜플로 바꿉니다."""
+        names = {f.name for f in fields(cls)}
+        unknown = set(data) - names
+        if unknown:
+            raise ValueError(f"알 수 없는 모델 설정: {', '.join(sorted(unknown))}")
+        return cls(**{key: tuple(value) if isinstance(value, list) else value for key, value in data.items()})
+
+
+DEFAULT_MODELS = {
+    "gemini-pro": ModelBehavior(),
+    "gemini-1.5-flash": ModelBehavior(),
+    "gemini-1.5-pro": ModelBehavior(),
+}
+
+
+@dataclass
+class RequestRecord:
+    """대역 서버가 받은 요청 한 건."""
+
+    method: str
+    version: str
+    model: str
+    action: str
+    status: int
+    received_at: float = field(default_factory=time.monotonic)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # 헤더와 본문을 나눠 보낼 때 지연 ACK로 멈추지 않도록 Nagle 알고리즘을 끔
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def fake(self):
+        return self.server.fake
+
+    def do_GET(self):
+        parts = urlsplit(self.path).path.strip("/").split("/")
+        if len(parts) != 2 or parts[1] != "models":
+            return self._send_error(404, "", "", "")
+        version = parts[0]
+        if not self._check_key(version, "", "list"):
+            return
+        models = [
+            {"name": f"models/{name}", "supportedGenerationMethods": list(behavior.methods)}
+            for name, behavior in self.fake.models.items() if version in behavior.versions
+        ]
+        self.fake.record("GET", version, "", "list", 200)
+        self._send_json(200, {"models": models})
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        parts = urlsplit(self.path).path.strip("/").split("/")
+        if len(parts) != 3 or parts[1] != "models" or ":" not in parts[2]:
+            return self._send_error(404, "", "", "")
+        version = parts[0]
+        model, action = parts[2].split(":", 1)
+        if not self._check_key(version, model, action):
+            return
+        behavior = self.fake.models.get(model)
+        if behavior is None or version not in behavior.versions or action not in behavior.methods:
+            return self._send_error(404, version, model, action)
+
+        if behavior.latency:
+            time.sleep(behavior.latency)
+        status = self.fake.injected_status(model, behavior)
+        if status:
+            return self._send_error(status, version, model, action, behavior.retry_after)
+
+        self.fake.record("POST", version, model, action, 200)
+        if action == "streamGenerateContent":
+            self._send_stream(behavior)
+        else:
+            self._send_json(200, _response_body("".join(behavior.chunks), finished=True))
+
+    def _check_key(self, version, model, action):
+        """API 키를 정해 두었으면 요청의 key와 비교합니다."""
+        if self.fake.api_key is None:
+            return True
+        key = parse_qs(urlsplit(self.path).query).get("key", [""])[0]
+        if key == self.fake.api_key:
+            return True
+        self._send_error(403, version, model, action)
+        return False
+
+    def _send_json(self, status, body, headers=()):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_error(self, status, version, model, action, retry_after=None):
+        self.fake.record(self.command, version, model, action, status)
+        headers = []
+        if retry_after is not None:
+            headers.append(("Retry-After", str(retry_after)))
+        body = {"error": {"code": status, "message": f"대역 서버가 {status} 오류를 돌려줬어요", "status": ERROR_STATUS.get(status, "UNKNOWN")}}
+        self._send_json(status, body, headers)
+
+    def _write_chunk(self, data):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def _send_stream(self, behavior):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        last = len(behavior.chunks) - 1
+        for i, text in enumerate(behavior.chunks):
+            if i and behavior.chunk_interval:
+                time.sleep(behavior.chunk_interval)
+            event = b"data: " + json.dumps(_response_body(text, finished=i == last), ensure_ascii=False).encode("utf-8")
+            if behavior.truncate_after is not None and i >= behavior.truncate_after:
+                # 이벤트를 반만 보내고 마지막 청크 없이 연결을 끊음
+                self._write_chunk(event[:len(event) // 2])
+                self.close_connection = True
+                return
+            self._write_chunk(event + b"\r\n\r\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+
+def _response_body(text, finished):
+    candidate = {"content": {"parts": [{"text": text}], "role": "model"}, "index": 0}
+    if finished:
+        candidate["finishReason"] = "STOP"
+    return {"candidates": [candidate]}
+
+
+class FakeGeminiServer:
+    """백그라운드 스레드에서 도는 Gemini 대역 서버.
+
+    with 문으로 쓰면 빠져나올 때 서버를 멈춥니다. base_url을 GEMINI_API_BASE로 쓰면 됩니다.
+    """
+
+    def __init__(self, models=None, host="127.0.0.1", port=0, api_key=None, seed=0):
+        self.models = {
+            name: behavior if isinstance(behavior, ModelBehavior) else ModelBehavior.from_dict(behavior)
+            for name, behavior in (DEFAULT_MODELS if models is None else models).items()
+        }
+        self.api_key = api_key
+        self.requests = []
+        self._random = random.Random(seed)
+        self._failures = {}
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.fake = self
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake-gemini", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """현재 스레드에서 서버를 실행합니다 (명령줄 실행용)."""
+        try:
+            self._httpd.serve_forever()
+        finally:
+            self._httpd.server_close()
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def record(self, method, version, model, action, status):
+        with self._lock:
+            self.requests.append(RequestRecord(method, version, model, action, status))
+
+    def injected_status(self, model, behavior):
+        """이번 요청에 넣을 오류 상태 코드를 반환합니다. 정상 응답이면 None."""
+        with self._lock:
+            if behavior.status:
+                count = self._failures.get(model, 0)
+                if behavior.fail_first is None or count < behavior.fail_first:
+                    self._failures[model] = count + 1
+                    return behavior.status
+                return None
+            if behavior.error_rate and self._random.random() < behavior.error_rate:
+                return 500
+            return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gemini API 대역 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--config", help="모델별 동작을 적은 JSON 파일")
+    parser.add_argument("--api-key", help="이 키가 아닌 요청은 403으로 거절")
+    parser.add_argument("--seed", type=int, default=0, help="error_rate에 쓰는 난수 시드")
+    args = parser.parse_args()
+
+    models = None
+    if args.config:
+        with open(args.config, encoding="utf-8") as f:
+            models = json.load(f)["models"]
+    server = FakeGeminiServer(models, host=args.host, port=args.port, api_key=args.api_key, seed=args.seed)
+    print(f"Gemini 대역 서버 실행 중: {server.base_url} (모델 {', '.join(server.models)})")
+    print(f"앱 실행: GEMINI_API_BASE={server.base_url} streamlit run streamlit_app.py")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,946 @@
+"""Gemini API 호출에 필요한 공용 기능을 모아 둔 모듈입니다.
+
+모델 목록 조회 결과는 서버 프로세스 전체가 공유하는 ModelCatalog에 TTL과 함께 캐시하고,
+로컬 파일에도 저장해 서버를 다시 시작해도 바로 사용할 수 있게 합니다.
+모든 요청은 keep-alive 연결 풀을 가진 공용 HTTP 세션(get_http_session)으로 보냅니다.
+같은 요청에 대한 응답은 메모리·디스크 응답 캐시(get_response_cache)에서 다시 재생합니다.
+"""
+import hashlib
+import json
+import os
+import queue
+import threading
+import time
+import unicodedata
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+from sse_parser import iter_sse_text
+from tiered_cache import TieredCache
+
+# API 주소. 오프라인 테스트에서는 GEMINI_API_BASE로 대역 서버(fake_gemini_server.py)를 가리킬 수 있음
+GEMINI_API_BASE = os.getenv("GEMINI_API_BASE", "https://generativelanguage.googleapis.com").rstrip("/")
+
+# 모델 목록을 가져오지 못한 경우 사용할 기본 모델 (우선순위 순서)
+DEFAULT_MODELS = [
+    # v1beta API 우선 (더 안정적이고 널리 지원됨)
+    ("v1beta", "gemini-pro"),
+    ("v1beta", "gemini-1.5-flash"),
+    ("v1beta", "gemini-1.5-pro"),
+]
+
+# gemini-pro를 가장 먼저 시도하도록
+PRIORITY_ORDER = ["gemini-pro", "gemini-1.5-flash", "gemini-1.5-pro"]
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "gemini_models.json")
+DEFAULT_RESPONSE_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "gemini_responses.sqlite3")
+
+# 스트리밍 응답을 한 번에 읽는 최대 바이트 수 (chunked 응답은 조각이 도착하는 대로 바로 넘어옴)
+SSE_READ_SIZE = 4096
+
+
+_http_session = None
+_http_session_lock = threading.Lock()
+
+
+def create_http_session(pool_connections=None, pool_maxsize=None, pool_block=None, keep_alive=None):
+    """연결 풀을 쓰는 HTTP 세션을 만듭니다.
+
+    pool_connections는 호스트별 풀 개수, pool_maxsize는 호스트마다 유지할 연결 수입니다.
+    pool_block을 켜면 한 호스트에 동시에 여는 연결이 pool_maxsize를 넘지 않도록 기다립니다.
+    """
+    pool_connections = pool_connections or int(os.getenv("GEMINI_POOL_CONNECTIONS", "4"))
+    pool_maxsize = pool_maxsize or int(os.getenv("GEMINI_POOL_MAXSIZE", "16"))
+    if pool_block is None:
+        pool_block = os.getenv("GEMINI_POOL_BLOCK", "0") == "1"
+    if keep_alive is None:
+        keep_alive = os.getenv("GEMINI_KEEP_ALIVE", "1") == "1"
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=pool_block)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["Connection"] = "keep-alive" if keep_alive else "close"
+    return session
+
+
+def get_http_session():
+    """모든 세션과 스레드가 함께 쓰는 Gemini용 HTTP 세션을 반환합니다.
+
+    TCP/TLS 연결을 풀에 보관해 다음 요청에서 다시 쓰므로 매 요청마다 핸드셰이크를 하지 않습니다.
+    쿠키나 인증 상태를 세션에 저장하지 않으므로 여러 스레드에서 동시에 사용해도 안전합니다.
+    """
+    global _http_session
+    if _http_session is None:
+        with _http_session_lock:
+            if _http_session is None:
+                _http_session = create_http_session()
+    return _http_session
+
+
+def is_valid_api_key(api_key):
+    """API 키가 설정되어 있는지 확인합니다."""
+    return bool(api_key) and api_key != "여기에 실제 구글 API 키를 입력하세요"
+
+
+def get_probe_mode():
+    """엔드포인트 탐색 방식을 반환합니다. GEMINI_PROBE_MODE가 'parallel'이면 후보를 동시에 시도합니다."""
+    return os.getenv("GEMINI_PROBE_MODE", "sequential")
+
+
+def _list_models_for_version(api_key, api_version, timeout=10):
+    """한 API 버전의 모델 목록을 조회합니다. 실패하면 빈 리스트를 반환합니다."""
+    available_models = []
+    try:
+        list_url = f"{GEMINI_API_BASE}/{api_version}/models?key={api_key}"
+        response = get_http_session().get(list_url, timeout=timeout)
+        if response.status_code == 200:
+            data = response.json()
+            for model in data.get("models", []):
+                model_name = model.get("name", "")
+                supported_methods = model.get("supportedGenerationMethods", [])
+                # streamGenerateContent 또는 generateContent를 지원하는 모델 추가
+                if "streamGenerateContent" in supported_methods or "generateContent" in supported_methods:
+                    # 모델 이름에서 버전 추출 (예: "models/gemini-pro" -> "gemini-pro")
+                    if "/" in model_name:
+                        short_name = model_name.split("/")[-1]
+                        available_models.append((api_version, short_name))
+        # 403, 404 등 오류 시 빈 리스트를 반환해 다음 API 버전을 시도하게 함
+    except Exception:
+        pass
+    return available_models
+
+
+def list_models(api_key, probe_mode=None, deadline=10):
+    """모델 목록 API를 조회해 (api_version, model_name) 목록을 반환합니다. 실패하면 빈 리스트를 반환합니다.
+
+    병렬 모드에서는 모든 API 버전을 동시에 조회하고 가장 먼저 목록을 돌려준 버전을 사용합니다.
+    """
+    api_versions = ["v1beta", "v1"]
+    if (probe_mode or get_probe_mode()) != "parallel":
+        # v1beta API로 모델 목록 조회 시도
+        for api_version in api_versions:
+            available_models = _list_models_for_version(api_key, api_version)
+            if available_models:
+                return available_models
+        return []
+
+    executor = ThreadPoolExecutor(max_workers=len(api_versions), thread_name_prefix="gemini-list")
+    futures = [executor.submit(_list_models_for_version, api_key, api_version, deadline) for api_version in api_versions]
+    try:
+        for future in as_completed(futures, timeout=deadline):
+            available_models = future.result()
+            if available_models:
+                return available_models
+    except FuturesTimeoutError:
+        pass
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    return []
+
+
+def sort_models(available_models):
+    """가져온 모델 목록을 우선순위에 따라 정렬합니다."""
+    sorted_models = []
+    for priority_model in PRIORITY_ORDER:
+        for api_version, model_name in available_models:
+            if model_name == priority_model and (api_version, model_name) not in sorted_models:
+                sorted_models.append((api_version, model_name))
+    # 나머지 모델 추가
+    for api_version, model_name in available_models:
+        if (api_version, model_name) not in sorted_models:
+            sorted_models.append((api_version, model_name))
+    return sorted_models
+
+
+def get_available_models(api_key):
+    """사용 가능한 모델 목록을 가져옵니다. (캐시 없이 바로 조회)"""
+    # API 키가 없으면 빈 리스트 반환
+    if not is_valid_api_key(api_key):
+        return []
+
+    available_models = list_models(api_key)
+    # 모델 목록을 가져오지 못한 경우 기본 모델 사용
+    # (실제로는 API 키 문제일 수 있으므로 작동하지 않을 수 있음)
+    if not available_models:
+        return list(DEFAULT_MODELS)
+    return sort_models(available_models)
+
+
+class ModelCatalog:
+    """서버 프로세스 전체가 공유하는 모델 목록 캐시.
+
+    get()은 네트워크를 기다리지 않고 항상 즉시 반환합니다. 캐시가 없거나 TTL이 지나면
+    백그라운드 스레드에서 목록을 다시 조회하고, 그동안은 이전 목록(처음에는 기본 모델)을 씁니다.
+    조회 결과는 cache_path 파일에 저장해 서버를 다시 시작해도 바로 사용합니다.
+    """
+
+    def __init__(self, api_key, ttl=None, cache_path=None, failure_ttl=60, fetch=list_models):
+        self.api_key = api_key
+        self.ttl = ttl if ttl is not None else float(os.getenv("GEMINI_MODEL_CACHE_TTL", "3600"))
+        self.failure_ttl = failure_ttl
+        self.cache_path = cache_path or os.getenv("GEMINI_MODEL_CACHE_PATH") or DEFAULT_CACHE_PATH
+        self._fetch = fetch
+        self._lock = threading.Lock()
+        self._models = None
+        self._expires_at = 0.0
+        self._refresh_thread = None
+        # 서로 다른 API 키의 목록이 섞이지 않도록 키의 해시를 함께 저장
+        self._key_digest = hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:16]
+        self._load_from_disk()
+
+    def get(self):
+        """캐시된 모델 목록을 즉시 반환하고, 필요하면 백그라운드 갱신을 시작합니다."""
+        if not is_valid_api_key(self.api_key):
+            return []
+        with self._lock:
+            models = self._models
+            stale = time.time() >= self._expires_at
+        if stale:
+            self.refresh_in_background()
+        return models if models else list(DEFAULT_MODELS)
+
+    def refresh_in_background(self):
+        """진행 중인 갱신이 없으면 백그라운드 스레드에서 모델 목록을 다시 조회합니다."""
+        with self._lock:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return self._refresh_thread
+            self._refresh_thread = threading.Thread(target=self.refresh, name="gemini-model-catalog", daemon=True)
+            self._refresh_thread.start()
+            return self._refresh_thread
+
+    def refresh(self):
+        """모델 목록을 바로 조회해 캐시와 파일에 저장하고 반환합니다."""
+        try:
+            discovered = self._fetch(self.api_key)
+        except Exception:
+            discovered = []
+        now = time.time()
+        with self._lock:
+            if discovered:
+                self._models = sort_models(discovered)
+                self._expires_at = now + self.ttl
+            else:
+                # 조회에 실패하면 이전 목록을 유지하고 잠시 후 다시 시도
+                self._expires_at = now + self.failure_ttl
+            models = self._models
+        if discovered:
+            self._save_to_disk(models, now)
+        return models if models else list(DEFAULT_MODELS)
+
+    def _load_from_disk(self):
+        """저장된 모델 목록이 같은 API 키의 것이면 불러옵니다."""
+        try:
+            with open(self.cache_path, encoding="utf-8") as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return
+        if cached.get("key") != self._key_digest or not cached.get("models"):
+            return
+        self._models = [tuple(model) for model in cached["models"]]
+        self._expires_at = cached.get("fetched_at", 0) + self.ttl
+
+    def _save_to_disk(self, models, fetched_at):
+        """모델 목록을 파일에 저장합니다. 저장에 실패해도 캐시는 메모리에서 계속 동작합니다."""
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.cache_path)), exist_ok=True)
+            tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"key": self._key_digest, "fetched_at": fetched_at, "models": models}, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError:
+            pass
+
+
+def classify_error(exc):
+    """예외를 상태 기록용 오류 분류와 HTTP 상태 코드로 바꿉니다."""
+    if isinstance(exc, requests.exceptions.HTTPError) and exc.response is not None:
+        status_code = exc.response.status_code
+        if status_code == 404:
+            return "not_found", status_code
+        if status_code == 403:
+            return "forbidden", status_code
+        if status_code == 429:
+            return "rate_limited", status_code
+        if status_code >= 500:
+            return "server_error", status_code
+        return "client_error", status_code
+    if isinstance(exc, (requests.exceptions.Timeout, TimeoutError)):
+        return "timeout", None
+    if isinstance(exc, requests.exceptions.ConnectionError):
+        return "connection", None
+    if isinstance(exc, ValueError):
+        return "invalid_response", None
+    return "other", None
+
+
+class EndpointHealth:
+    """한 엔드포인트의 최근 성공·실패 기록."""
+
+    __slots__ = ("successes", "failures", "consecutive_failures", "latency", "last_error",
+                 "last_ok", "open_until")
+
+    def __init__(self):
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.latency = None  # 첫 응답까지 걸린 시간의 지수 이동 평균 (초)
+        self.last_error = None
+        self.last_ok = None
+        self.open_until = 0.0
+
+
+class HealthRegistry:
+    """(api_version, model, endpoint)별 상태를 기록하는 서킷 브레이커.
+
+    404/403처럼 곧 바뀌지 않을 오류는 바로 회로를 열어 오래 건너뛰고,
+    429는 잠깐, 5xx·시간 초과 같은 일시적 오류는 연속으로 여러 번 실패했을 때만 회로를 엽니다.
+    회로가 닫힌 엔드포인트는 최근 성공 여부와 응답 시간 순으로 정렬해 먼저 시도합니다.
+    """
+
+    # 오류 분류별 (회로를 여는 연속 실패 횟수, 회로를 열어 두는 시간(초))
+    POLICIES = {
+        "not_found": (1, 600),
+        "forbidden": (1, 600),
+        "client_error": (1, 120),
+        "rate_limited": (1, 30),
+        "server_error": (3, 30),
+        "timeout": (3, 30),
+        "connection": (3, 30),
+        "invalid_response": (3, 60),
+        "stream_interrupted": (3, 30),
+        "other": (3, 30),
+    }
+
+    def __init__(self, latency_alpha=0.3, clock=time.monotonic):
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._alpha = latency_alpha
+        self._clock = clock
+
+    def _get(self, key):
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = EndpointHealth()
+        return stats
+
+    def record_success(self, key, latency):
+        """성공과 첫 응답까지 걸린 시간을 기록하고 회로를 닫습니다."""
+        with self._lock:
+            stats = self._get(key)
+            stats.successes += 1
+            stats.consecutive_failures = 0
+            stats.last_ok = True
+            stats.open_until = 0.0
+            if stats.latency is None:
+                stats.latency = latency
+            else:
+                stats.latency = self._alpha * latency + (1 - self._alpha) * stats.latency
+
+    def record_failure(self, key, error_class, retry_after=None):
+        """실패를 기록하고 정책에 따라 회로를 엽니다."""
+        threshold, cooldown = self.POLICIES.get(error_class, self.POLICIES["other"])
+        if retry_after is not None:
+            cooldown = retry_after
+        with self._lock:
+            stats = self._get(key)
+            stats.failures += 1
+            stats.consecutive_failures += 1
+            stats.last_ok = False
+            stats.last_error = error_class
+            if stats.consecutive_failures >= threshold:
+                stats.open_until = self._clock() + cooldown
+
+    def order(self, candidates):
+        """회로가 열린 후보를 빼고 상태가 좋은 순서로 정렬합니다.
+
+        모든 후보의 회로가 열려 있으면 아무것도 시도하지 못하게 되므로 전체 후보를 그대로 반환합니다.
+        """
+        now = self._clock()
+        with self._lock:
+            ranked = []
+            for position, candidate in enumerate(candidates):
+                stats = self._stats.get(candidate[:3])
+                if stats is None:
+                    # 기록이 없으면 원래 우선순위를 유지
+                    ranked.append(((1, 0.0, position), candidate))
+                elif stats.open_until > now:
+                    continue
+                elif stats.last_ok:
+                    ranked.append(((0, stats.latency or 0.0, position), candidate))
+                else:
+                    ranked.append(((2, float(stats.consecutive_failures), position), candidate))
+        if not ranked:
+            return list(candidates)
+        ranked.sort(key=lambda item: item[0])
+        return [candidate for _, candidate in ranked]
+
+    def snapshot(self):
+        """진단용으로 엔드포인트별 상태를 dict로 반환합니다."""
+        now = self._clock()
+        with self._lock:
+            return {
+                "/".join(key): {
+                    "successes": stats.successes,
+                    "failures": stats.failures,
+                    "latency_ms": round(stats.latency * 1000, 1) if stats.latency is not None else None,
+                    "last_error": stats.last_error,
+                    "open": stats.open_until > now,
+                }
+                for key, stats in self._stats.items()
+            }
+
+
+# 서버 프로세스 전체가 공유하는 엔드포인트 상태 기록
+HEALTH_REGISTRY = HealthRegistry()
+
+
+def _retry_after(exc):
+    """429 응답의 Retry-After 헤더(초)를 읽습니다."""
+    response = getattr(exc, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _attempt_endpoint(candidate, payload, api_key, timeout, health):
+    """엔드포인트를 시도하고 결과와 첫 응답까지 걸린 시간을 상태 기록에 남깁니다."""
+    started = time.monotonic()
+    try:
+        result = _open_endpoint(candidate, payload, api_key, timeout)
+    except Exception as exc:
+        error_class, _ = classify_error(exc)
+        health.record_failure(candidate[:3], error_class, _retry_after(exc) if error_class == "rate_limited" else None)
+        metrics.inc("gemini_attempts_total", model=candidate[1], endpoint=candidate[2], outcome=error_class)
+        raise
+    health.record_success(candidate[:3], time.monotonic() - started)
+    metrics.inc("gemini_attempts_total", model=candidate[1], endpoint=candidate[2], outcome="ok")
+    return result
+
+
+def _candidate_endpoints(models):
+    """(api_version, model_name) 목록을 시도할 엔드포인트 목록으로 펼칩니다."""
+    candidates = []
+    for api_version, model_name in models:
+        # 먼저 streamGenerateContent 시도, 실패하면 generateContent 시도
+        candidates.append((api_version, model_name, "streamGenerateContent", True))  # 스트리밍
+        candidates.append((api_version, model_name, "generateContent", False))  # 비스트리밍
+    return candidates
+
+
+def _extract_text(data):
+    """응답 JSON에서 첫 번째 후보의 텍스트를 꺼냅니다. 없으면 None을 반환합니다."""
+    if "candidates" in data and len(data["candidates"]) > 0:
+        candidate = data["candidates"][0]
+        if "content" in candidate and "parts" in candidate["content"]:
+            return candidate["content"]["parts"][0]["text"]
+    return None
+
+
+def _open_endpoint(candidate, payload, api_key, timeout):
+    """엔드포인트에 요청을 보냅니다.
+
+    스트리밍 엔드포인트는 본문을 읽지 않은 응답 객체를, 비스트리밍 엔드포인트는 응답 텍스트를 반환합니다.
+    HTTP 오류는 requests.exceptions.HTTPError로 올립니다.
+    """
+    api_version, model_name, endpoint_name, is_streaming = candidate
+    api_url = f"{GEMINI_API_BASE}/{api_version}/models/{model_name}:{endpoint_name}"
+    headers = {"Content-Type": "application/json"}
+    if is_streaming:
+        params = {"key": api_key, "alt": "sse"}
+        response = get_http_session().post(api_url, params=params, headers=headers, json=payload, stream=True, timeout=timeout)
+        try:
+            response.raise_for_status()
+        except Exception:
+            response.close()
+            raise
+        return response
+
+    params = {"key": api_key}
+    response = get_http_session().post(api_url, params=params, headers=headers, json=payload, timeout=timeout)
+    response.raise_for_status()
+    text = _extract_text(response.json())
+    if text is None:
+        raise ValueError(f"{api_version}/{model_name} 응답에 텍스트가 없어요")
+    return text
+
+
+def _iter_sse_text(response):
+    """스트리밍 응답의 SSE 이벤트에서 텍스트 청크를 yield합니다."""
+    yield from iter_sse_text(response.iter_content(chunk_size=SSE_READ_SIZE))
+
+
+class GeminiErrorMessage(str):
+    """모든 시도가 실패했을 때 응답 대신 yield하는 안내 메시지. 일반 문자열처럼 쓸 수 있습니다."""
+
+
+def _format_error_message(last_error, last_status_code, tried_models):
+    """모든 시도가 실패했을 때 보여 줄 안내 메시지를 만듭니다."""
+    error_msg = f"**오류가 발생했어요!**\n\n"
+
+    if last_status_code == 403:
+        error_msg += "**403 Forbidden 오류:** API 키에 문제가 있거나 접근 권한이 없어요.\n\n"
+        error_msg += "**해결 방법:**\n"
+        error_msg += "1. Google Cloud Console에서 Gemini API가 활성화되어 있는지 확인해주세요.\n"
+        error_msg += "2. API 키가 올바른지 확인해주세요.\n"
+        error_msg += "3. API 키에 필요한 권한이 부여되어 있는지 확인해주세요.\n"
+        if tried_models:
+            error_msg += f"4. 시도한 모델들: {', '.join(tried_models)}\n\n"
+    elif last_status_code == 404:
+        error_msg += f"**404 Not Found 오류:** 모델을 찾을 수 없어요.\n\n"
+        if tried_models:
+            error_msg += f"**시도한 모델들:**\n"
+            for model in tried_models:
+                error_msg += f"- {model}\n"
+            error_msg += "\n"
+        error_msg += "**해결 방법:**\n"
+        error_msg += "1. **API 키 확인:** Google Cloud Console에서 API 키가 올바르게 생성되었는지 확인해주세요.\n"
+        error_msg += "2. **Gemini API 활성화:** Google Cloud Console에서 'Generative Language API'가 활성화되어 있는지 확인해주세요.\n"
+        error_msg += "3. **API 키 제한 설정:** API 키의 '애플리케이션 제한사항'에서 'Generative Language API'가 허용되어 있는지 확인해주세요.\n"
+        error_msg += "4. **프로젝트 확인:** 올바른 Google Cloud 프로젝트에서 API 키를 생성했는지 확인해주세요.\n"
+        error_msg += "5. **모델 목록 확인:** 페이지를 새로고침하여 사용 가능한 모델 목록을 다시 로드해보세요.\n\n"
+        error_msg += "💡 **팁:** 모든 모델에서 404 오류가 발생한다면 API 키 설정에 문제가 있을 가능성이 높습니다.\n\n"
+    else:
+        error_msg += f"**오류 상세:** {last_error}\n\n"
+        if last_status_code:
+            error_msg += f"HTTP 상태 코드: {last_status_code}\n"
+        if tried_models:
+            error_msg += f"시도한 모델들: {', '.join(tried_models)}\n"
+
+    error_msg += "\n다시 시도해주시거나, API 키 설정을 확인해주세요."
+    return GeminiErrorMessage(error_msg)
+
+
+def _endpoint_label(candidate):
+    """오류 메시지에 표시할 엔드포인트 이름을 만듭니다."""
+    api_version, model_name, endpoint_name, _ = candidate
+    return f"{api_version}/{model_name} ({endpoint_name})"
+
+
+def _format_interrupted_message(exc, candidate):
+    """응답을 받는 도중 스트림이 끊겼을 때, 이미 보낸 부분 뒤에 붙일 안내 메시지를 만듭니다."""
+    return GeminiErrorMessage(
+        f"\n\n**응답이 중간에 끊겼어요!** ({_endpoint_label(candidate)})\n\n"
+        f"**오류 상세:** {exc}\n\n다시 시도해주세요."
+    )
+
+
+def _stream_sse(response, candidate, health, cancelled=None):
+    """스트리밍 응답을 끝까지 읽으며 텍스트를 yield하고, 중간에 끊기면 상태 기록에 남깁니다.
+
+    cancelled 이벤트가 설정된 뒤에 끊긴 것은 우리가 연결을 닫은 것이므로 실패로 기록하지 않습니다.
+    """
+    with response:
+        try:
+            yield from _iter_sse_text(response)
+        except Exception:
+            if cancelled is None or not cancelled.is_set():
+                health.record_failure(candidate[:3], "stream_interrupted")
+            raise
+
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """프로세스 공용 응답 캐시를 반환합니다. GEMINI_RESPONSE_CACHE=0이면 None을 반환합니다."""
+    global _response_cache
+    if os.getenv("GEMINI_RESPONSE_CACHE", "1") != "1":
+        return None
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                _response_cache = TieredCache(
+                    memory_size=int(os.getenv("GEMINI_RESPONSE_CACHE_MEMORY", "256")),
+                    db_path=os.getenv("GEMINI_RESPONSE_CACHE_PATH") or DEFAULT_RESPONSE_CACHE_PATH,
+                    ttl=float(os.getenv("GEMINI_RESPONSE_CACHE_TTL", "86400")),
+                    max_disk_entries=int(os.getenv("GEMINI_RESPONSE_CACHE_MAX_ENTRIES", "5000")),
+                )
+    return _response_cache
+
+
+def _normalize_payload(value):
+    """캐시 키를 만들기 위해 문자열의 유니코드 형태와 공백을 정리합니다."""
+    if isinstance(value, str):
+        return " ".join(unicodedata.normalize("NFC", value).split())
+    if isinstance(value, dict):
+        return {key: _normalize_payload(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize_payload(item) for item in value]
+    return value
+
+
+def payload_cache_key(payload, model):
+    """모델 이름과 정규화한 요청 본문의 SHA-256 해시를 캐시 키로 반환합니다.
+
+    같은 요청이라도 모델마다 답이 다르므로, 다른 모델이 만든 답을 돌려주지 않도록 모델 이름을 키에 넣습니다.
+    """
+    normalized = json.dumps([model, _normalize_payload(payload)], ensure_ascii=False, sort_keys=True,
+                            separators=(",", ":"))
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def stream_gemini_response(payload, api_key, models, probe_mode=None, deadline=None, max_workers=None,
+                           health=None, hedge=None, cache=None):
+    """Gemini API로부터 스트리밍 응답을 받아 텍스트 청크를 yield합니다.
+
+    지금 가장 먼저 시도할 모델이 같은 요청(정규화한 payload 기준)에 답한 것이 캐시(cache, 기본값은
+    get_response_cache())에 있으면 네트워크 요청 없이 저장해 둔 청크를 그대로 다시 yield합니다.
+    응답은 실제로 답한 모델(대체 모델일 수도 있음)의 이름으로 저장합니다.
+    후보 엔드포인트는 상태 기록(health, 기본값은 프로세스 공용 HEALTH_REGISTRY) 순서대로 시도하고,
+    회로가 열린 엔드포인트는 건너뜁니다.
+    probe_mode가 'parallel'이면 후보 엔드포인트를 동시에 시도해 가장 먼저 정상 응답한 것을 쓰고,
+    나머지는 취소합니다. 이때 전체 시도는 deadline(초) 안에 끝납니다.
+    hedge가 켜져 있으면(기본값은 GEMINI_HEDGE 환경 변수) 첫 청크가 늦을 때 다음 모델로 헤지 요청을 보냅니다.
+    """
+    health = health or HEALTH_REGISTRY
+    cache = cache if cache is not None else get_response_cache()
+    started = time.perf_counter()
+    if cache is not None:
+        candidates = health.order(_candidate_endpoints(models))
+        cached_chunks = cache.get(payload_cache_key(payload, candidates[0][1])) if candidates else None
+        if cached_chunks:
+            metrics.inc("gemini_requests_total", source="cache", outcome="ok")
+            yield from cached_chunks
+            return
+
+    answered = []  # 응답한 모델 이름
+    if (probe_mode or get_probe_mode()) == "parallel":
+        chunks = _stream_parallel(payload, api_key, models, deadline, max_workers, health, answered=answered)
+    elif hedge if hedge is not None else os.getenv("GEMINI_HEDGE", "0") == "1":
+        chunks = _stream_hedged(payload, api_key, models, health, answered=answered)
+    else:
+        chunks = _stream_sequential(payload, api_key, models, health, answered=answered)
+
+    collected = []
+    failed = False
+    for chunk in chunks:
+        if isinstance(chunk, GeminiErrorMessage):
+            failed = True
+        elif not collected:
+            metrics.observe("gemini_ttfb_seconds", time.perf_counter() - started)
+        collected.append(chunk)
+        yield chunk
+    metrics.observe("gemini_duration_seconds", time.perf_counter() - started)
+    metrics.inc("gemini_requests_total", source="api", outcome="error" if failed or not collected else "ok")
+    # 끝까지 정상적으로 받은 응답만 저장. 각 방식은 스트림이 중간에 끊기면 받은 부분 뒤에
+    # GeminiErrorMessage를 yield하므로, 오류 안내가 하나라도 있으면 저장하지 않음
+    if cache is not None and collected and not failed and answered:
+        cache.put(payload_cache_key(payload, answered[0]), collected)
+
+
+def _stream_sequential(payload, api_key, models, health=HEALTH_REGISTRY, answered=None):
+    """후보 엔드포인트를 하나씩 차례로 시도합니다. 응답한 모델 이름은 answered 리스트에 넣습니다."""
+    last_error = None
+    last_status_code = None
+    tried_models = []
+
+    for candidate in health.order(_candidate_endpoints(models)):
+        is_streaming = candidate[3]
+        current_model = _endpoint_label(candidate)
+        if current_model not in tried_models:
+            tried_models.append(current_model)
+        if last_error is not None:
+            # 앞의 시도가 실패해서 다음 엔드포인트로 넘어감
+            metrics.inc("gemini_fallback_hops_total", model=candidate[1], endpoint=candidate[2])
+
+        try:
+            if is_streaming:
+                # 스트리밍 엔드포인트
+                response = _attempt_endpoint(candidate, payload, api_key, 60, health)
+                if answered is not None:
+                    answered.append(candidate[1])
+                received = False
+                try:
+                    for text in _stream_sse(response, candidate, health):
+                        received = True
+                        yield text
+                except Exception as exc:
+                    if not received:
+                        raise
+                    # 이미 보낸 부분이 있으므로 다른 엔드포인트로 넘어가면 답이 겹침
+                    yield _format_interrupted_message(exc, candidate)
+                    return
+                return # 성공적으로 스트리밍이 끝나면 함수 종료
+            else:
+                # 비스트리밍이므로 전체 텍스트를 한 번에 yield
+                text = _attempt_endpoint(candidate, payload, api_key, 60, health)
+                if answered is not None:
+                    answered.append(candidate[1])
+                yield text
+                return
+        except requests.exceptions.HTTPError as e:
+            # 404, 403 등 HTTP 오류 시 다음 엔드포인트 또는 모델 시도
+            last_error = e
+            last_status_code = e.response.status_code
+        except Exception as exc:
+            last_error = exc
+
+    # 모든 시도가 실패한 경우
+    if last_error:
+        yield _format_error_message(last_error, last_status_code, tried_models)
+
+
+def _close_late_result(future):
+    """이미 승자가 정해진 뒤에 끝난 시도의 응답 연결을 닫습니다."""
+    if future.cancelled() or future.exception() is not None:
+        return
+    result = future.result()
+    if hasattr(result, "close"):
+        result.close()
+
+
+def _stream_parallel(payload, api_key, models, deadline=None, max_workers=None, health=HEALTH_REGISTRY,
+                     answered=None):
+    """후보 엔드포인트를 스레드 풀에서 동시에 시도하고 가장 먼저 성공한 응답을 스트리밍합니다.
+
+    응답한 모델 이름은 answered 리스트에 넣습니다.
+    """
+    deadline = deadline if deadline is not None else float(os.getenv("GEMINI_PROBE_DEADLINE", "30"))
+    max_workers = max_workers or int(os.getenv("GEMINI_PROBE_WORKERS", "4"))
+    candidates = health.order(_candidate_endpoints(models))
+    tried_models = [_endpoint_label(candidate) for candidate in candidates]
+    if not candidates:
+        return
+
+    started = time.monotonic()
+    cancelled = threading.Event()
+
+    def probe(candidate):
+        # 승자가 정해졌거나 마감 시간이 지났으면 요청을 보내지 않음
+        remaining = deadline - (time.monotonic() - started)
+        if cancelled.is_set() or remaining <= 0:
+            return None
+        return _attempt_endpoint(candidate, payload, api_key, remaining, health)
+
+    last_error = None
+    last_status_code = None
+    winner = None
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(candidates)), thread_name_prefix="gemini-probe")
+    futures = {executor.submit(probe, candidate): candidate for candidate in candidates}
+    try:
+        for future in as_completed(futures, timeout=deadline):
+            try:
+                result = future.result()
+            except requests.exceptions.HTTPError as e:
+                last_error = e
+                last_status_code = e.response.status_code
+                continue
+            except Exception as exc:
+                last_error = exc
+                continue
+            if result is not None:
+                winner = (future, result)
+                break
+    except FuturesTimeoutError:
+        last_error = TimeoutError(f"{deadline:g}초 안에 응답한 모델이 없어요")
+        last_status_code = None
+    finally:
+        # 나머지 시도는 취소하고, 이미 진행 중인 요청은 끝나는 대로 연결을 닫음
+        cancelled.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+        for future in futures:
+            if winner is None or future is not winner[0]:
+                future.add_done_callback(_close_late_result)
+
+    if winner is not None:
+        result = winner[1]
+        candidate = futures[winner[0]]
+        if answered is not None:
+            answered.append(candidate[1])
+        if isinstance(result, str):
+            yield result
+            return
+        try:
+            yield from _stream_sse(result, candidate, health)
+        except Exception as exc:
+            # 실패는 _stream_sse가 상태 기록에 남겼고, 다른 시도는 이미 취소했으므로 끊겼다는 안내를 붙임
+            yield _format_interrupted_message(exc, candidate)
+        return
+
+    if last_error:
+        yield _format_error_message(last_error, last_status_code, tried_models)
+
+
+class HedgeStats:
+    """헤지 요청 카운터와 첫 청크까지 걸린 시간(TTFT) 기록.
+
+    헤지 지연 시간은 최근 TTFT의 백분위수(percentile)로 정하고, 기록이 적을 때는 default_delay를 씁니다.
+    """
+
+    def __init__(self, percentile=None, default_delay=None, window=200, min_samples=10):
+        self.percentile = percentile if percentile is not None else float(os.getenv("GEMINI_HEDGE_PERCENTILE", "95"))
+        self.default_delay = default_delay if default_delay is not None else float(os.getenv("GEMINI_HEDGE_DELAY", "2.0"))
+        self.min_samples = min_samples
+        self._lock = threading.Lock()
+        self._ttft = deque(maxlen=window)
+        self.turns = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.primary_wins = 0
+
+    def hedge_delay(self):
+        """첫 청크를 이 시간(초) 안에 받지 못하면 헤지 요청을 보냅니다."""
+        with self._lock:
+            samples = sorted(self._ttft)
+        if len(samples) < self.min_samples:
+            return self.default_delay
+        rank = max(0, min(len(samples) - 1, int(round(self.percentile / 100 * len(samples))) - 1))
+        return samples[rank]
+
+    def record_turn(self, hedged, hedge_won, ttft):
+        """한 번의 응답 결과를 기록합니다. ttft는 승자가 첫 청크를 보낼 때까지 걸린 시간입니다."""
+        with self._lock:
+            self.turns += 1
+            if hedged:
+                self.hedged += 1
+            if hedge_won:
+                self.hedge_wins += 1
+            elif ttft is not None:
+                self.primary_wins += 1
+            if ttft is not None:
+                self._ttft.append(ttft)
+
+    def snapshot(self):
+        """헤지 비율과 승리 횟수를 dict로 반환합니다."""
+        with self._lock:
+            turns = self.turns
+            return {
+                "turns": turns,
+                "hedged": self.hedged,
+                "hedge_rate": self.hedged / turns if turns else 0.0,
+                "hedge_wins": self.hedge_wins,
+                "primary_wins": self.primary_wins,
+            }
+
+
+# 서버 프로세스 전체가 공유하는 헤지 통계
+HEDGE_STATS = HedgeStats()
+
+
+def _hedge_worker(attempt_id, candidate, payload, api_key, health, events, cancelled, responses):
+    """한 후보의 응답을 읽어 (attempt_id, 종류, 값) 이벤트로 큐에 넣습니다."""
+    try:
+        result = _attempt_endpoint(candidate, payload, api_key, 60, health)
+        if isinstance(result, str):
+            events.put((attempt_id, "chunk", result))
+        else:
+            responses[attempt_id] = result
+            for text in _stream_sse(result, candidate, health, cancelled):
+                if cancelled.is_set():
+                    break
+                events.put((attempt_id, "chunk", text))
+        events.put((attempt_id, "done", None))
+    except Exception as exc:
+        if not cancelled.is_set():
+            events.put((attempt_id, "error", exc))
+
+
+def _stream_hedged(payload, api_key, models, health=HEALTH_REGISTRY, stats=None, hedge_delay=None, answered=None):
+    """첫 청크가 늦으면 다음 모델로 두 번째 요청을 보내고, 먼저 청크를 보낸 쪽을 스트리밍합니다.
+
+    응답한 모델 이름은 answered 리스트에 넣습니다.
+    """
+    stats = stats or HEDGE_STATS
+    candidates = health.order(_candidate_endpoints(models))
+    delay = hedge_delay if hedge_delay is not None else stats.hedge_delay()
+    events = queue.Queue()
+    responses = {}
+    attempts = []  # (candidate, cancelled 이벤트, 시작 시각)
+    active = set()
+    tried_models = []
+    remaining = list(candidates)
+
+    def launch(different_model=False):
+        """남은 후보 중 하나를 시작합니다. different_model이면 진행 중인 시도와 다른 모델만 고릅니다."""
+        busy_models = {attempts[i][0][:2] for i in active}
+        for candidate in remaining:
+            if different_model and candidate[:2] in busy_models:
+                continue
+            remaining.remove(candidate)
+            attempt_id = len(attempts)
+            cancelled = threading.Event()
+            attempts.append((candidate, cancelled, time.monotonic()))
+            active.add(attempt_id)
+            tried_models.append(_endpoint_label(candidate))
+            threading.Thread(
+                target=_hedge_worker, name="gemini-hedge", daemon=True,
+                args=(attempt_id, candidate, payload, api_key, health, events, cancelled, responses),
+            ).start()
+            return attempt_id
+        return None
+
+    last_error = None
+    last_status_code = None
+    winner = None
+    first_text = None
+    hedged = False
+    primary = launch()
+    hedge_armed = primary is not None
+    try:
+        while winner is None and active:
+            timeout = None
+            if hedge_armed:
+                timeout = max(0.0, delay - (time.monotonic() - attempts[primary][2]))
+            try:
+                attempt_id, kind, value = events.get(timeout=timeout)
+            except queue.Empty:
+                # 첫 청크가 늦으면 다른 모델로 헤지 요청
+                hedge_armed = False
+                if launch(different_model=True) is not None:
+                    hedged = True
+                continue
+            if kind == "chunk":
+                winner, first_text = attempt_id, value
+                break
+            active.discard(attempt_id)
+            if kind == "error":
+                last_error = value
+                _, last_status_code = classify_error(value)
+            if not active:
+                # 진행 중인 시도가 모두 실패하면 다음 후보로 넘어가고 다시 헤지를 준비
+                primary = launch()
+                hedge_armed = primary is not None and not hedged
+
+        # 진 쪽은 취소하고 연결을 닫음
+        for attempt_id in active:
+            if attempt_id != winner:
+                attempts[attempt_id][1].set()
+                response = responses.get(attempt_id)
+                if response is not None:
+                    response.close()
+
+        if winner is None:
+            stats.record_turn(hedged, False, None)
+            if last_error:
+                yield _format_error_message(last_error, last_status_code, tried_models)
+            return
+
+        stats.record_turn(hedged, hedged and winner != primary, time.monotonic() - attempts[winner][2])
+        if answered is not None:
+            answered.append(attempts[winner][0][1])
+        yield first_text
+        while True:
+            attempt_id, kind, value = events.get()
+            if attempt_id != winner:
+                continue
+            if kind == "done":
+                return
+            if kind == "error":
+                # 실패는 _stream_sse가 상태 기록에 남겼으므로, 받은 부분 뒤에 끊겼다는 안내를 붙임
+                yield _format_interrupted_message(value, attempts[winner][0])
+                return
+            yield value
+    finally:
+        # 호출한 쪽이 스트림을 중간에 닫아도 남은 요청이 정리되도록 함
+        for _, cancelled, _ in attempts:
+            cancelled.set()
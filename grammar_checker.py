@@ -0,0 +1,265 @@
+"""핵심 5가지 규칙(데/대, 이에요/예요, 어떡해/어떻게, 되/돼, 안/않)만 검사하는 로컬 맞춤법 검사기입니다.
+
+네트워크 없이 모듈을 불러올 때 한 번 컴파일한 정규식과 한글 음절 분해(초성·중성·종성)로 검사합니다.
+결과는 py-hanspell의 check()와 같은 모양(Checked)이라서 교정 펜 탭에서 그대로 쓸 수 있습니다.
+words는 틀린 어절 -> (오류 유형, 고친 어절)이고, 오류 유형은 퀴즈 코퍼스의 '오류 유형' 값과 같습니다.
+
+규칙은 어절(띄어쓰기 단위)마다 앞뒤 어절을 보고 적용하며, 데/대처럼 문장 전체의 단서가 필요한 규칙은
+문장의 마지막 어절에만 적용합니다. 문맥을 완전히 알 수는 없으므로 확실한 경우만 고칩니다.
+"""
+import re
+import time
+from collections import namedtuple
+
+Checked = namedtuple("Checked", ["result", "original", "checked", "errors", "words", "time"])
+
+# 오류 유형 (퀴즈 코퍼스의 '오류 유형'과 같은 값)
+DE_DAE = "데/대"
+EYO_YEYO = "에요/예요"
+EOTTEOKAE = "어떡해/어떻게"
+DOE_DWAE = "되/돼"
+AN_ANH = "안/않"
+
+# --- 한글 음절 분해 ---
+
+_HANGUL_BASE = 0xAC00
+_HANGUL_LAST = 0xD7A3
+_JUNG_COUNT = 21
+_JONG_COUNT = 28
+
+# 중성과 종성 번호 (유니코드 음절 순서)
+_JUNG_OE = 11    # ㅚ
+_JUNG_WAE = 10   # ㅙ
+_JONG_NONE = 0
+_JONG_N = 4      # ㄴ
+_JONG_L = 8      # ㄹ
+_JONG_M = 16     # ㅁ
+_JONG_SS = 20    # ㅆ
+_CHO_D = 3       # ㄷ
+
+
+def decompose(syllable):
+    """한글 음절을 (초성, 중성, 종성) 번호로 나눕니다. 한글 음절이 아니면 None."""
+    code = ord(syllable) - _HANGUL_BASE
+    if not 0 <= code <= _HANGUL_LAST - _HANGUL_BASE:
+        return None
+    return code // (_JUNG_COUNT * _JONG_COUNT), code // _JONG_COUNT % _JUNG_COUNT, code % _JONG_COUNT
+
+
+def compose(cho, jung, jong=_JONG_NONE):
+    return chr(_HANGUL_BASE + (cho * _JUNG_COUNT + jung) * _JONG_COUNT + jong)
+
+
+def has_batchim(syllable):
+    """음절에 받침(종성)이 있으면 True. 한글 음절이 아니면 False."""
+    parts = decompose(syllable)
+    return parts is not None and parts[2] != _JONG_NONE
+
+
+# --- 어절 규칙 ---
+# 규칙은 (어절, 앞 어절, 뒤 어절)을 받아 고친 어절을 반환하고, 고칠 것이 없으면 None을 반환합니다.
+# 어절에는 끝의 문장 부호가 빠져 있고, 앞뒤 어절이 없으면 ""입니다.
+
+_COPULA = re.compile(r"([가-힣])(이에요|이예요|예요|에요)$")
+# '집에요', '3시에요'처럼 조사 '에' + '요'일 수 있는 장소·시간 명사 (어절이 이 말로 끝나면 '에요'를 고치지 않음)
+_PLACE_TIME_NOUNS = (
+    "집", "학교", "교실", "방", "회사", "병원", "도서관", "공원", "시장", "식당", "가게", "마트", "운동장",
+    "놀이터", "밖", "안", "위", "아래", "밑", "옆", "앞", "뒤", "속", "여기", "거기", "저기", "어디",
+    "아침", "점심", "저녁", "밤", "낮", "오늘", "내일", "어제", "주말", "방학", "시", "때", "동안",
+)
+# 장소·시간 명사로 끝나지만 '에요'가 붙으면 서술격 조사로만 읽히는 명사
+_COPULA_HOSTS = ("가방", "도시")
+
+
+def _fix_copula(word, prev, next_):
+    """받침 있는 명사 + 이에요, 받침 없는 명사 + 예요. '아니다'는 항상 '아니에요'."""
+    match = _COPULA.search(word)
+    if match is None:
+        return None
+    syllable, ending = match.groups()
+    stem = word[:match.start(2)]
+    batchim = has_batchim(syllable)
+    if stem.endswith("아니"):
+        fixed = "에요" if ending != "에요" else None
+    elif ending == "이에요":
+        # '아이에요'처럼 '이'가 명사의 일부일 수 있는 한 글자 어간은 건너뜀
+        fixed = "예요" if not batchim and len(stem) >= 2 else None
+    elif ending == "이예요":
+        fixed = "이에요" if batchim else None
+    elif ending == "에요" and stem.endswith(_PLACE_TIME_NOUNS) and not stem.endswith(_COPULA_HOSTS):
+        fixed = None
+    else:   # 예요, 에요
+        fixed = "이에요" if batchim else ("예요" if ending == "에요" else None)
+    if fixed is None:
+        return None
+    return stem + fixed + word[match.end(2):]
+
+
+def _fix_doe_syllables(word):
+    """음절 분해로 '됬→됐', '됄→될', '됀→된'처럼 모음과 받침이 맞지 않는 '되/돼'를 고칩니다."""
+    chars = list(word)
+    changed = False
+    for i, char in enumerate(chars):
+        parts = decompose(char)
+        if parts is None or parts[0] != _CHO_D:
+            continue
+        _, jung, jong = parts
+        if jung == _JUNG_OE and jong == _JONG_SS:
+            chars[i] = compose(_CHO_D, _JUNG_WAE, jong)
+            changed = True
+        elif jung == _JUNG_WAE and jong in (_JONG_N, _JONG_L, _JONG_M):
+            chars[i] = compose(_CHO_D, _JUNG_OE, jong)
+            changed = True
+    return "".join(chars) if changed else None
+
+
+# '돼'(되어) 뒤에 올 수 없는 어미: 되고, 되는, 되니까, 되면, 되기, 되게, 되겠다, 되었다
+_DWAE_BEFORE_ENDING = re.compile(r"돼(?=[고는니면기게겠었])")
+# '되' 뒤에 바로 '요/서/야/도'가 오면 '되어'가 줄어든 '돼' (되도록은 제외)
+_DOE_BEFORE_EO = re.compile(r"되(?=요|서|야|도(?!록))")
+_DOE_AT_END = re.compile(r"되$")
+# '쌀 한 되', '2되'처럼 수 뒤에 오는 '되'는 부피를 세는 단위
+_NUMERALS = ("한", "두", "세", "네", "다섯", "여섯", "일곱", "여덟", "아홉", "열", "몇", "반")
+_DOE_COUNTER = re.compile(r"^\d+되$")
+
+
+def _fix_doe_dwae(word, prev, next_):
+    fixed = _fix_doe_syllables(word) or word
+    fixed = _DWAE_BEFORE_ENDING.sub("되", fixed)
+    fixed = _DOE_BEFORE_EO.sub("돼", fixed)
+    if not (word == "되" and (prev in _NUMERALS or prev.isdigit()) or _DOE_COUNTER.search(word)):
+        fixed = _DOE_AT_END.sub("돼", fixed)
+    return fixed if fixed != word else None
+
+
+# '-지 않다'에서 '않' 뒤에 오는 어미
+_ANH_ENDINGS = "아았고는다니으을기게지네습은겠던도냐"
+# '-지' 뒤의 '안-'을 고칠 때는 명사 '안'에 붙는 조사(안은, 안을, 안으로, 안도)로도 읽히는 어미를 뺌 ('바지 안은')
+_ANH_AFTER_JI = re.compile(f"^안(?=[{_ANH_ENDINGS.translate(str.maketrans('', '', '으을은도'))}])")
+_ANH_AS_ADVERB = re.compile(f"^않(?![{_ANH_ENDINGS}])")
+
+
+def _fix_an_anh(word, prev, next_):
+    """'-지' 뒤의 '안-'은 '않-', 그 밖의 어절 첫머리 '않'은 부사 '안'."""
+    if prev.endswith("지"):
+        if _ANH_AFTER_JI.search(word):
+            return "않" + word[1:]
+        return None
+    if _ANH_AS_ADVERB.search(word):
+        return "안" + word[1:]
+    return None
+
+
+def _fix_eotteokae(word, prev, next_):
+    """'어떻해/어떡게'는 항상 틀린 말이고, 뒤에 서술어가 이어지는 '어떡해'는 방법을 묻는 '어떻게'."""
+    if word.startswith("어떻해"):
+        return "어떡해" + word[3:]
+    if word.startswith("어떡게"):
+        return "어떻게" + word[3:]
+    if word == "어떡해" and next_:
+        return "어떻게"
+    return None
+
+
+WORD_RULES = (
+    (EYO_YEYO, re.compile("[에예]요"), _fix_copula),
+    (DOE_DWAE, re.compile("[되돼됬됄됀]"), _fix_doe_dwae),
+    (AN_ANH, re.compile("^(?:안|않)"), _fix_an_anh),
+    (EOTTEOKAE, re.compile("^어떡|^어떻"), _fix_eotteokae),
+)
+
+# --- 문장 규칙 (문장의 마지막 어절) ---
+
+# 남에게 들은 말이라는 단서 → '대', 직접 겪었다는 단서 → '데'
+_HEARSAY_CUE = re.compile(r"그러는데|그러던데|그랬는데|들었는데|들으니|듣기로|라고\s?하|뉴스에서|소문에")
+_EXPERIENCE_CUE = re.compile(r"직접|보니까|보니\s|가 보니|먹어 보니|내가 봤는데")
+# 문장 끝의 회상 '-데(요)'. 연결 어미가 끝에 온 '-는데/-던데/-ㄴ데'는 제외
+_FINAL_DE = re.compile(r"(?<![는던은인한운])데(?=요?$)")
+_FINAL_DAE = re.compile(r"대(?=요?$)")
+# 남의 바람은 직접 겪을 수 없으므로 '-고 싶데'는 항상 '-고 싶대'
+_SIPDE = re.compile(r"싶데(?=요?$)")
+
+
+def _fix_de_dae(word, sentence):
+    if _SIPDE.search(word):
+        return _SIPDE.sub("싶대", word)
+    if _HEARSAY_CUE.search(sentence) and _FINAL_DE.search(word):
+        return _FINAL_DE.sub("대", word)
+    if _EXPERIENCE_CUE.search(sentence) and _FINAL_DAE.search(word):
+        return _FINAL_DAE.sub("데", word)
+    return None
+
+
+def _fix_final_eotteoke(word, sentence, word_count):
+    """문장을 끝맺는 '어떻게'는 난감함을 나타내는 '어떡해'. 한 어절짜리 질문 '어떻게?'는 그대로 둡니다."""
+    if word == "어떻게" and (word_count > 1 or sentence.endswith("!")):
+        return "어떡해"
+    return None
+
+
+_SENTENCE = re.compile(r"[^.!?\n]+[.!?]*|[.!?\n]+")
+_WORD = re.compile(r"\S+")
+_TRAILING_PUNCT = re.compile(r"[.,!?~…'\")\]]+$")
+
+
+def _split_punct(token):
+    match = _TRAILING_PUNCT.search(token)
+    if match is None:
+        return token, ""
+    return token[:match.start()], token[match.start():]
+
+
+def _check_sentence(sentence, words):
+    """문장 하나를 검사해 고친 문장을 반환하고, 틀린 어절을 words에 기록합니다."""
+    tokens = [(m.start(), m.end()) + _split_punct(m.group()) for m in _WORD.finditer(sentence)]
+    if not tokens:
+        return sentence
+    fixed_words = [word for _, _, word, _ in tokens]
+    error_types = [None] * len(tokens)
+    for i, (_, _, word, punct) in enumerate(tokens):
+        prev = tokens[i - 1][2] if i else ""
+        # 쉼표 등으로 끊긴 어절은 뒤 어절과 이어지지 않는 것으로 봄
+        next_ = tokens[i + 1][2] if i + 1 < len(tokens) and not punct else ""
+        for error_type, trigger, rule in WORD_RULES:
+            if not trigger.search(fixed_words[i]):
+                continue
+            fixed = rule(fixed_words[i], prev, next_)
+            if fixed is not None:
+                fixed_words[i] = fixed
+                error_types[i] = error_types[i] or error_type
+
+    last = len(tokens) - 1
+    stripped = sentence.strip()
+    for error_type, fixed in ((DE_DAE, _fix_de_dae(fixed_words[last], stripped)),
+                              (EOTTEOKAE, _fix_final_eotteoke(fixed_words[last], stripped, len(tokens)))):
+        if fixed is not None:
+            fixed_words[last] = fixed
+            error_types[last] = error_types[last] or error_type
+
+    if not any(error_types):
+        return sentence
+    parts = []
+    position = 0
+    for (start, end, word, punct), fixed, error_type in zip(tokens, fixed_words, error_types):
+        parts.append(sentence[position:start])
+        parts.append(fixed + punct)
+        position = end
+        if error_type is not None:
+            words[word] = (error_type, fixed)
+    parts.append(sentence[position:])
+    return "".join(parts)
+
+
+def check(text):
+    """문장(여러 문장도 가능)을 검사해 py-hanspell과 같은 모양의 Checked를 반환합니다."""
+    started = time.perf_counter()
+    words = {}
+    checked = "".join(_check_sentence(match.group(), words) for match in _SENTENCE.finditer(text))
+    return Checked(
+        result=True,
+        original=text,
+        checked=checked,
+        errors=len(words),
+        words=words,
+        time=time.perf_counter() - started,
+    )
@@ -0,0 +1,146 @@
+"""문법 규칙과 퀴즈 문제를 담은 공용 코퍼스입니다.
+
+퀴즈 문제는 디스크의 문제 은행(data/quiz_bank.jsonl)에서 필요할 때만 읽어 옵니다.
+코퍼스는 서버 프로세스마다 한 번만 만들어 모든 세션이 같은 객체를 참조합니다.
+오류 유형별, 문제 ID별 색인을 미리 만들어 두어 규칙 조회와 문제 샘플링이 상수 시간에 끝납니다.
+"""
+import logging
+import random
+from functools import lru_cache
+from types import MappingProxyType
+
+import pandas as pd
+
+from distractors import make_distractor
+from quiz_bank import open_quiz_bank
+
+logger = logging.getLogger("app.quiz_bank")
+
+# --- 초등 문법 오류 데이터 ---
+GRAMMAR_DATA = {
+    '오류 유형': ['데/대', '에요/예요', '어떡해/어떻게', '되/돼', '안/않'],
+    '규칙 설명': [
+        "'데'는 직접 경험한 사실을, '대'는 다른 사람에게 들은 내용을 전달할 때 사용해요.",
+        '받침이 있으면 **\'이에요\'**, 받침이 없으면 **\'예요\'**를 써요.\n\n하지만 **\'아니다\'**는 무조건 **\'아니에요\'**가 맞아요! (줄여서 \'아녜요\'도 O) 그 이유가 궁금한 학생은 선생님과 함께 탐구해볼까요?',
+        "'어떻게'는 '어떠하게'의 준말로 방법을 물을 때 쓰고, '어떡해'는 '어떻게 해'의 준말로 걱정되는 상황에서 사용해요.",
+        "'되어'의 준말이 '돼'예요. '되어'를 넣어 말이 되면 '돼'를 쓸 수 있어요.\n\n**사용법:** '돼' 또는 '되' 자리에 '해' 또는 '하'를 넣어보세요.\n\n'돼'는 '해'로 바꾸었을 때 말이 되면 '돼'를 씁니다. (예: '안 돼' → '안 해' ✓)\n'되'는 '하'로 바꾸었을 때 말이 되면 '되'를 씁니다. (예: '선생님이 되고 싶어' → '선생님이 하고 싶어' ✓)",
+        "'아니'의 준말이 '안'이에요. '아니하다'의 준말은 '않다'고요."
+    ],
+    '예시 (틀린 문장)': [
+        '졸업식이 일주일 연기됐데',
+        '저는 학생예요.',
+        '어떡해 나한테 그럴 수 있어?',
+        '그러면 안되.',
+        '너는 나한테 미안하지도 안니?'
+    ],
+    '예시 (맞는 문장)': [
+        '졸업식이 일주일 연기됐대.',
+        '저는 학생이에요.',
+        '어떻게 나한테 그럴 수 있어?',
+        '그러면 안돼. (안되어)',
+        '너는 나한테 미안하지도 않니? (아니하니)'
+    ],
+    '빈도 (가상)': [25, 15, 10, 45, 40]
+}
+
+# "도전! 문법 퀴즈"에서는 구분 방법 질문 제외
+CHALLENGE_EXCLUDED_QUESTIONS = frozenset([
+    '되/돼를 구분하는 방법은 무엇인가요?',
+    '이에요, 예요를 구분하는 방법은 무엇인가요?'
+])
+
+
+def _shuffled(ids, rng):
+    """ids를 무작위 순서로 하나씩 내놓습니다.
+
+    전체를 복사하지 않고 자리를 바꾼 위치만 dict에 기록하는 지연 피셔-예이츠 셔플이라,
+    앞에서 몇 개만 꺼내면 문제가 아무리 많아도 그만큼만 일합니다.
+    """
+    swapped = {}
+    for i in range(len(ids)):
+        j = rng.randrange(i, len(ids))
+        yield ids[swapped.get(j, j)]
+        swapped[j] = swapped.get(i, i)
+
+
+class GrammarCorpus:
+    """읽기 전용 문법 코퍼스와 미리 만들어 둔 색인.
+
+    규칙은 메모리에 두고, 퀴즈 문제는 문제 은행(quiz_bank.QuizBank)에서 필요할 때만 읽어 옵니다.
+    규칙과 문제는 MappingProxyType으로 감싸 공유 중에 수정되지 않도록 하고,
+    세션은 복사본 대신 이 객체들의 참조만 보관합니다.
+    """
+
+    def __init__(self, grammar_data, quiz_bank, challenge_excluded=CHALLENGE_EXCLUDED_QUESTIONS,
+                 question_cache_size=4096):
+        df = pd.DataFrame(grammar_data)
+        df['ID'] = range(1, len(df) + 1)
+        self.grammar_df = df
+        # 빈도 차트는 매번 정렬하지 않도록 미리 정렬해 둠
+        self.frequency_chart_df = df.sort_values(by='빈도 (가상)', ascending=False)
+
+        self.rules = tuple(MappingProxyType(row) for row in df.to_dict('records'))
+        self.error_types = tuple(rule['오류 유형'] for rule in self.rules)
+        self._rules_by_type = {rule['오류 유형']: rule for rule in self.rules}
+
+        self.quiz_bank = quiz_bank
+        # 문제 뽑기 전용 난수 생성기. 전역 random은 다른 코드가 seed를 바꿀 수 있어 쓰지 않음
+        self.rng = random.Random()
+        self._challenge_excluded = challenge_excluded
+        # 한 번 읽어 보고 조건에 맞지 않았던 문제 ID. 문제 내용은 바뀌지 않으므로 다음부터는 읽지 않고 건너뜀
+        self._challenge_excluded_ids = set()
+        self._no_distractor_ids = set()
+        # 자주 나오는 문제는 같은 객체를 다시 쓰도록 최근에 읽은 문제를 캐시
+        self.question = lru_cache(maxsize=question_cache_size)(self._load_question)
+
+    def rule(self, error_type):
+        """오류 유형에 해당하는 규칙을 반환합니다."""
+        return self._rules_by_type[error_type]
+
+    def _load_question(self, question_id):
+        """문제 ID에 해당하는 문제를 문제 은행에서 읽어 규칙 설명을 붙여 반환합니다."""
+        question = self.quiz_bank.get(question_id)
+        question['오답들'] = tuple(question['오답들'])
+        # 규칙 설명을 미리 붙여 두면 문제 출제 시 별도 조회가 필요 없음
+        rule = self._rules_by_type.get(question['오류 유형'])
+        question['규칙 설명'] = rule['규칙 설명'] if rule else ''
+        # 챗봇 선택지의 틀린 문장도 문제를 읽을 때 한 번만 만들어 둠
+        # 만들 수 없으면 None으로 두고, 챗봇용으로 뽑을 때(with_distractor=True)만 이 문제를 건너뜀
+        distractor = make_distractor(question)
+        if distractor is None:
+            logger.warning("문제 %d: 정답과 다른 틀린 문장을 만들 수 없어 챗봇에는 출제하지 않습니다", question_id)
+        question['틀린 선택지'] = distractor
+        return MappingProxyType(question)
+
+    def question_ids(self, error_type=None):
+        """오류 유형(없으면 전체)에 속한 문제 ID 시퀀스를 반환합니다."""
+        return self.quiz_bank.ids(error_type)
+
+    def sample_question(self, error_type=None, exclude=(), challenge_only=False, with_distractor=False, rng=None):
+        """조건에 맞는 문제 하나를 무작위로 뽑습니다. 후보가 없으면 None을 반환합니다.
+
+        with_distractor가 True이면 챗봇 선택지에 쓸 틀린 문장('틀린 선택지')이 있는 문제만 뽑습니다.
+        """
+        rng = rng or self.rng
+        # 무작위 순서로 후보를 하나씩 확인하므로 제외되는 문제가 많아도 문제 은행 전체를 읽지 않음
+        for question_id in _shuffled(self.question_ids(error_type), rng):
+            if question_id in exclude:
+                continue
+            if with_distractor and question_id in self._no_distractor_ids:
+                continue
+            if challenge_only and question_id in self._challenge_excluded_ids:
+                continue
+            question = self.question(question_id)
+            if with_distractor and question['틀린 선택지'] is None:
+                self._no_distractor_ids.add(question_id)
+                continue
+            if challenge_only and question['문제'] in self._challenge_excluded:
+                self._challenge_excluded_ids.add(question_id)
+                continue
+            return question
+        return None
+
+
+def load_corpus(quiz_bank_path=None):
+    """기본 규칙 데이터와 문제 은행으로 코퍼스를 만듭니다. 앱에서는 프로세스당 한 번만 호출합니다."""
+    return GrammarCorpus(GRAMMAR_DATA, open_quiz_bank(quiz_bank_path))
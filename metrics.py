@@ -0,0 +1,269 @@
+"""앱 내부 지표(카운터, 게이지, 시간 분포)를 모아 Prometheus 텍스트 형식이나 주기적인 로그 한 줄로 내보냅니다.
+
+환경 변수로 켭니다. 아무것도 설정하지 않으면 기록 함수는 아무 일도 하지 않고 바로 반환하며,
+timed()는 함수를 감싸지 않고 그대로 돌려주므로 꺼져 있을 때의 비용은 함수 호출 한 번 정도입니다.
+    APP_METRICS_PORT=9464           http://127.0.0.1:9464/metrics 에서 Prometheus 형식으로 제공
+    APP_METRICS_HOST=0.0.0.0        (선택) 지표 페이지를 열 주소, 기본값 127.0.0.1
+    APP_METRICS_LOG_INTERVAL=60     60초마다 'app.metrics' 로거로 JSON 한 줄을 남김
+
+Streamlit은 스크립트를 다시 실행할 때마다 앱 파일을 새로 실행하지만 이 모듈은 한 번만 import되므로,
+지표는 서버 프로세스 전체(모든 세션)에 걸쳐 누적됩니다.
+"""
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ENABLED = bool(os.getenv("APP_METRICS_PORT") or os.getenv("APP_METRICS_LOG_INTERVAL"))
+
+# 시간 분포(히스토그램) 구간 경계(초)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+logger = logging.getLogger("app.metrics")
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(label_key, extra=()):
+    pairs = list(label_key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+class Registry:
+    """지표 저장소. 같은 이름이라도 라벨 값이 다르면 따로 셉니다."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._counters = {}     # (이름, 라벨) -> 값
+        self._gauges = {}       # (이름, 라벨) -> 값
+        self._histograms = {}   # (이름, 라벨) -> [구간별 개수 리스트, 합계, 개수]
+        self._callbacks = {}    # 게이지 이름 -> 내보낼 때 값을 계산하는 함수
+
+    def inc(self, name, value=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        with self._lock:
+            self._gauges[(name, _label_key(labels))] = value
+
+    def set_callback(self, name, func):
+        """내보낼 때마다 func()를 불러 게이지 값을 정합니다. func가 None을 반환하면 건너뜁니다."""
+        with self._lock:
+            self._callbacks[name] = func
+
+    def observe(self, name, value, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    histogram[0][i] += 1
+                    break
+            histogram[1] += value
+            histogram[2] += 1
+
+    def _collect(self):
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            histograms = {key: (list(h[0]), h[1], h[2]) for key, h in self._histograms.items()}
+            callbacks = dict(self._callbacks)
+        for name, func in callbacks.items():
+            try:
+                value = func()
+            except Exception:
+                value = None
+            if value is not None:
+                gauges[(name, ())] = value
+        return counters, gauges, histograms
+
+    def render_prometheus(self):
+        """Prometheus 텍스트 형식(0.0.4)으로 모든 지표를 반환합니다."""
+        counters, gauges, histograms = self._collect()
+        lines = []
+        for kind, values in (("counter", counters), ("gauge", gauges)):
+            typed = set()
+            for (name, label_key), value in sorted(values.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {name} {kind}")
+                    typed.add(name)
+                lines.append(f"{name}{_format_labels(label_key)} {value}")
+        typed = set()
+        for (name, label_key), (counts, total, count) in sorted(histograms.items()):
+            if name not in typed:
+                lines.append(f"# TYPE {name} histogram")
+                typed.add(name)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{_format_labels(label_key, [('le', f'{bound:g}')])} {cumulative}")
+            lines.append(f"{name}_bucket{_format_labels(label_key, [('le', '+Inf')])} {count}")
+            lines.append(f"{name}_sum{_format_labels(label_key)} {total}")
+            lines.append(f"{name}_count{_format_labels(label_key)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        """로그에 남기기 좋은 dict. 시간 분포는 개수와 평균만 담습니다."""
+        counters, gauges, histograms = self._collect()
+        return {
+            "counters": {name + _format_labels(label_key): value for (name, label_key), value in counters.items()},
+            "gauges": {name + _format_labels(label_key): value for (name, label_key), value in gauges.items()},
+            "timings": {
+                name + _format_labels(label_key): {"count": count, "avg": total / count if count else 0.0}
+                for (name, label_key), (_, total, count) in histograms.items()
+            },
+        }
+
+
+# 서버 프로세스 전체가 공유하는 지표 저장소
+REGISTRY = Registry()
+
+
+def inc(name, value=1, **labels):
+    """카운터를 value만큼 올립니다."""
+    if ENABLED:
+        REGISTRY.inc(name, value, **labels)
+
+
+def set_gauge(name, value, **labels):
+    if ENABLED:
+        REGISTRY.set(name, value, **labels)
+
+
+def observe(name, seconds, **labels):
+    """걸린 시간(초)을 시간 분포에 기록합니다."""
+    if ENABLED:
+        REGISTRY.observe(name, seconds, **labels)
+
+
+class _Timer:
+    __slots__ = ("name", "labels", "started")
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        REGISTRY.observe(self.name, time.perf_counter() - self.started, **self.labels)
+
+
+_NULL_TIMER = nullcontext()
+
+
+def timer(name, **labels):
+    """with 블록이 걸린 시간을 기록하는 컨텍스트 매니저. 예외로 빠져나가도 기록합니다."""
+    if not ENABLED:
+        return _NULL_TIMER
+    return _Timer(name, labels)
+
+
+def timed(name, **labels):
+    """함수 실행 시간을 기록하는 데코레이터. 지표가 꺼져 있으면 함수를 그대로 반환합니다."""
+    def decorator(func):
+        if not ENABLED:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _Timer(name, labels):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def set_gauge_callback(name, func):
+    if ENABLED:
+        REGISTRY.set_callback(name, func)
+
+
+# --- Streamlit 실행·세션 ---
+
+SESSION_MARK_KEY = "_metrics_session_counted"
+
+
+def record_script_run(session_state, app):
+    """스크립트 실행 한 번을 세고, 처음 보는 세션이면 세션 수도 올립니다. 앱 파일 맨 위에서 부릅니다."""
+    if not ENABLED:
+        return
+    REGISTRY.inc("script_runs_total", app=app)
+    if SESSION_MARK_KEY not in session_state:
+        session_state[SESSION_MARK_KEY] = True
+        REGISTRY.inc("sessions_started_total", app=app)
+
+
+def _active_streamlit_sessions():
+    # Streamlit에 공개 API가 없어 런타임의 세션 관리자를 직접 읽음 (버전이 바뀌어 실패하면 지표만 빠짐)
+    from streamlit.runtime import Runtime
+    if not Runtime.exists():
+        return None
+    return Runtime.instance()._session_mgr.num_active_sessions()
+
+
+# --- 내보내기 ---
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = REGISTRY.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def _log_loop(interval):
+    while True:
+        time.sleep(interval)
+        logger.info(json.dumps({"ts": time.time(), **REGISTRY.snapshot()}, ensure_ascii=False))
+
+
+_exporters_started = False
+_exporters_lock = threading.Lock()
+
+
+def start_exporters():
+    """환경 변수에 따라 지표 페이지 서버와 주기 로그 스레드를 한 번만 시작합니다. 매 실행마다 불러도 됩니다."""
+    global _exporters_started
+    if not ENABLED or _exporters_started:
+        return
+    with _exporters_lock:
+        if _exporters_started:
+            return
+        _exporters_started = True
+        REGISTRY.set_callback("streamlit_active_sessions", _active_streamlit_sessions)
+        port = os.getenv("APP_METRICS_PORT")
+        if port:
+            server = ThreadingHTTPServer((os.getenv("APP_METRICS_HOST", "127.0.0.1"), int(port)), _MetricsHandler)
+            server.daemon_threads = True
+            threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        interval = os.getenv("APP_METRICS_LOG_INTERVAL")
+        if interval:
+            if not logger.handlers:
+                logger.addHandler(logging.StreamHandler())
+                logger.setLevel(logging.INFO)
+                logger.propagate = False
+            threading.Thread(target=_log_loop, args=(float(interval),), name="metrics-log", daemon=True).start()
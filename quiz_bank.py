@@ -0,0 +1,222 @@
+"""디스크에 저장된 퀴즈 문제 은행(JSONL + 오프셋 색인)입니다.
+
+문제는 한 줄에 하나씩 JSON으로 저장하고, 옆에 같은 이름의 `.idx` 색인 파일을 둡니다.
+두 파일 모두 mmap으로 열기 때문에 문제 수가 늘어나도 시작 시간과 메모리 사용량이 거의 일정하고,
+문제는 ID나 오류 유형으로 요청될 때만 JSON을 읽어 만듭니다.
+
+색인 파일 형식 (리틀 엔디언):
+    헤더      magic(4) | 문제 수(u32) | 유형 수(u32) | JSONL 크기(u64) | JSONL 수정 시각(u64, ns)
+    유형 표   유형마다 이름 길이(u16) | 이름(UTF-8) | 목록 시작 위치(u32) | 문제 수(u32)
+    레코드    문제마다 JSONL 오프셋(u64) | 길이(u32)   (문제 ID = 레코드 순서 + 1)
+    유형 목록 유형별 문제 ID(u32)를 이어 붙인 배열
+
+사용법 (교육과정 팀이 문제를 추가한 뒤 색인 다시 만들기):
+    python quiz_bank.py build data/quiz_bank.jsonl
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from collections.abc import Sequence
+
+MAGIC = b'QBK1'
+HEADER = struct.Struct('<4sIIQQ')
+TYPE_ENTRY = struct.Struct('<II')
+RECORD = struct.Struct('<QI')
+POSTING = struct.Struct('<I')
+
+REQUIRED_FIELDS = ('오류 유형', '문제', '정답', '오답들')
+
+DEFAULT_BANK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'quiz_bank.jsonl')
+
+
+def get_bank_path():
+    """환경 변수 QUIZ_BANK_PATH가 있으면 그 경로를, 없으면 기본 문제 은행 경로를 반환합니다."""
+    return os.getenv('QUIZ_BANK_PATH') or DEFAULT_BANK_PATH
+
+
+def default_index_path(jsonl_path):
+    """JSONL 파일 옆에 두는 색인 파일 경로를 반환합니다."""
+    return os.path.splitext(jsonl_path)[0] + '.idx'
+
+
+def build_index(jsonl_path, index_path=None):
+    """JSONL 문제 파일을 한 번 훑어 색인 파일을 만들고 색인 경로를 반환합니다."""
+    index_path = index_path or default_index_path(jsonl_path)
+    stat = os.stat(jsonl_path)
+
+    records = []
+    ids_by_type = {}
+    with open(jsonl_path, 'rb') as f:
+        offset = 0
+        for line_no, line in enumerate(f, 1):
+            length = len(line.rstrip(b'\r\n'))
+            if line.strip():
+                try:
+                    item = json.loads(line)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"{jsonl_path}:{line_no}: JSON 형식이 올바르지 않아요 ({e})") from e
+                missing = [field for field in REQUIRED_FIELDS if field not in item]
+                if missing:
+                    raise ValueError(f"{jsonl_path}:{line_no}: 필수 항목이 없어요: {', '.join(missing)}")
+                records.append((offset, length))
+                ids_by_type.setdefault(item['오류 유형'], []).append(len(records))
+            offset += len(line)
+
+    type_table = b''
+    postings = []
+    for error_type, ids in ids_by_type.items():
+        name = error_type.encode('utf-8')
+        type_table += struct.pack('<H', len(name)) + name + TYPE_ENTRY.pack(len(postings), len(ids))
+        postings.extend(ids)
+
+    # 다른 프로세스가 읽는 중에도 안전하도록 임시 파일에 쓴 뒤 교체
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(index_path)), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            out.write(HEADER.pack(MAGIC, len(records), len(ids_by_type), stat.st_size, stat.st_mtime_ns))
+            out.write(type_table)
+            for record in records:
+                out.write(RECORD.pack(*record))
+            for question_id in postings:
+                out.write(POSTING.pack(question_id))
+        os.replace(tmp_path, index_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return index_path
+
+
+def _index_is_current(jsonl_path, index_path):
+    """색인 파일이 있고 현재 JSONL 파일과 크기·수정 시각이 같은지 확인합니다."""
+    try:
+        stat = os.stat(jsonl_path)
+        with open(index_path, 'rb') as f:
+            header = f.read(HEADER.size)
+    except OSError:
+        return False
+    if len(header) < HEADER.size:
+        return False
+    magic, _, _, size, mtime_ns = HEADER.unpack(header)
+    return magic == MAGIC and size == stat.st_size and mtime_ns == stat.st_mtime_ns
+
+
+def ensure_index(jsonl_path):
+    """최신 색인 파일 경로를 반환합니다. 없거나 오래됐으면 새로 만듭니다."""
+    index_path = default_index_path(jsonl_path)
+    if _index_is_current(jsonl_path, index_path):
+        return index_path
+    try:
+        return build_index(jsonl_path, index_path)
+    except PermissionError:
+        # 배포 환경에서 데이터 폴더에 쓸 수 없으면 임시 폴더에 색인을 만듦
+        digest = hashlib.sha1(os.path.abspath(jsonl_path).encode('utf-8')).hexdigest()[:12]
+        index_path = os.path.join(tempfile.gettempdir(), f'quiz_bank_{digest}.idx')
+        if _index_is_current(jsonl_path, index_path):
+            return index_path
+        return build_index(jsonl_path, index_path)
+
+
+def _map_file(path):
+    """파일을 읽기 전용으로 mmap합니다. 빈 파일은 빈 bytes를 반환합니다."""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b''
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class _IdList(Sequence):
+    """색인 파일 안의 문제 ID 배열을 복사 없이 읽는 시퀀스."""
+
+    def __init__(self, buffer, start, count):
+        self._buffer = buffer
+        self._start = start
+        self._count = count
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self._count))]
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError(i)
+        return POSTING.unpack_from(self._buffer, self._start + i * POSTING.size)[0]
+
+
+class QuizBank:
+    """mmap으로 연 문제 은행. 문제는 요청될 때만 JSON에서 만들어집니다."""
+
+    def __init__(self, jsonl_path, index_path=None):
+        self.path = jsonl_path
+        index_path = index_path or ensure_index(jsonl_path)
+        self._data = _map_file(jsonl_path)
+        self._index = _map_file(index_path)
+
+        magic, count, type_count, _, _ = HEADER.unpack_from(self._index, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{index_path}: 문제 은행 색인 파일이 아니에요")
+
+        # 유형 표는 크기가 작으므로 한 번만 읽어 둠
+        pos = HEADER.size
+        type_ranges = []
+        for _ in range(type_count):
+            (name_len,) = struct.unpack_from('<H', self._index, pos)
+            pos += 2
+            name = bytes(self._index[pos:pos + name_len]).decode('utf-8')
+            pos += name_len
+            start, type_size = TYPE_ENTRY.unpack_from(self._index, pos)
+            pos += TYPE_ENTRY.size
+            type_ranges.append((name, start, type_size))
+
+        self._count = count
+        self._records_start = pos
+        postings_start = pos + count * RECORD.size
+        self._ids_by_type = {
+            name: _IdList(self._index, postings_start + start * POSTING.size, type_size)
+            for name, start, type_size in type_ranges
+        }
+        self._all_ids = range(1, count + 1)
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def error_types(self):
+        """문제 은행에 들어 있는 오류 유형 목록."""
+        return tuple(self._ids_by_type)
+
+    def ids(self, error_type=None):
+        """오류 유형(없으면 전체)에 속한 문제 ID 시퀀스를 반환합니다."""
+        if error_type is None:
+            return self._all_ids
+        return self._ids_by_type.get(error_type, ())
+
+    def get(self, question_id):
+        """문제 ID에 해당하는 문제를 JSON에서 읽어 새 dict로 반환합니다."""
+        if not 1 <= question_id <= self._count:
+            raise KeyError(question_id)
+        offset, length = RECORD.unpack_from(self._index, self._records_start + (question_id - 1) * RECORD.size)
+        item = json.loads(self._data[offset:offset + length])
+        item['ID'] = question_id
+        return item
+
+
+def open_quiz_bank(path=None):
+    """문제 은행을 엽니다. 색인이 없거나 오래됐으면 먼저 만듭니다."""
+    return QuizBank(path or get_bank_path())
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3 or sys.argv[1] != 'build':
+        print("사용법: python quiz_bank.py build <문제 은행.jsonl>")
+        sys.exit(1)
+    index_path = build_index(sys.argv[2])
+    bank = QuizBank(sys.argv[2], index_path)
+    print(f"색인 생성 완료: {index_path} (문제 {len(bank)}개, 유형 {len(bank.error_types)}개)")
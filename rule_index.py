@@ -0,0 +1,248 @@
+"""문법 규칙 검색용 글자 n-gram 역색인입니다.
+
+규칙 검색 상자는 글자를 입력할 때마다 다시 검색하므로, 규칙이 수백 개로 늘어나도 빠르도록
+모든 규칙의 원칙·틀린예·맞는예를 불러올 때 한 번 글자 1~3-gram으로 쪼개 역색인을 만듭니다.
+(한 글자 검색어 '돼', '안'도 자주 쓰이므로 1-gram도 색인합니다.)
+
+관련도는 검색어가 나온 필드(원칙 > 틀린예 > 맞는예)의 가중치 × 나온 횟수의 합으로 매기고, 같으면 먼저 나온
+필드, 그다음 규칙 DB 순서를 따릅니다. 결과는 모든 규칙을 훑는 방식(검색어가 필드의 부분 문자열인지 확인)과
+같고, 순서만 관련도 순으로 바뀝니다.
+
+- 3글자 이하 검색어는 그 자체가 n-gram이므로 색인할 때 미리 관련도 순으로 정렬해 둔 목록을 바로 돌려줍니다.
+- 더 긴 검색어는 3-gram마다 규칙 번호 목록(posting list)을 짧은 것부터 교집합해 후보를 줄이고,
+  후보만 실제 부분 문자열 검사로 확인하고 관련도를 계산합니다.
+
+철자를 틀린 검색어('어떠케', '되요')를 위해 fuzzy_search()도 제공합니다. 규칙에 나온 한글 낱말을 자모
+('어떻게' → 'ㅇㅓㄸㅓㅎㄱㅔ')로 풀어 두고, 자모 편집 거리가 가까운 낱말이 나온 규칙을 돌려줍니다.
+낱말마다 자모를 최대 거리만큼 지운 변형을 모두 색인해 두고(symmetric delete), 검색어도 같은 방식으로
+지운 변형만 찾아본 뒤 후보만 편집 거리를 계산하므로 낱말이 수천 개여도 1ms 안에 끝납니다.
+"""
+import re
+from collections import Counter, defaultdict
+from itertools import combinations
+
+from grammar_checker import decompose
+
+# 검색하는 필드와 관련도 가중치
+FIELD_WEIGHTS = (("원칙", 3), ("틀린예", 2), ("맞는예", 1))
+MAX_GRAM = 3
+# 퍼지 검색에서 허용하는 최대 자모 편집 거리
+MAX_DISTANCE = 2
+
+_CHO = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+_JUNG = "ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ"
+_JONG = ("", "ㄱ", "ㄲ", "ㄳ", "ㄴ", "ㄵ", "ㄶ", "ㄷ", "ㄹ", "ㄺ", "ㄻ", "ㄼ", "ㄽ", "ㄾ", "ㄿ", "ㅀ",
+         "ㅁ", "ㅂ", "ㅄ", "ㅅ", "ㅆ", "ㅇ", "ㅈ", "ㅊ", "ㅋ", "ㅌ", "ㅍ", "ㅎ")
+_HANGUL_WORD = re.compile("[가-힣]+")
+
+
+def _grams(text, n):
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def _count(text, term):
+    """text 안에 term이 나온 횟수 (겹치는 것도 셈, n-gram 개수와 같은 기준)."""
+    count = 0
+    position = text.find(term)
+    while position != -1:
+        count += 1
+        position = text.find(term, position + 1)
+    return count
+
+
+def _intersect(a, b):
+    """정렬된 두 번호 목록의 교집합 (두 포인터 병합)."""
+    result = []
+    i = j = 0
+    while i < len(a) and j < len(b):
+        if a[i] == b[j]:
+            result.append(a[i])
+            i += 1
+            j += 1
+        elif a[i] < b[j]:
+            i += 1
+        else:
+            j += 1
+    return result
+
+
+def to_jamo(text):
+    """한글 음절을 초성·중성·종성 자모로 풉니다. 한글 음절이 아닌 글자는 그대로 둡니다."""
+    parts = []
+    for char in text:
+        syllable = decompose(char)
+        if syllable is None:
+            parts.append(char)
+        else:
+            cho, jung, jong = syllable
+            parts.append(_CHO[cho] + _JUNG[jung] + _JONG[jong])
+    return "".join(parts)
+
+
+def _deletes(word, max_distance):
+    """word에서 글자를 0~max_distance개 지운 모든 변형."""
+    variants = {word}
+    for count in range(1, min(max_distance, len(word)) + 1):
+        for positions in combinations(range(len(word)), count):
+            variants.add("".join(char for i, char in enumerate(word) if i not in positions))
+    return variants
+
+
+def edit_distance(a, b, limit):
+    """a와 b의 편집 거리(레벤슈타인). limit을 넘으면 계산을 멈추고 limit + 1을 반환합니다."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class FuzzyIndex:
+    """낱말의 자모 편집 거리 검색 색인 (symmetric delete).
+
+    편집 거리가 d 이하인 두 문자열은 각각 글자를 d개 이하로 지워 같은 문자열을 만들 수 있으므로,
+    색인할 때 낱말의 지운 변형을, 검색할 때 검색어의 지운 변형을 만들어 겹치는 것만 후보로 봅니다.
+    """
+
+    def __init__(self, words, max_distance=MAX_DISTANCE):
+        self.max_distance = max_distance
+        self.words = []
+        self.jamo = []
+        self.variants = defaultdict(list)
+        for word in dict.fromkeys(words):
+            word_id = len(self.words)
+            self.words.append(word)
+            self.jamo.append(to_jamo(word))
+            for variant in _deletes(self.jamo[word_id], max_distance):
+                self.variants[variant].append(word_id)
+
+    def __len__(self):
+        return len(self.words)
+
+    def search(self, query, max_distance=None):
+        """자모 편집 거리가 max_distance 이하인 (거리, 낱말)을 거리 순으로 반환합니다."""
+        max_distance = self.max_distance if max_distance is None else min(max_distance, self.max_distance)
+        query = to_jamo(query)
+        found = {}
+        for variant in _deletes(query, max_distance):
+            for word_id in self.variants.get(variant, ()):
+                if word_id not in found:
+                    found[word_id] = edit_distance(query, self.jamo[word_id], max_distance)
+        return sorted((distance, self.words[word_id]) for word_id, distance in found.items()
+                      if distance <= max_distance)
+
+
+class RuleIndex:
+    """GRAMMAR_RULES_DB 모양(카테고리 -> {"규칙": [규칙, ...]})의 규칙을 색인합니다."""
+
+    def __init__(self, rules_db):
+        self.entries = []
+        self.fields = []
+        postings = defaultdict(list)
+        ranked = defaultdict(list)
+        for category, rules in rules_db.items():
+            for rule in rules.get("규칙", []):
+                rule_id = len(self.entries)
+                self.entries.append({
+                    "카테고리": category,
+                    "원칙": rule.get("원칙", ""),
+                    "설명": rule.get("설명", ""),
+                    "틀린예": rule.get("틀린예", ""),
+                    "맞는예": rule.get("맞는예", "")
+                })
+                fields = tuple(rule.get(field, "").lower() for field, _ in FIELD_WEIGHTS)
+                self.fields.append(fields)
+                # gram -> [관련도, 처음 나온 필드 순서]
+                scores = {}
+                for i, (text, (_, weight)) in enumerate(zip(fields, FIELD_WEIGHTS)):
+                    counts = Counter(text[j:j + n] for n in range(1, MAX_GRAM + 1) for j in range(len(text) - n + 1))
+                    for gram, count in counts.items():
+                        score = scores.setdefault(gram, [0, i])
+                        score[0] += weight * count
+                # 규칙 번호 순서로 추가하므로 posting list는 항상 정렬되어 있음
+                for gram, (score, first_field) in scores.items():
+                    postings[gram].append(rule_id)
+                    ranked[gram].append((-score, first_field, rule_id))
+        self.postings = dict(postings)
+        self.ranked = {gram: [rule_id for _, _, rule_id in sorted(keys)] for gram, keys in ranked.items()}
+        # 퍼지 검색용: 규칙에 나온 한글 낱말 -> 규칙 번호 목록
+        self.word_rules = defaultdict(list)
+        for rule_id, fields in enumerate(self.fields):
+            for word in dict.fromkeys(word for text in fields for word in _HANGUL_WORD.findall(text)):
+                self.word_rules[word].append(rule_id)
+        self.fuzzy = FuzzyIndex(self.word_rules)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def candidates(self, term):
+        """term의 n-gram을 모두 가진 규칙 번호 목록. term은 소문자로 정리된 것이어야 합니다."""
+        n = min(len(term), MAX_GRAM)
+        lists = []
+        for gram in _grams(term, n):
+            posting = self.postings.get(gram)
+            if posting is None:
+                return []
+            lists.append(posting)
+        lists.sort(key=len)
+        result = lists[0]
+        for posting in lists[1:]:
+            result = _intersect(result, posting)
+            if not result:
+                break
+        return result
+
+    def _score(self, rule_id, term):
+        """(관련도, 처음 나온 필드 순서) — 관련도가 0이면 검색어가 없는 규칙."""
+        score = 0
+        first_field = len(FIELD_WEIGHTS)
+        for i, (text, (_, weight)) in enumerate(zip(self.fields[rule_id], FIELD_WEIGHTS)):
+            count = _count(text, term)
+            if count:
+                score += weight * count
+                first_field = min(first_field, i)
+        return score, first_field
+
+    def search(self, word_or_phrase):
+        """검색어가 원칙·틀린예·맞는예 중 하나에 들어 있는 규칙을 관련도 순으로 반환합니다."""
+        term = word_or_phrase.lower().strip()
+        if not term:
+            return [dict(entry) for entry in self.entries]
+        if len(term) <= MAX_GRAM:
+            return [dict(self.entries[rule_id]) for rule_id in self.ranked.get(term, ())]
+        ranked = []
+        for rule_id in self.candidates(term):
+            score, first_field = self._score(rule_id, term)
+            if score:
+                ranked.append((-score, first_field, rule_id))
+        ranked.sort()
+        return [dict(self.entries[rule_id]) for _, _, rule_id in ranked]
+
+    def fuzzy_search(self, word_or_phrase, max_distance=MAX_DISTANCE):
+        """철자가 조금 틀린 검색어와 자모 편집 거리가 가까운 낱말이 나온 규칙을 가까운 순으로 반환합니다.
+
+        짧은 검색어일수록 엉뚱한 낱말과 가까워지기 쉬우므로 허용 거리는 자모 3개당 1로 줄입니다.
+        결과에는 규칙 항목에 '비슷한 말'(규칙에 나온 낱말)과 '거리'(자모 편집 거리)가 더해집니다.
+        """
+        term = "".join(word_or_phrase.lower().split())
+        if not term:
+            return []
+        max_distance = min(max_distance, len(to_jamo(term)) // 3)
+        best = {}
+        for distance, word in self.fuzzy.search(term, max_distance):
+            for rule_id in self.word_rules[word]:
+                if rule_id not in best:
+                    best[rule_id] = (distance, -self._score(rule_id, word)[0], rule_id, word)
+        results = []
+        for distance, _, rule_id, word in sorted(best.values()):
+            entry = dict(self.entries[rule_id])
+            entry["비슷한 말"] = word
+            entry["거리"] = distance
+            results.append(entry)
+        return results
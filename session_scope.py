@@ -0,0 +1,104 @@
+"""문제(또는 대화 턴)마다 만들어지는 session_state 키를 묶어 관리합니다.
+
+`submitted_answer_{id}`처럼 문제 ID가 붙는 키는 영역(namespace)별 범위(scope)에 등록해 두고,
+같은 영역에서 다른 문제로 넘어가면 이전 문제의 키를 자동으로 지웁니다.
+학생이 문제를 수백 개 풀어도 세션에는 지금 보고 있는 문제의 키만 남습니다.
+"""
+import sys
+from types import MappingProxyType
+
+REGISTRY_KEY = "_session_scopes"
+
+
+class SessionScope:
+    """한 영역의 현재 범위. key(name)는 `{name}_{scope_id}` 키를 만들고 범위에 등록합니다."""
+
+    def __init__(self, state, namespace, scope_id, keys):
+        self._state = state
+        self._keys = keys
+        self.namespace = namespace
+        self.scope_id = scope_id
+
+    def key(self, name):
+        """범위에 속한 session_state 키를 반환합니다. 위젯 key로도 쓸 수 있습니다."""
+        key = f"{name}_{self.scope_id}"
+        self._keys.add(key)
+        return key
+
+    def get(self, name, default=None):
+        return self._state.get(self.key(name), default)
+
+    def __getitem__(self, name):
+        return self._state[self.key(name)]
+
+    def __setitem__(self, name, value):
+        self._state[self.key(name)] = value
+
+    def clear(self):
+        """범위에 등록된 키를 모두 지웁니다. 범위 자체는 계속 쓸 수 있습니다."""
+        _delete_keys(self._state, self._keys)
+
+
+def _delete_keys(state, keys):
+    for key in keys:
+        if key in state:
+            del state[key]
+    keys.clear()
+
+
+def _registry(state):
+    if REGISTRY_KEY not in state:
+        state[REGISTRY_KEY] = {}
+    return state[REGISTRY_KEY]
+
+
+def enter_scope(state, namespace, scope_id):
+    """영역의 현재 범위를 scope_id로 정하고 SessionScope를 반환합니다.
+
+    영역에 다른 범위가 열려 있었다면 그 범위의 키를 먼저 지웁니다.
+    """
+    registry = _registry(state)
+    entry = registry.get(namespace)
+    if entry is not None and entry[0] != scope_id:
+        _delete_keys(state, entry[1])
+        entry = None
+    if entry is None:
+        entry = registry[namespace] = (scope_id, set())
+    return SessionScope(state, namespace, scope_id, entry[1])
+
+
+def release_scope(state, namespace):
+    """영역에 열려 있는 범위의 키를 지우고 범위를 닫습니다."""
+    registry = _registry(state)
+    entry = registry.pop(namespace, None)
+    if entry is not None:
+        _delete_keys(state, entry[1])
+
+
+def estimate_size(obj, seen=None):
+    """객체가 참조하는 값까지 합친 대략적인 바이트 수.
+
+    코퍼스가 모든 세션에 공유하는 읽기 전용 문제(MappingProxyType)는 세지 않습니다.
+    """
+    if seen is None:
+        seen = set()
+    if id(obj) in seen or isinstance(obj, MappingProxyType):
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(estimate_size(k, seen) + estimate_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item, seen) for item in obj)
+    return size
+
+
+def session_footprint(state):
+    """세션의 전체 키 수, 범위에 등록된 키 수, 대략적인 바이트 수를 dict로 반환합니다."""
+    items = {key: state[key] for key in list(state.keys())}
+    registry = items.get(REGISTRY_KEY, {})
+    return {
+        "keys": len(items),
+        "scoped_keys": sum(len(keys) for _, keys in registry.values()),
+        "bytes": estimate_size(items),
+    }
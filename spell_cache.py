@@ -0,0 +1,96 @@
+"""교정 펜의 맞춤법 검사 결과를 문장 단위로 캐시합니다.
+
+학생들은 같은 예문을 여러 번 붙여 넣으므로, 검사 결과를 정규화한 문장(NFC, 공백 정리)을 키로
+TieredCache에 저장해 두고 모든 세션이 같이 씁니다. 정규화한 문장은 키와 검사에만 쓰고, 돌려주는 결과는
+사용자가 입력한 원문(공백, 유니코드 형태 그대로)에 옮겨 적습니다. 메모리 단계는 LRU로 정리되고,
+SPELL_CHECK_CACHE_PATH를 설정하면 서버를 다시 시작해도 남도록 디스크(SQLite)에도 저장합니다.
+    SPELL_CHECK_CACHE_MEMORY   메모리에 둘 문장 수 (기본 1024)
+    SPELL_CHECK_CACHE_PATH     디스크 캐시 파일 경로 (기본: 디스크에 저장하지 않음)
+    SPELL_CHECK_CACHE_TTL      결과를 보관할 시간(초) (기본 7일)
+"""
+import os
+import re
+import unicodedata
+
+import metrics
+from grammar_checker import Checked
+from tiered_cache import TieredCache
+
+_TOKEN = re.compile(r"\S+")
+
+
+def normalize_sentence(text):
+    """유니코드를 NFC로 맞추고 연속 공백과 앞뒤 공백을 정리합니다."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def create_spell_cache():
+    """환경 변수 설정대로 검사 결과 캐시를 만듭니다."""
+    return TieredCache(
+        memory_size=int(os.getenv("SPELL_CHECK_CACHE_MEMORY", "1024")),
+        db_path=os.getenv("SPELL_CHECK_CACHE_PATH") or None,
+        ttl=float(os.getenv("SPELL_CHECK_CACHE_TTL", str(7 * 86400))),
+    )
+
+
+def _to_checked(value):
+    """캐시에서 꺼낸 값을 Checked로 바꿉니다. 디스크에서 온 값은 JSON 리스트라서 튜플로 되돌립니다."""
+    if isinstance(value, Checked):
+        return value
+    result, original, checked, errors, words, elapsed = value
+    words = {word: tuple(info) if isinstance(info, list) else info for word, info in words.items()}
+    return Checked(result, original, checked, errors, words, elapsed)
+
+
+def _restore(checked, text):
+    """정규화한 문장으로 검사한 결과를 원문 text에 옮깁니다.
+
+    어절 수가 같으면 바뀐 어절만 갈아 끼워 원문의 공백과 유니코드 형태를 살리고,
+    틀린 어절은 원문에 나온 형태(NFC 또는 NFD)로 적어 원문에서 위치를 찾을 수 있게 합니다.
+    """
+    if checked.original == text:
+        return checked
+    tokens = list(_TOKEN.finditer(text))
+    fixed_tokens = checked.checked.split()
+    if len(tokens) == len(fixed_tokens):
+        parts = []
+        position = 0
+        for match, fixed in zip(tokens, fixed_tokens):
+            token = match.group()
+            parts.append(text[position:match.start()])
+            parts.append(token if unicodedata.normalize("NFC", token) == fixed else fixed)
+            position = match.end()
+        parts.append(text[position:])
+        corrected = "".join(parts)
+    else:
+        # 띄어쓰기를 고쳐 어절 수가 달라지면 원문의 공백을 살릴 수 없으므로 고친 문장을 그대로 씀
+        corrected = checked.checked
+    words = {}
+    for word, info in checked.words.items():
+        decomposed = unicodedata.normalize("NFD", word)
+        words[decomposed if word not in text and decomposed in text else word] = info
+    return checked._replace(original=text, checked=corrected, words=words)
+
+
+class CachedSpellChecker:
+    """check(text)를 감싸 같은 문장(정규화 기준)은 다시 검사하지 않는 호출 가능 객체."""
+
+    def __init__(self, check, cache=None):
+        self.check = check
+        self.cache = cache if cache is not None else create_spell_cache()
+
+    def __call__(self, text):
+        key = normalize_sentence(text)
+        value = self.cache.get(key)
+        if value is not None:
+            metrics.inc("spell_check_cache_total", result="hit")
+            return _restore(_to_checked(value), text)
+        metrics.inc("spell_check_cache_total", result="miss")
+        checked = _to_checked(tuple(self.check(key)))
+        # 검사에 실패한 결과는 저장하지 않음
+        if checked.result:
+            self.cache.put(key, checked)
+        return _restore(checked, text)
+
+    def stats(self):
+        return self.cache.stats()
@@ -0,0 +1,209 @@
+"""바이트 단위로 동작하는 점진적 SSE(Server-Sent Events) 파서입니다.
+
+네트워크에서 받은 바이트 조각을 그대로 feed()에 넣으면 완성된 이벤트를 돌려줍니다.
+줄마다 문자열로 디코딩하지 않고 bytearray 버퍼 위에서 줄 끝과 필드 이름을 찾으며,
+\\n, \\r\\n, \\r 줄 끝, 여러 줄 data 필드, event·id·retry 필드, ':'로 시작하는 keep-alive 주석을
+SSE 명세(WHATWG HTML)에 따라 처리합니다.
+
+Gemini 응답에서는 extract_text()가 전체 JSON을 dict로 만들지 않고 첫 번째 "text" 값만 꺼냅니다.
+"""
+import json
+from json.decoder import scanstring
+from typing import NamedTuple, Optional
+
+_BOM = b'\xef\xbb\xbf'
+
+
+class SSEEvent(NamedTuple):
+    """완성된 SSE 이벤트. data는 여러 줄 data 필드를 '\\n'으로 이어 붙인 바이트입니다."""
+
+    event: str
+    data: bytes
+    id: str
+    retry: Optional[int]
+
+
+class SSEParser:
+    """바이트 조각을 받아 SSE 이벤트를 만드는 점진적 파서."""
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._data = []
+        self._event = b''
+        self._started = False
+        self.last_event_id = ''
+        self.retry = None
+        self.comments = 0  # 받은 keep-alive 주석 수
+        self.truncated = False  # finish()에서 끝나지 않은 이벤트를 버렸으면 True
+
+    def feed(self, chunk):
+        """받은 바이트 조각을 처리하고, 이번에 완성된 이벤트 리스트를 반환합니다."""
+        buf = self._buffer
+        buf += chunk
+        if not self._started:
+            if len(buf) < len(_BOM) and _BOM.startswith(bytes(buf)):
+                return []
+            if buf.startswith(_BOM):
+                del buf[:len(_BOM)]
+            self._started = True
+
+        events = []
+        pos = 0
+        size = len(buf)
+        # 줄 끝 위치를 한 번 찾으면 지나갈 때까지 다시 찾지 않아 버퍼를 반복해서 훑지 않음
+        next_lf = buf.find(b'\n')
+        next_cr = buf.find(b'\r')
+        with memoryview(buf) as view:
+            while True:
+                if next_lf != -1 and next_lf < pos:
+                    next_lf = buf.find(b'\n', pos)
+                if next_cr != -1 and next_cr < pos:
+                    next_cr = buf.find(b'\r', pos)
+                if next_cr == -1 or (next_lf != -1 and next_lf < next_cr):
+                    if next_lf == -1:
+                        break
+                    end, following = next_lf, next_lf + 1
+                elif next_cr + 1 < size:
+                    end = next_cr
+                    following = next_cr + 2 if buf[next_cr + 1] == 0x0A else next_cr + 1
+                else:
+                    # '\r' 다음에 '\n'이 올지 아직 모르므로 다음 조각을 기다림
+                    break
+                event = self._process_line(buf, view, pos, end)
+                if event is not None:
+                    events.append(event)
+                pos = following
+        if pos:
+            del buf[:pos]
+        return events
+
+    def finish(self):
+        """스트림이 끝났을 때 호출하고, 마지막으로 완성된 이벤트 리스트를 반환합니다.
+
+        '\r'로 끝난 마지막 줄은 뒤에 '\n'이 올지 기다리던 것이므로 여기서 처리합니다.
+        명세에 따라 빈 줄로 끝나지 않은 이벤트(줄 끝 없이 끊긴 줄 포함)는 내보내지 않고 버리며,
+        버린 내용이 있으면 truncated가 True가 되어 연결이 이벤트 중간에 끊긴 것을 알 수 있습니다.
+        """
+        events = []
+        buf = self._buffer
+        if buf.endswith(b'\r'):
+            with memoryview(buf) as view:
+                event = self._process_line(buf, view, 0, len(buf) - 1)
+            if event is not None:
+                events.append(event)
+            buf.clear()
+        self.truncated = bool(buf or self._data or self._event)
+        buf.clear()
+        self._data = []
+        self._event = b''
+        return events
+
+    def _process_line(self, buf, view, start, end):
+        """한 줄을 처리합니다. 빈 줄이면 모아 둔 이벤트를 반환합니다."""
+        if start == end:
+            return self._dispatch()
+        if buf[start] == 0x3A:  # ':' 주석 (keep-alive)
+            self.comments += 1
+            return None
+
+        colon = buf.find(b':', start, end)
+        if colon == -1:
+            name_end, value_start = end, end
+        else:
+            name_end = colon
+            value_start = colon + 1
+            if value_start < end and buf[value_start] == 0x20:
+                value_start += 1
+        name_len = name_end - start
+
+        if name_len == 4 and buf.startswith(b'data', start):
+            self._data.append(bytes(view[value_start:end]))
+        elif name_len == 5 and buf.startswith(b'event', start):
+            self._event = bytes(view[value_start:end])
+        elif name_len == 2 and buf.startswith(b'id', start):
+            value = bytes(view[value_start:end])
+            if b'\x00' not in value:
+                self.last_event_id = value.decode('utf-8', 'replace')
+        elif name_len == 5 and buf.startswith(b'retry', start):
+            value = bytes(view[value_start:end])
+            if value.isdigit():
+                self.retry = int(value)
+        # 그 밖의 필드는 명세에 따라 무시
+        return None
+
+    def _dispatch(self):
+        """모아 둔 필드로 이벤트를 만들고 상태를 초기화합니다. data가 없으면 None을 반환합니다."""
+        data = self._data
+        event_type = self._event
+        self._data = []
+        self._event = b''
+        if not data:
+            return None
+        payload = data[0] if len(data) == 1 else b'\n'.join(data)
+        return SSEEvent(event_type.decode('utf-8', 'replace') or 'message', payload, self.last_event_id, self.retry)
+
+
+def extract_text(data):
+    """Gemini 응답 JSON(바이트)에서 첫 번째 후보의 첫 번째 텍스트를 꺼냅니다. 없으면 None을 반환합니다.
+
+    전체 JSON을 dict로 만들지 않고 "text" 키의 문자열 값만 읽습니다.
+    예상과 다른 모양이면 json.loads로 전체를 파싱해 확인합니다.
+    """
+    try:
+        text = data.decode('utf-8')
+    except UnicodeDecodeError:
+        return None
+    key = text.find('"text"')
+    if key != -1 and text.find('"candidates"', 0, key) != -1:
+        i = key + 6
+        length = len(text)
+        while i < length and text[i] in ' \t\r\n':
+            i += 1
+        if i < length and text[i] == ':':
+            i += 1
+            while i < length and text[i] in ' \t\r\n':
+                i += 1
+            if i < length and text[i] == '"':
+                try:
+                    return scanstring(text, i + 1)[0]
+                except ValueError:
+                    pass
+
+    try:
+        parsed = json.loads(text)
+    except ValueError:
+        return None
+    if not isinstance(parsed, dict):
+        return None
+    candidates = parsed.get("candidates") or []
+    if candidates:
+        content = candidates[0].get("content") or {}
+        parts = content.get("parts") or []
+        if parts and "text" in parts[0]:
+            return parts[0]["text"]
+    return None
+
+
+class SSETruncatedError(ValueError):
+    """스트림이 이벤트 중간(빈 줄 전)에 끝났을 때 iter_sse_text()가 올리는 오류."""
+
+
+def iter_sse_text(byte_chunks):
+    """바이트 조각의 이터러블에서 SSE 'message' 이벤트를 읽어 Gemini 텍스트 청크를 yield합니다.
+
+    연결이 이벤트 중간에 끊긴 채 끝나면 끝까지 받은 것처럼 보이지 않도록 SSETruncatedError를 올립니다.
+    """
+    parser = SSEParser()
+    for chunk in byte_chunks:
+        for event in parser.feed(chunk):
+            if event.event == 'message':
+                text = extract_text(event.data)
+                if text is not None:
+                    yield text
+    for event in parser.finish():
+        if event.event == 'message':
+            text = extract_text(event.data)
+            if text is not None:
+                yield text
+    if parser.truncated:
+        raise SSETruncatedError("스트림이 이벤트 중간에 끝났어요")
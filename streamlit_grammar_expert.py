@@ -3,9 +3,30 @@
 import streamlit as st
 import pandas as pd
 import random
-from py_hanspell.spell_checker import check as hanspell_check
+import os
 from collections import Counter
 
+import batch_checker
+import metrics
+from error_matcher import rank_categories
+from grammar_checker import AN_ANH, DE_DAE, DOE_DWAE, EOTTEOKAE, EYO_YEYO
+from rule_index import RuleIndex
+from spell_cache import CachedSpellChecker
+
+# 맞춤법 검사기: 기본은 원격 맞춤법 검사 서비스(py-hanspell),
+# SPELL_CHECKER=local이면 네트워크 없이 도는 로컬 규칙 검사기(grammar_checker, 5가지 규칙만 검사)
+SPELL_CHECKER = os.getenv("SPELL_CHECKER", "hanspell")
+if SPELL_CHECKER == "hanspell":
+    from py_hanspell.spell_checker import check as spell_check
+else:
+    from grammar_checker import check as spell_check
+
+
+@st.cache_resource
+def get_spell_checker():
+    """검사 결과 캐시를 서버 프로세스당 한 번만 만들어 모든 세션이 공유합니다."""
+    return CachedSpellChecker(spell_check)
+
 # --- 한국어 문법 규칙 전문가 DB (5가지 핵심 규칙) ---
 GRAMMAR_RULES_DB = {
     "데/대_구분": {
@@ -118,114 +139,96 @@ GRAMMAR_RULES_DB = {
     }
 }
 
+@st.cache_resource
+def get_rule_index() -> RuleIndex:
+    """규칙 검색용 n-gram 색인을 서버 프로세스당 한 번만 만들어 모든 세션이 공유합니다."""
+    return RuleIndex(GRAMMAR_RULES_DB)
+
 def get_detailed_grammar_explanation(word_or_phrase: str) -> list:
-    """주어진 단어나 문구에 대한 정확한 문법 설명을 반환한다."""
-    search_term = word_or_phrase.lower().strip()
-    explanations = []
-    
-    for category, rules in GRAMMAR_RULES_DB.items():
-        for rule in rules.get("규칙", []):
-            # 정확한 키워드 매칭 (오류 방지)
-            if (search_term in rule.get("틀린예", "").lower() or
-                search_term in rule.get("맞는예", "").lower() or
-                search_term in rule.get("원칙", "").lower()):
-                explanations.append({
-                    "카테고리": category,
-                    "원칙": rule.get("원칙", ""),
-                    "설명": rule.get("설명", ""),
-                    "틀린예": rule.get("틀린예", ""),
-                    "맞는예": rule.get("맞는예", "")
-                })
-    
-    return explanations
+    """주어진 단어나 문구에 대한 정확한 문법 설명을 관련도 순으로 반환한다."""
+    return get_rule_index().search(word_or_phrase)
+
+# 오류 유형 -> (GRAMMAR_RULES_DB 키, 화면에 보여줄 이름)
+ERROR_CATEGORIES = {
+    DE_DAE: ("데/대_구분", "데/대 구분"),
+    EYO_YEYO: ("이에요_예요_구분", "이에요/예요 구분"),
+    EOTTEOKAE: ("어떡해_어떻게_구분", "어떡해/어떻게 구분"),
+    DOE_DWAE: ("되_돼_구분", "되/돼 구분"),
+    AN_ANH: ("안_않_구분", "안/않 구분"),
+}
+
+def _pick_rule(error_type: str, original_word: str):
+    """오류 유형의 규칙 중 틀린 어절에 맞는 규칙을 고른다. 맞는 규칙이 없으면 None."""
+    rules = GRAMMAR_RULES_DB.get(ERROR_CATEGORIES[error_type][0], {}).get("규칙", [])
+    if not rules:
+        return None
+    if error_type == DE_DAE:
+        return rules[0]
+    if error_type == EYO_YEYO:
+        return rules[1] if original_word == '아니예요' else rules[0]
+    for rule in rules:
+        if original_word in rule.get("틀린예", "").lower():
+            return rule
+    return None
 
 def analyze_error_precisely(original_word: str, corrected_word: str) -> dict:
-    """오류를 정확히 분석하여 관련 규칙을 찾는다."""
+    """오류를 정확히 분석하여 관련 규칙을 찾는다.
+
+    틀린 어절과 고친 어절에서 해당하는 오류 유형을 모두 찾고(error_matcher),
+    달라진 글자에 걸친 유형부터 차례로 맞는 규칙을 찾는다. categories에는 찾은 유형이 순위대로 담긴다.
+    """
     result = {
         "found": False,
         "category": None,
         "rule": None,
         "explanation": None,
         "wrong_example": None,
-        "correct_example": None
+        "correct_example": None,
+        "categories": []
     }
-    
-    # 5가지 핵심 규칙별 정확한 매칭
-    # 1. 데/대 구분
-    if original_word in ['대', '데'] or '대' in original_word or '데' in original_word:
-        if 'GRAMMAR_RULES_DB' in dir():
-            for rule in GRAMMAR_RULES_DB.get("데/대_구분", {}).get("규칙", []):
-                result = {
-                    "found": True,
-                    "category": "데/대 구분",
-                    "rule": rule.get("원칙"),
-                    "explanation": rule.get("설명"),
-                    "wrong_example": rule.get("틀린예"),
-                    "correct_example": rule.get("맞는예")
-                }
-                return result
-    
-    # 2. 이에요/예요 구분
-    if original_word in ['예요', '이에요', '아니예요', '아니에요'] or '예요' in original_word or '이에요' in original_word:
-        if original_word == '아니예요':
-            rule = GRAMMAR_RULES_DB.get("이에요_예요_구분", {}).get("규칙", [])[1]
-        else:
-            rule = GRAMMAR_RULES_DB.get("이에요_예요_구분", {}).get("규칙", [])[0]
-        
-        result = {
-            "found": True,
-            "category": "이에요/예요 구분",
-            "rule": rule.get("원칙"),
-            "explanation": rule.get("설명"),
-            "wrong_example": rule.get("틀린예"),
-            "correct_example": rule.get("맞는예")
-        }
-        return result
-    
-    # 3. 어떡해/어떻게 구분
-    if '어떡해' in original_word or '어떻게' in original_word:
-        for rule in GRAMMAR_RULES_DB.get("어떡해_어떻게_구분", {}).get("규칙", []):
-            if original_word in rule.get("틀린예", "").lower():
-                result = {
-                    "found": True,
-                    "category": "어떡해/어떻게 구분",
-                    "rule": rule.get("원칙"),
-                    "explanation": rule.get("설명"),
-                    "wrong_example": rule.get("틀린예"),
-                    "correct_example": rule.get("맞는예")
-                }
-                return result
-    
-    # 4. 되/돼 구분
-    if original_word in ['돼', '되'] or '돼' in original_word or '되' in original_word:
-        for rule in GRAMMAR_RULES_DB.get("되_돼_구분", {}).get("규칙", []):
-            if original_word in rule.get("틀린예", "").lower():
-                result = {
-                    "found": True,
-                    "category": "되/돼 구분",
-                    "rule": rule.get("원칙"),
-                    "explanation": rule.get("설명"),
-                    "wrong_example": rule.get("틀린예"),
-                    "correct_example": rule.get("맞는예")
-                }
-                return result
-    
-    # 5. 안/않 구분
-    if original_word in ['안', '않'] or '안' in original_word or '않' in original_word:
-        for rule in GRAMMAR_RULES_DB.get("안_않_구분", {}).get("규칙", []):
-            if original_word in rule.get("틀린예", "").lower():
-                result = {
-                    "found": True,
-                    "category": "안/않 구분",
-                    "rule": rule.get("원칙"),
-                    "explanation": rule.get("설명"),
-                    "wrong_example": rule.get("틀린예"),
-                    "correct_example": rule.get("맞는예")
-                }
-                return result
-    
+
+    ranked = rank_categories(original_word, corrected_word)
+    result["categories"] = [ERROR_CATEGORIES[error_type][1] for error_type in ranked]
+    for error_type in ranked:
+        rule = _pick_rule(error_type, original_word)
+        if rule is not None:
+            result.update({
+                "found": True,
+                "category": ERROR_CATEGORIES[error_type][1],
+                "rule": rule.get("원칙"),
+                "explanation": rule.get("설명"),
+                "wrong_example": rule.get("틀린예"),
+                "correct_example": rule.get("맞는예")
+            })
+            return result
+
     return result
 
+def show_error_analysis(original_word: str, corrected_word: str, error_type: str, sentence_no=None):
+    """틀린 어절 하나의 오류 유형과 적용되는 문법 규칙을 펼침 상자로 보여준다."""
+    where = f"{sentence_no}번째 문장 · " if sentence_no else ""
+    with st.expander(f"{where}❌ '{original_word}' → ✅ '{corrected_word}'", expanded=True):
+        st.markdown(f"**오류 유형**: `{error_type}`")
+        st.markdown(f"**올바른 표현**: `{corrected_word}`")
+
+        # 정확한 문법 설명 검색
+        error_analysis = analyze_error_precisely(original_word, corrected_word)
+
+        if error_analysis.get("found"):
+            st.markdown("---")
+            st.markdown("**📚 적용되는 문법 규칙**")
+            st.markdown(f"**규칙**: {error_analysis['rule']}")
+            st.markdown(f"**설명**: {error_analysis['explanation']}")
+            st.markdown("---")
+            st.error(f"❌ 틀린 예: {error_analysis['wrong_example']}")
+            st.success(f"✅ 맞는 예: {error_analysis['correct_example']}")
+            others = [c for c in error_analysis["categories"] if c != error_analysis["category"]]
+            if others:
+                st.caption(f"이 어절에는 {', '.join(others)} 규칙의 표현도 들어 있어요.")
+        else:
+            # 기본 안내
+            st.info("이 오류는 5가지 핵심 규칙 중 하나에 해당합니다. '5가지 규칙 완전 학습' 탭에서 더 자세히 배워보세요!")
+
 # --- 페이지 기본 설정 ---
 st.set_page_config(
     page_title="한국어 문법 전문가 AI - 핵심 5가지 규칙",
@@ -234,6 +237,10 @@ st.set_page_config(
     initial_sidebar_state="auto",
 )
 
+# 운영 지표 (APP_METRICS_PORT나 APP_METRICS_LOG_INTERVAL을 설정했을 때만 기록)
+metrics.start_exporters()
+metrics.record_script_run(st.session_state, "expert")
+
 # --- 세션 상태 초기화 ---
 if 'errors' not in st.session_state:
     st.session_state.errors = []
@@ -266,57 +273,49 @@ with tab1:
 
     if st.button("맞춤법 검사하기", type="primary", use_container_width=True):
         if sentence_input:
-            with st.spinner("분석 중..."):
-                try:
-                    spelled_sent = hanspell_check(sentence_input)
-                    original_text = spelled_sent.original
-                    corrected_text = spelled_sent.checked
-                    
-                    st.subheader("✨ 교정 결과")
+            try:
+                st.subheader("✨ 교정 결과")
+                comparison = st.empty()
+                # 문장별 검사가 끝나는 대로 아래에 오류 분석을 바로 보여주고, 전체 결과는 마지막에 위 자리에 채움
+                total = len(batch_checker.split_sentences(sentence_input))
+                progress = st.progress(0.0, text="분석 중...")
+                analysis_header = st.empty()
+                chunks = []
+                # 지표에는 화면 그리는 시간을 빼고 문장마다 검사기 호출 시간만 기록
+                check = metrics.timed("spell_check_seconds", checker=SPELL_CHECKER)(get_spell_checker())
+                for chunk in batch_checker.iter_check(sentence_input, check):
+                    chunks.append(chunk)
+                    progress.progress(len(chunks) / total, text=f"분석 중... ({len(chunks)}/{total} 문장)")
+                    if chunk.error is not None:
+                        st.warning(f"{chunk.index + 1}번째 문장을 검사하지 못했어요: {chunk.error}")
+                        continue
+                    if chunk.findings:
+                        analysis_header.subheader("📖 오류 분석 & 정확한 설명")
+                    for finding in chunk.findings:
+                        show_error_analysis(finding.word, finding.corrected, finding.error_type,
+                                            sentence_no=chunk.index + 1 if total > 1 else None)
+                        st.session_state.errors.append({
+                            "틀린 단어": finding.word,
+                            "맞는 단어": finding.corrected,
+                            "오류 유형": finding.error_type
+                        })
+                progress.empty()
+
+                spelled_sent = batch_checker.merge(sentence_input, chunks)
+                with comparison.container():
                     col1, col2 = st.columns(2)
                     with col1:
-                        st.text_input("📝 원래 문장", original_text, disabled=True)
+                        st.text_input("📝 원래 문장", spelled_sent.original, disabled=True)
                     with col2:
-                        st.text_input("✅ 고친 문장", corrected_text, disabled=True)
+                        st.text_input("✅ 고친 문장", spelled_sent.checked, disabled=True)
 
-                    if spelled_sent.errors > 0:
-                        st.info(f"🔍 {spelled_sent.errors}개의 맞춤법 오류를 찾았어요!")
-                        st.subheader("📖 오류 분석 & 정확한 설명")
-                        
-                        for original_word, error_info in spelled_sent.words.items():
-                            error_type = error_info[0]
-                            corrected_word = error_info[1]
-                            
-                            with st.expander(f"❌ '{original_word}' → ✅ '{corrected_word}'", expanded=True):
-                                st.markdown(f"**오류 유형**: `{error_type}`")
-                                st.markdown(f"**올바른 표현**: `{corrected_word}`")
-                                
-                                # 정확한 문법 설명 검색
-                                error_analysis = analyze_error_precisely(original_word, corrected_word)
-                                
-                                if error_analysis.get("found"):
-                                    st.markdown("---")
-                                    st.markdown("**📚 적용되는 문법 규칙**")
-                                    st.markdown(f"**규칙**: {error_analysis['rule']}")
-                                    st.markdown(f"**설명**: {error_analysis['explanation']}")
-                                    st.markdown("---")
-                                    st.error(f"❌ 틀린 예: {error_analysis['wrong_example']}")
-                                    st.success(f"✅ 맞는 예: {error_analysis['correct_example']}")
-                                else:
-                                    # 기본 안내
-                                    st.info("이 오류는 5가지 핵심 규칙 중 하나에 해당합니다. '5가지 규칙 완전 학습' 탭에서 더 자세히 배워보세요!")
-                            
-                            st.session_state.errors.append({
-                                "틀린 단어": original_word,
-                                "맞는 단어": corrected_word,
-                                "오류 유형": error_type
-                            })
-                        
-                        st.success("✅ 오류를 오답 노트에 기록했어요!")
-                    else:
-                        st.success("🎉 완벽한 문장이에요!")
-                except Exception as e:
-                    st.error(f"오류 발생: {str(e)}")
+                if spelled_sent.errors > 0:
+                    st.info(f"🔍 {spelled_sent.errors}개의 맞춤법 오류를 찾았어요!")
+                    st.success("✅ 오류를 오답 노트에 기록했어요!")
+                elif spelled_sent.result:
+                    st.success("🎉 완벽한 문장이에요!")
+            except Exception as e:
+                st.error(f"오류 발생: {str(e)}")
         else:
             st.warning("문장을 입력해주세요!")
 
@@ -442,13 +441,19 @@ with tab5:
         results = get_detailed_grammar_explanation(search_keyword)
         if results:
             st.success(f"🎯 '{search_keyword}'과 관련된 {len(results)}개의 규칙을 찾았어요!")
-            for result in results:
-                with st.expander(f"[{result['카테고리'].replace('_', '/')}] {result['원칙']}"):
-                    st.info(result['설명'])
-                    st.error(f"❌ {result['틀린예']}")
-                    st.success(f"✅ {result['맞는예']}")
         else:
-            st.info(f"📌 '{search_keyword}'과 관련된 규칙을 찾지 못했어요. 다른 단어로 시도해보세요.")
+            # 철자가 틀린 검색어('어떠케', '되요')는 자모 편집 거리가 가까운 낱말로 다시 찾음
+            results = get_rule_index().fuzzy_search(search_keyword)
+            if results:
+                similar_words = ", ".join(f"'{word}'" for word in dict.fromkeys(r['비슷한 말'] for r in results))
+                st.info(f"🤔 '{search_keyword}'과 똑같은 말은 없지만, 비슷한 말 {similar_words}이 나오는 규칙을 찾았어요!")
+            else:
+                st.info(f"📌 '{search_keyword}'과 관련된 규칙을 찾지 못했어요. 다른 단어로 시도해보세요.")
+        for result in results:
+            with st.expander(f"[{result['카테고리'].replace('_', '/')}] {result['원칙']}"):
+                st.info(result['설명'])
+                st.error(f"❌ {result['틀린예']}")
+                st.success(f"✅ {result['맞는예']}")
     
     st.markdown("---")
     st.subheader("📌 5가지 핵심 규칙 요약")
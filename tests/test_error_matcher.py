@@ -0,0 +1,24 @@
+"""오류 유형 매처가 고쳐진 글자에 걸친 유형을 먼저 내놓는지 확인합니다."""
+import pytest
+
+from error_matcher import rank_categories
+from grammar_checker import AN_ANH, DE_DAE, DOE_DWAE, EOTTEOKAE, EYO_YEYO
+
+
+@pytest.mark.parametrize("original, corrected, expected", [
+    ("안되", "안돼", [DOE_DWAE, AN_ANH]),
+    ("않돼", "안돼", [AN_ANH, DOE_DWAE]),
+    ("대학생예요", "대학생이에요", [EYO_YEYO, DE_DAE]),
+    ("재미있데요", "재미있대요", [DE_DAE]),
+    ("안되요", "안돼요", [DOE_DWAE, AN_ANH]),
+    ("어떻해", "어떡해", [EOTTEOKAE]),
+    ("됬어요", "됐어요", [DOE_DWAE]),
+    ("학교", "학교", []),
+])
+def test_rank_categories(original, corrected, expected):
+    assert rank_categories(original, corrected) == expected
+
+
+def test_without_corrected_word_ties_follow_category_order():
+    assert rank_categories("안되") == [DOE_DWAE, AN_ANH]
+    assert rank_categories("그렇데") == [DE_DAE]
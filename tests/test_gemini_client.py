@@ -0,0 +1,316 @@
+"""대역 서버(fake_gemini_server)로 gemini_client의 모델 목록 캐시, 스트림이 중간에 끊기는 경우 등을 확인합니다."""
+import json
+import time
+
+import pytest
+
+import gemini_client
+from fake_gemini_server import FakeGeminiServer
+from gemini_client import (DEFAULT_MODELS, GeminiErrorMessage, HealthRegistry, HedgeStats, ModelCatalog,
+                           stream_gemini_response)
+from tiered_cache import TieredCache
+
+MODEL = "gemini-1.5-flash"
+MODELS = [("v1beta", MODEL)]
+PAYLOAD = {"contents": [{"role": "user", "parts": [{"text": "안녕?"}]}]}
+
+
+@pytest.fixture
+def fake_models(monkeypatch):
+    """모델별 동작 dict로 대역 서버를 띄우고 GEMINI_API_BASE를 그 서버로 바꿉니다."""
+    servers = []
+
+    def start(models):
+        server = FakeGeminiServer(models).start()
+        servers.append(server)
+        monkeypatch.setattr(gemini_client, "GEMINI_API_BASE", server.base_url)
+        return server
+
+    yield start
+    for server in servers:
+        server.stop()
+
+
+@pytest.fixture
+def fake_server(fake_models):
+    def start(**behavior):
+        return fake_models({MODEL: {"chunks": ["A", "B", "C"], **behavior}})
+
+    return start
+
+
+def stream(**options):
+    """(받은 청크, 캐시, 상태 기록)을 반환합니다."""
+    cache = TieredCache(memory_size=16)
+    health = HealthRegistry()
+    chunks = list(stream_gemini_response(PAYLOAD, "test-key", MODELS, health=health, cache=cache, **options))
+    return chunks, cache, health
+
+
+def cached(cache, model=MODEL):
+    return cache.get(gemini_client.payload_cache_key(PAYLOAD, model))
+
+
+def test_complete_stream_is_cached(fake_server):
+    fake_server()
+    chunks, cache, _ = stream(probe_mode="sequential", hedge=False)
+    assert chunks == ["A", "B", "C"]
+    assert cached(cache) == ["A", "B", "C"]
+
+
+def test_cache_key_includes_model():
+    assert gemini_client.payload_cache_key(PAYLOAD, "gemini-pro") != gemini_client.payload_cache_key(PAYLOAD, MODEL)
+
+
+def test_cached_answer_is_not_served_for_another_model(fake_models):
+    server = fake_models({"gemini-pro": {"chunks": ["프로"]}, MODEL: {"chunks": ["플래시"]}})
+    cache = TieredCache(memory_size=16)
+    health = HealthRegistry()
+
+    def turn(models):
+        return list(stream_gemini_response(PAYLOAD, "test-key", models, probe_mode="sequential", hedge=False,
+                                           health=health, cache=cache))
+
+    assert turn([("v1beta", MODEL)]) == ["플래시"]
+    assert turn([("v1beta", "gemini-pro")]) == ["프로"]
+    assert turn([("v1beta", MODEL)]) == ["플래시"]
+    assert len([record for record in server.requests if record.method == "POST"]) == 2
+
+
+def test_fallback_answer_is_cached_under_fallback_model(fake_models):
+    fake_models({"gemini-pro": {"status": 503, "fail_first": 2, "chunks": ["프로"]}, MODEL: {"chunks": ["플래시"]}})
+    cache = TieredCache(memory_size=16)
+    models = [("v1beta", "gemini-pro"), ("v1beta", MODEL)]
+
+    def turn():
+        return list(stream_gemini_response(PAYLOAD, "test-key", models, probe_mode="sequential", hedge=False,
+                                           health=HealthRegistry(), cache=cache))
+
+    # gemini-pro가 두 엔드포인트 모두 실패해 대체 모델이 답함
+    assert turn() == ["플래시"]
+    assert cached(cache, "gemini-pro") is None
+    assert cached(cache, MODEL) == ["플래시"]
+    # gemini-pro가 살아나면 대체 모델의 답을 돌려주지 않고 gemini-pro에 요청함
+    assert turn() == ["프로"]
+    assert cached(cache, "gemini-pro") == ["프로"]
+
+
+def test_truncated_stream_sequential_reports_error_without_fallback(fake_server):
+    server = fake_server(truncate_after=1)
+    chunks, cache, _ = stream(probe_mode="sequential", hedge=False)
+    assert chunks[0] == "A"
+    assert isinstance(chunks[-1], GeminiErrorMessage)
+    assert len(chunks) == 2
+    # 받은 부분이 있으면 다른 엔드포인트로 넘어가 답을 겹치지 않음
+    assert [record.action for record in server.requests if record.method == "POST"] == ["streamGenerateContent"]
+    assert cached(cache) is None
+
+
+def test_truncated_stream_hedged_reports_error(fake_server):
+    fake_server(truncate_after=1)
+    chunks, cache, health = stream(probe_mode="sequential", hedge=True)
+    assert chunks[0] == "A"
+    assert isinstance(chunks[-1], GeminiErrorMessage)
+    assert cached(cache) is None
+    stats = health.snapshot()[f"v1beta/{MODEL}/streamGenerateContent"]
+    assert stats["last_error"] == "stream_interrupted"
+
+
+def test_truncated_stream_parallel_reports_error(fake_server):
+    fake_server(truncate_after=1, methods=["streamGenerateContent"])
+    chunks, cache, health = stream(probe_mode="parallel", deadline=10)
+    assert chunks[0] == "A"
+    assert isinstance(chunks[-1], GeminiErrorMessage)
+    assert cached(cache) is None
+    assert health.snapshot()[f"v1beta/{MODEL}/streamGenerateContent"]["last_error"] == "stream_interrupted"
+
+
+def list_requests(server):
+    return [record for record in server.requests if record.action == "list"]
+
+
+@pytest.fixture
+def catalog_server(fake_models):
+    return fake_models({"gemini-pro": {}, "gemini-1.5-flash": {"versions": ["v1beta"]}})
+
+
+def test_catalog_get_returns_defaults_and_refreshes_in_background(catalog_server, tmp_path):
+    catalog = ModelCatalog("test-key", ttl=3600, cache_path=str(tmp_path / "models.json"))
+    # 처음에는 네트워크를 기다리지 않고 기본 모델을 돌려줌
+    assert catalog.get() == list(DEFAULT_MODELS)
+    catalog.refresh_in_background().join(5)
+    # v1beta에서 목록을 받았으므로 v1은 조회하지 않고, PRIORITY_ORDER 순으로 정렬
+    assert catalog.get() == [("v1beta", "gemini-pro"), ("v1beta", "gemini-1.5-flash")]
+    # TTL 안에서는 다시 조회하지 않음
+    catalog.get()
+    assert catalog._refresh_thread is None or not catalog._refresh_thread.is_alive()
+    assert len(list_requests(catalog_server)) == 1
+
+
+def test_catalog_refreshes_after_ttl_expires(catalog_server, tmp_path):
+    catalog = ModelCatalog("test-key", ttl=0.05, cache_path=str(tmp_path / "models.json"))
+    catalog.refresh()
+    assert len(list_requests(catalog_server)) == 1
+    time.sleep(0.1)
+    # 만료된 목록은 그대로 돌려주면서 백그라운드에서 다시 조회
+    assert ("v1beta", "gemini-pro") in catalog.get()
+    catalog._refresh_thread.join(5)
+    assert len(list_requests(catalog_server)) == 2
+
+
+def test_catalog_keeps_previous_models_when_refresh_fails(tmp_path):
+    calls = []
+
+    def fetch(api_key):
+        calls.append(api_key)
+        return [("v1", "gemini-pro")] if len(calls) == 1 else []
+
+    catalog = ModelCatalog("test-key", ttl=0, cache_path=str(tmp_path / "models.json"), failure_ttl=60, fetch=fetch)
+    assert catalog.refresh() == [("v1", "gemini-pro")]
+    assert catalog.refresh() == [("v1", "gemini-pro")]
+    # 실패한 뒤에는 failure_ttl 동안 다시 조회하지 않음
+    catalog.get()
+    assert len(calls) == 2
+
+
+def test_catalog_round_trips_through_disk(catalog_server, tmp_path):
+    cache_path = str(tmp_path / "models.json")
+    models = ModelCatalog("test-key", ttl=3600, cache_path=cache_path).refresh()
+    with open(cache_path, encoding="utf-8") as f:
+        saved = json.load(f)
+    assert "test-key" not in json.dumps(saved)
+
+    # 다시 시작한 서버는 파일의 목록을 바로 쓰고 네트워크를 조회하지 않음
+    restarted = ModelCatalog("test-key", ttl=3600, cache_path=cache_path)
+    assert restarted.get() == models
+    assert restarted._refresh_thread is None
+    assert len(list_requests(catalog_server)) == 1
+
+    # 다른 API 키의 목록은 쓰지 않음
+    other = ModelCatalog("other-key", ttl=3600, cache_path=cache_path, fetch=lambda api_key: [])
+    assert other.get() == list(DEFAULT_MODELS)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+FLAKY = ("v1beta", "gemini-pro", "streamGenerateContent", True)
+STEADY = ("v1beta", "gemini-1.5-flash", "streamGenerateContent", True)
+
+
+def test_health_opens_circuit_after_threshold_and_recovers_after_cooldown():
+    clock = FakeClock()
+    health = HealthRegistry(clock=clock)
+    cooldown = HealthRegistry.POLICIES["server_error"][1]
+    for _ in range(2):
+        health.record_failure(FLAKY[:3], "server_error")
+    # 문턱(3번) 전에는 계속 시도하되, 기록이 없는 후보보다 뒤로 보냄
+    assert health.order([FLAKY, STEADY]) == [STEADY, FLAKY]
+    health.record_failure(FLAKY[:3], "server_error")
+    assert health.order([FLAKY, STEADY]) == [STEADY]
+
+    # 쿨다운이 지나면 반쯤 열린 상태로 한 번 더 시도할 수 있음
+    clock.now += cooldown
+    assert health.order([FLAKY, STEADY]) == [STEADY, FLAKY]
+    # 반쯤 열린 상태에서 다시 실패하면 문턱을 기다리지 않고 바로 회로를 엶
+    health.record_failure(FLAKY[:3], "server_error")
+    assert health.order([FLAKY, STEADY]) == [STEADY]
+
+    # 성공하면 회로를 닫고 실패 횟수를 초기화함
+    clock.now += cooldown
+    health.record_success(FLAKY[:3], 0.1)
+    assert health.snapshot()["v1beta/gemini-pro/streamGenerateContent"]["open"] is False
+    health.record_failure(FLAKY[:3], "server_error")
+    assert FLAKY in health.order([FLAKY, STEADY])
+
+
+def test_health_retry_after_overrides_cooldown():
+    clock = FakeClock()
+    health = HealthRegistry(clock=clock)
+    health.record_failure(FLAKY[:3], "rate_limited", retry_after=5)
+    assert health.order([FLAKY, STEADY]) == [STEADY]
+    clock.now += 5
+    assert health.order([FLAKY, STEADY]) == [STEADY, FLAKY]
+
+
+def test_health_returns_all_candidates_when_every_circuit_is_open():
+    health = HealthRegistry(clock=FakeClock())
+    for candidate in (FLAKY, STEADY):
+        health.record_failure(candidate[:3], "not_found")
+    assert health.order([FLAKY, STEADY]) == [FLAKY, STEADY]
+
+
+def test_health_orders_successful_endpoints_by_latency():
+    health = HealthRegistry(clock=FakeClock())
+    health.record_success(FLAKY[:3], 0.5)
+    health.record_success(STEADY[:3], 0.1)
+    assert health.order([FLAKY, STEADY]) == [STEADY, FLAKY]
+
+
+def test_health_skips_missing_model_on_later_turns(fake_models):
+    server = fake_models({"gemini-pro": {"status": 404}, MODEL: {"chunks": ["A"]}})
+    health = HealthRegistry()
+    models = [("v1beta", "gemini-pro"), ("v1beta", MODEL)]
+    for _ in range(2):
+        chunks = list(stream_gemini_response(PAYLOAD, "test-key", models, probe_mode="sequential",
+                                             hedge=False, health=health, cache=TieredCache(memory_size=16)))
+        assert chunks == ["A"]
+    # 404는 첫 턴에 회로를 열어, 두 번째 턴에는 없는 모델에 요청하지 않음
+    missing = [record.action for record in server.requests if record.model == "gemini-pro"]
+    assert missing == ["streamGenerateContent", "generateContent"]
+    assert health.snapshot()["v1beta/gemini-pro/generateContent"]["open"] is True
+
+
+HEDGE_MODELS = [("v1beta", "gemini-pro"), ("v1beta", MODEL)]
+
+
+def hedged_turn(stats, hedge_delay=0.05):
+    return list(gemini_client._stream_hedged(PAYLOAD, "test-key", HEDGE_MODELS, HealthRegistry(), stats, hedge_delay))
+
+
+def test_hedge_fires_and_wins_when_primary_is_slow(fake_models):
+    fake_models({"gemini-pro": {"latency": 1.0, "chunks": ["느림"]}, MODEL: {"chunks": ["빠름"]}})
+    stats = HedgeStats(default_delay=0.05)
+    assert hedged_turn(stats) == ["빠름"]
+    snapshot = stats.snapshot()
+    assert (snapshot["turns"], snapshot["hedged"], snapshot["hedge_wins"], snapshot["primary_wins"]) == (1, 1, 1, 0)
+
+
+def test_hedge_not_fired_when_primary_is_fast(fake_models):
+    fake_models({"gemini-pro": {"chunks": ["빠름"]}, MODEL: {"chunks": ["헤지"]}})
+    stats = HedgeStats(default_delay=5)
+    assert hedged_turn(stats, hedge_delay=5) == ["빠름"]
+    snapshot = stats.snapshot()
+    assert (snapshot["turns"], snapshot["hedged"], snapshot["hedge_wins"], snapshot["primary_wins"]) == (1, 0, 0, 1)
+    assert snapshot["hedge_rate"] == 0.0
+
+
+def test_hedge_fired_but_primary_wins(fake_models):
+    fake_models({"gemini-pro": {"latency": 0.3, "chunks": ["주"]}, MODEL: {"latency": 2.0, "chunks": ["헤지"]}})
+    stats = HedgeStats()
+    assert hedged_turn(stats) == ["주"]
+    snapshot = stats.snapshot()
+    assert (snapshot["hedged"], snapshot["hedge_wins"], snapshot["primary_wins"]) == (1, 0, 1)
+
+
+def test_hedge_failed_turn_counts_no_winner(fake_models):
+    fake_models({"gemini-pro": {"status": 500}, MODEL: {"status": 500}})
+    stats = HedgeStats()
+    chunks = hedged_turn(stats)
+    assert len(chunks) == 1 and isinstance(chunks[0], GeminiErrorMessage)
+    snapshot = stats.snapshot()
+    assert (snapshot["turns"], snapshot["hedge_wins"], snapshot["primary_wins"]) == (1, 0, 0)
+
+
+def test_hedge_delay_uses_ttft_percentile_once_enough_samples():
+    stats = HedgeStats(percentile=90, default_delay=2.0, min_samples=10)
+    for ttft in range(1, 10):
+        stats.record_turn(False, False, ttft / 10)
+    assert stats.hedge_delay() == 2.0
+    stats.record_turn(False, False, 1.0)
+    assert stats.hedge_delay() == 0.9
@@ -0,0 +1,31 @@
+"""로컬 규칙 검사기가 틀린 말을 고치고, 맞는 말(장소 '에요', 명사 '안', 단위 '되')은 건드리지 않는지 확인합니다."""
+import pytest
+
+from grammar_checker import check
+
+
+@pytest.mark.parametrize("text", [
+    "집에요.",
+    "학교에요.",
+    "3시에요.",
+    "바지 안은 따뜻해.",
+    "상자 안을 봐.",
+    "쌀 한 되.",
+    "쌀 2되.",
+])
+def test_correct_sentence_is_unchanged(text):
+    checked = check(text)
+    assert checked.checked == text
+    assert checked.errors == 0
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("저는 학생예요.", "저는 학생이에요."),
+    ("친구는 의사에요.", "친구는 의사예요."),
+    ("이건 제 가방에요.", "이건 제 가방이에요."),
+    ("밥을 먹지 안았어요.", "밥을 먹지 않았어요."),
+    ("그러면 않돼.", "그러면 안돼."),
+    ("이제 어른이 되.", "이제 어른이 돼."),
+])
+def test_wrong_sentence_is_fixed(text, expected):
+    assert check(text).checked == expected
@@ -0,0 +1,68 @@
+"""문제 샘플링이 조건에 맞는 문제를 고르면서 문제 은행 전체를 읽지 않는지 확인합니다."""
+import json
+import random
+from collections import Counter
+
+import pytest
+
+import grammar_corpus
+from grammar_corpus import GRAMMAR_DATA, GrammarCorpus
+from quiz_bank import QuizBank, build_index
+
+BANK_SIZE = 2000
+
+
+class CountingBank(QuizBank):
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.reads = 0
+
+    def get(self, question_id):
+        self.reads += 1
+        return super().get(question_id)
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    path = tmp_path / "bank.jsonl"
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(BANK_SIZE):
+            item = {"오류 유형": "되/돼", "문제": f"{i}번: 그러면 안[되/돼].", "정답": "그러면 안돼.", "오답들": ["그러면 안되."]}
+            f.write(json.dumps(item, ensure_ascii=False) + "\n")
+    # 챗봇 선택지를 만들 수 없는 문제 하나와 도전 퀴즈에서 빼는 문제 하나
+    bad = {"오류 유형": "되/돼", "문제": "빈칸 없는 문제", "정답": "같은 문장", "오답들": []}
+    excluded = {"오류 유형": "되/돼", "문제": "되/돼를 구분하는 방법은 무엇인가요?", "정답": "해/하", "오답들": ["몰라"]}
+    with open(path, "a", encoding="utf-8") as f:
+        for item in (bad, excluded):
+            f.write(json.dumps(item, ensure_ascii=False) + "\n")
+    return GrammarCorpus(GRAMMAR_DATA, CountingBank(str(path), build_index(str(path))))
+
+
+def test_shuffled_is_a_uniform_permutation():
+    rng = random.Random(0)
+    assert sorted(grammar_corpus._shuffled(range(50), rng)) == list(range(50))
+    firsts = Counter(next(grammar_corpus._shuffled("abcd", rng)) for _ in range(4000))
+    assert set(firsts) == set("abcd")
+    assert min(firsts.values()) > 800
+
+
+def test_heavy_exclude_reads_one_question(corpus):
+    keep = 1234
+    exclude = set(range(1, BANK_SIZE + 3)) - {keep}
+    assert corpus.sample_question(exclude=exclude)["ID"] == keep
+    assert corpus.quiz_bank.reads == 1
+    assert corpus.sample_question(exclude=exclude | {keep}) is None
+    assert corpus.quiz_bank.reads == 1
+
+
+def test_rejected_questions_are_read_once(corpus):
+    bad_id, excluded_id = BANK_SIZE + 1, BANK_SIZE + 2
+    only = set(range(1, BANK_SIZE + 1))
+    assert corpus.sample_question(exclude=only | {excluded_id}, with_distractor=True) is None
+    assert corpus.sample_question(exclude=only | {bad_id}, challenge_only=True) is None
+    reads = corpus.quiz_bank.reads
+    corpus.question.cache_clear()
+    assert corpus.sample_question(exclude=only, with_distractor=True, challenge_only=True) is None
+    assert corpus.quiz_bank.reads == reads
+    assert corpus.sample_question(exclude=only, with_distractor=True)["ID"] == excluded_id
+    assert corpus.quiz_bank.reads == reads + 1
@@ -0,0 +1,42 @@
+"""문제 은행의 모든 문제에 챗봇 선택지용 틀린 문장이 있는지, 틀린 문장이 없는 문제가 앱을 멈추지 않는지 확인합니다."""
+import json
+
+import pytest
+
+from distractors import make_distractor
+from grammar_corpus import GRAMMAR_DATA, GrammarCorpus
+from quiz_bank import DEFAULT_BANK_PATH, QuizBank, build_index
+
+
+def bank_items():
+    with open(DEFAULT_BANK_PATH, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+@pytest.mark.parametrize("item", bank_items(), ids=lambda item: item["문제"])
+def test_every_bank_item_has_distractor(item):
+    distractor = make_distractor(item)
+    assert distractor is not None
+    assert distractor != item["정답"]
+
+
+@pytest.mark.parametrize("item", bank_items(), ids=lambda item: item["문제"])
+def test_rules_match_curated_wrong_answers(item):
+    # 오답이 없는 새 문제도 치환 규칙만으로 사람이 만든 오답과 같은 틀린 문장을 얻음
+    assert make_distractor(dict(item, 오답들=[])) in item["오답들"]
+
+
+def test_item_without_distractor_is_only_skipped_by_chatbot(tmp_path, caplog):
+    bad = {"오류 유형": "되/돼", "문제": "빈칸 없는 문제", "정답": "같은 문장", "오답들": ["같은 문장"]}
+    good = {"오류 유형": "되/돼", "문제": "그러면 안[되/돼].", "정답": "그러면 안돼.", "오답들": ["그러면 안되."]}
+    path = tmp_path / "bank.jsonl"
+    path.write_text("\n".join(json.dumps(item, ensure_ascii=False) for item in (bad, good)) + "\n", encoding="utf-8")
+
+    corpus = GrammarCorpus(GRAMMAR_DATA, QuizBank(str(path), build_index(str(path))))
+    assert len(corpus.quiz_bank) == 2
+    # 본 퀴즈와 레벨업 퀴즈는 오답들만 쓰므로 계속 출제됨
+    assert corpus.sample_question(exclude={2})["정답"] == "같은 문장"
+    for _ in range(20):
+        assert corpus.sample_question(with_distractor=True)["ID"] == 2
+    assert corpus.sample_question(exclude={2}, with_distractor=True) is None
+    assert "챗봇에는 출제하지 않습니다" in caplog.text
@@ -0,0 +1,36 @@
+"""정규화한 문장은 캐시 키로만 쓰고, 결과는 사용자가 입력한 원문에 맞춰 돌려주는지 확인합니다."""
+import unicodedata
+
+import batch_checker
+from grammar_checker import check
+from spell_cache import CachedSpellChecker
+from tiered_cache import TieredCache
+
+
+def make_checker():
+    return CachedSpellChecker(check, TieredCache(memory_size=16))
+
+
+def test_whitespace_is_kept():
+    text = "친구가 그러는데   영화가 재미있데.\t그러면  안되."
+    checked = make_checker()(text)
+    assert checked.original == text
+    assert checked.checked == "친구가 그러는데   영화가 재미있대.\t그러면  안돼."
+
+
+def test_cache_hit_is_mapped_onto_new_text():
+    checker = make_checker()
+    checker("그러면 안되.")
+    checked = checker("그러면    안되.")
+    assert checker.stats()["hits"] == 1
+    assert checked.checked == "그러면    안돼."
+
+
+def test_nfd_input_keeps_findings():
+    text = unicodedata.normalize("NFD", "내 친구가 그러는데 그 영화 재미있데.\n그러면 안되.")
+    results = list(batch_checker.iter_check(text, make_checker(), max_workers=1))
+    findings = sorted(finding.word for result in results for finding in result.findings)
+    assert findings == sorted(unicodedata.normalize("NFD", word) for word in ("재미있데", "안되"))
+    merged = batch_checker.merge(text, results)
+    assert merged.checked.count("\n") == 1
+    assert unicodedata.normalize("NFC", merged.checked) == "내 친구가 그러는데 그 영화 재미있대.\n그러면 안돼."
@@ -0,0 +1,43 @@
+"""sse_parser가 스트림 끝(EOF)에서 끝나지 않은 이벤트를 버리는지 확인합니다."""
+import json
+
+import pytest
+
+from sse_parser import SSEParser, SSETruncatedError, iter_sse_text
+
+
+def event(text):
+    body = {"candidates": [{"content": {"parts": [{"text": text}], "role": "model"}, "index": 0}]}
+    return b"data: " + json.dumps(body).encode("utf-8") + b"\r\n\r\n"
+
+
+def test_complete_stream():
+    assert list(iter_sse_text([event("A"), event("B")])) == ["A", "B"]
+
+
+def test_complete_stream_split_inside_line_ending():
+    body = event("A") + event("B")
+    assert list(iter_sse_text([body[:-1], body[-1:]])) == ["A", "B"]
+
+
+def test_cut_off_final_event_is_not_dispatched():
+    half = event("B")[:len(event("B")) // 2]
+    received = []
+    with pytest.raises(SSETruncatedError):
+        for text in iter_sse_text([event("A"), half]):
+            received.append(text)
+    assert received == ["A"]
+
+
+def test_event_without_blank_line_is_discarded():
+    parser = SSEParser()
+    assert parser.feed(b"data: one\n\ndata: two\n") != []
+    assert parser.finish() == []
+    assert parser.truncated
+
+
+def test_blank_line_ending_in_cr_at_eof_completes_event():
+    parser = SSEParser()
+    assert parser.feed(b"data: one\r\r") == []
+    assert [e.data for e in parser.finish()] == [b"one"]
+    assert not parser.truncated
@@ -0,0 +1,139 @@
+"""메모리 LRU와 SQLite 디스크 두 단계로 이루어진 키-값 캐시입니다.
+
+값은 JSON으로 저장할 수 있는 객체여야 합니다. 자주 쓰는 항목은 메모리에서 바로 꺼내고,
+메모리에서 밀려난 항목이나 서버를 다시 시작하기 전의 항목은 디스크에서 찾아 메모리로 다시 올립니다.
+두 단계 모두 TTL이 지나면 만료되고, 정해진 개수를 넘으면 가장 오래 쓰지 않은 항목부터 지웁니다.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class TieredCache:
+    """스레드 안전한 메모리 LRU + SQLite 캐시.
+
+    db_path가 None이면 메모리 단계만 사용합니다.
+    """
+
+    def __init__(self, memory_size=256, db_path=None, ttl=86400, max_disk_entries=5000, clock=time.time):
+        self.memory_size = memory_size
+        self.ttl = ttl
+        self.max_disk_entries = max_disk_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()  # key -> (저장 시각, 값)
+        self._db = None
+        self._puts_since_trim = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if db_path:
+            self._db = self._open_db(db_path)
+
+    def _open_db(self, db_path):
+        """디스크 단계를 엽니다. 열 수 없으면 메모리 단계만 사용합니다."""
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS entries_accessed_at ON entries (accessed_at)")
+            return db
+        except sqlite3.Error:
+            return None
+
+    def get(self, key):
+        """키에 해당하는 값을 반환합니다. 없거나 만료됐으면 None을 반환합니다."""
+        now = self._clock()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if now - entry[0] <= self.ttl:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._memory[key]
+
+            if self._db is not None:
+                try:
+                    row = self._db.execute(
+                        "SELECT value, created_at FROM entries WHERE key = ?", (key,)
+                    ).fetchone()
+                    if row is not None and now - row[1] <= self.ttl:
+                        self._db.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+                        value = json.loads(row[0])
+                        self._remember(key, row[1], value)
+                        self.hits += 1
+                        self.disk_hits += 1
+                        return value
+                    if row is not None:
+                        self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                except sqlite3.Error:
+                    pass
+
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        """값을 두 단계 모두에 저장합니다."""
+        now = self._clock()
+        with self._lock:
+            self._remember(key, now, value)
+            if self._db is None:
+                return
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO entries (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value, ensure_ascii=False), now, now),
+                )
+                # 정리 작업은 가끔씩만 실행
+                self._puts_since_trim += 1
+                if self._puts_since_trim >= 64:
+                    self._puts_since_trim = 0
+                    self._trim_disk(now)
+            except sqlite3.Error:
+                pass
+
+    def _remember(self, key, created_at, value):
+        """메모리 단계에 넣고 크기를 넘으면 가장 오래 쓰지 않은 항목을 뺍니다."""
+        self._memory[key] = (created_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def _trim_disk(self, now):
+        """만료된 항목과 개수 제한을 넘는 오래된 항목을 디스크에서 지웁니다."""
+        self._db.execute("DELETE FROM entries WHERE created_at < ?", (now - self.ttl,))
+        self._db.execute(
+            "DELETE FROM entries WHERE key IN ("
+            "SELECT key FROM entries ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_disk_entries,),
+        )
+
+    def clear(self):
+        """모든 항목을 지웁니다."""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                try:
+                    self._db.execute("DELETE FROM entries")
+                except sqlite3.Error:
+                    pass
+
+    def stats(self):
+        """적중·실패 횟수와 메모리 항목 수를 dict로 반환합니다."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+            }